@@ -0,0 +1,194 @@
+"""
+Modo de execução ASGI (assíncrono) do postgresql2prisma.
+
+No servidor Flask cada requisição ocupa uma thread até terminar, então chamadas
+lentas ao Grok (chat do dicionário de dados) ou a um endpoint GraphQL externo
+(introspection, até 30s) prendem threads e atrasam as rotas rápidas de metadados.
+
+Aqui essas duas rotas são atendidas por views assíncronas: a espera pela API do
+Grok (AsyncOpenAI) e pelo endpoint GraphQL (httpx) não ocupa thread nem conexão
+do banco. O acesso ao banco do chat (contexto do dicionário e cache de respostas)
+é curto e roda em uma thread, com o mesmo pool da sessão usado pelo Flask. As demais rotas são
+servidas pela própria aplicação Flask, montada como WSGI com um número limitado
+de threads.
+
+Uso:
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import contextlib
+import os
+
+import anyio
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from main import (
+    CACHED_USAGE,
+    CHAT_STREAM_OPTIONS,
+    DB_SESSION_COOKIE,
+    GRAPHQL_INTROSPECTION_QUERY,
+    GROK_BASE_URL,
+    GROK_CHAT_OPTIONS,
+    ChatStream,
+    LazyClient,
+    RequestError,
+    app as flask_app,
+    cached_chat_events,
+    complete_chat,
+    db_session_id,
+    logger,
+    parse_graphql_introspection,
+    prepare_chat,
+)
+
+# Threads que atendem as rotas síncronas (Flask/WSGI)
+ASGI_WSGI_WORKERS = int(os.getenv('ASGI_WSGI_WORKERS', '10'))
+# Conexões simultâneas aos endpoints GraphQL (o padrão do httpx, 100, seria o gargalo)
+ASGI_HTTP_MAX_CONNECTIONS = int(os.getenv('ASGI_HTTP_MAX_CONNECTIONS', '1000'))
+
+def create_async_grok_client():
+    """Cria o cliente AsyncOpenAI com a mesma configuração (chave e URL) do cliente síncrono do main.py"""
+    api_key = os.getenv('XAI_API_KEY')
+    if not api_key:
+        return None
+    try:
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key, base_url=GROK_BASE_URL)
+    except Exception as e:
+        logger.error(f"Erro ao inicializar cliente Grok assíncrono: {e}")
+        return None
+
+# Criado na primeira conversa (ver get_async_grok_client)
+async_grok_client = LazyClient(create_async_grok_client)
+
+# Cliente HTTP compartilhado (pool de conexões) das introspections GraphQL
+http_client = None
+
+async def get_async_grok_client():
+    """Retorna o cliente Grok assíncrono; a criação (importação do openai) roda em uma thread, fora do event loop"""
+    if async_grok_client.initialized:
+        return async_grok_client.get()
+    return await anyio.to_thread.run_sync(async_grok_client.get)
+
+async def stream_chat_completion(messages, cache_key=None):
+    """
+    Versão assíncrona de main.stream_chat_completion: mesmos eventos SSE (ChatStream),
+    sem ocupar uma thread durante a geração.
+    """
+    chat = ChatStream(cache_key)
+    stream = None
+    try:
+        stream = await async_grok_client.get().chat.completions.create(messages=messages, **CHAT_STREAM_OPTIONS)
+        async for chunk in stream:
+            event = chat.feed(chunk)
+            if event:
+                yield event
+        # Gravação no cache de respostas (disco) fora do event loop
+        yield await anyio.to_thread.run_sync(chat.finish)
+    except Exception as e:
+        yield chat.fail(e)
+    finally:
+        # Cliente desconectado no meio da resposta: encerra a conexão com a API
+        if stream is not None:
+            await stream.close()
+
+async def chat_data_dictionary(request):
+    """Endpoint assíncrono para chat com Grok sobre o dicionário de dados"""
+    try:
+        client = await get_async_grok_client()
+        if not client:
+            return JSONResponse({
+                'error': 'Serviço de IA não disponível. Configure XAI_API_KEY no arquivo .env'
+            }, status_code=503)
+
+        data = await request.json()
+        # Sessão do navegador (define o banco); a thread herda o contexto da requisição
+        db_session_id.set(request.cookies.get(DB_SESSION_COOKIE))
+        messages, cache_key, cached = await anyio.to_thread.run_sync(prepare_chat, data)
+
+        # Modo streaming: repassa os tokens ao navegador como server-sent events
+        if data.get('stream'):
+            if cached:
+                events = cached_chat_events(cached)
+            else:
+                events = stream_chat_completion(messages, cache_key)
+            return StreamingResponse(
+                events,
+                media_type='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        if cached:
+            return JSONResponse({**cached, 'usage': CACHED_USAGE})
+
+        response = await client.chat.completions.create(messages=messages, **GROK_CHAT_OPTIONS)
+        return JSONResponse(await anyio.to_thread.run_sync(complete_chat, response, cache_key))
+
+    except RequestError as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status)
+    except Exception as e:
+        logger.error(f"Erro no chat: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def introspect_graphql(request):
+    """Endpoint assíncrono de introspection GraphQL (queries, mutations e subscriptions)"""
+    try:
+        data = await request.json()
+        graphql_url = data.get('url', '').strip()
+
+        if not graphql_url:
+            return JSONResponse({'error': 'URL não fornecida'}, status_code=400)
+
+        response = await http_client.post(
+            graphql_url,
+            json={'query': GRAPHQL_INTROSPECTION_QUERY},
+            headers={'Content-Type': 'application/json'},
+            timeout=30
+        )
+
+        if response.status_code != 200:
+            return JSONResponse({
+                'error': f'Erro ao conectar com o endpoint GraphQL: HTTP {response.status_code}'
+            }, status_code=400)
+
+        return JSONResponse(parse_graphql_introspection(response.json()))
+
+    except RequestError as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status)
+    except httpx.TimeoutException:
+        return JSONResponse({'error': 'Timeout ao conectar com o endpoint GraphQL'}, status_code=408)
+    except httpx.HTTPError as e:
+        logger.error(f"Erro ao fazer requisição GraphQL: {e}")
+        return JSONResponse({'error': f'Erro de conexão: {str(e)}'}, status_code=500)
+    except Exception as e:
+        logger.error(f"Erro ao fazer introspection GraphQL: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global http_client
+    http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=ASGI_HTTP_MAX_CONNECTIONS))
+    try:
+        yield
+    finally:
+        await http_client.aclose()
+        if async_grok_client.initialized and async_grok_client.get():
+            await async_grok_client.get().close()
+
+# As rotas do Flask têm CORS pelo flask-cors; as assíncronas, pelo middleware do Starlette
+cors = [Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+
+app = Starlette(
+    routes=[
+        Route('/api/data-dictionary/chat', chat_data_dictionary, methods=['POST', 'OPTIONS'], middleware=cors),
+        Route('/api/graphql/introspect', introspect_graphql, methods=['POST', 'OPTIONS'], middleware=cors),
+        Mount('/', app=WSGIMiddleware(flask_app, workers=ASGI_WSGI_WORKERS))
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,269 @@
+"""
+Benchmark das consultas de catálogo: information_schema x pg_catalog.
+
+Cria (opcionalmente) um catálogo sintético com milhares de tabelas em um schema
+de teste, executa as consultas antigas (views do information_schema) e as da
+camada de catálogo do main.py (pg_class/pg_attribute/pg_index/pg_type), confere
+se os resultados são idênticos e imprime os tempos.
+
+Uso:
+    python benchmarks/catalog_benchmark.py --dsn "host=localhost dbname=bench user=postgres"
+    python benchmarks/catalog_benchmark.py --dsn "..." --tables 10000 --drop
+    python benchmarks/catalog_benchmark.py --dsn "..." --skip-setup --batch-tables 100 1000 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import prisma_catalog  # noqa: E402
+from data_dictionary import extract_database_metadata  # noqa: E402
+from main import PARTITION_NAME_PATTERN  # noqa: E402
+from prisma_catalog import (  # noqa: E402
+    EnumRegistry,
+    connection_runner,
+    fetch_catalog_columns,
+    fetch_catalog_primary_keys,
+    fetch_catalog_relations,
+    fetch_catalog_tables,
+    iter_prisma_tables,
+    resolve_prisma_catalog,
+    stream_prisma_file,
+)
+
+BENCH_SCHEMA = 'bench_catalog'
+
+def drop_synthetic_catalog(conn, batch_size=500):
+    """
+    Remove o schema de benchmark em lotes: um DROP SCHEMA ... CASCADE único
+    precisaria de um lock por tabela e estoura max_locks_per_transaction.
+    """
+    cursor = conn.cursor()
+    while True:
+        cursor.execute("""
+            SELECT string_agg(format('%%I.%%I', n.nspname, c.relname), ', ')
+            FROM (
+                SELECT c.relname, c.relnamespace
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = %s AND c.relkind = 'r'
+                LIMIT %s
+            ) c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+        """, (BENCH_SCHEMA, batch_size))
+        tables = cursor.fetchone()[0]
+        if not tables:
+            break
+        cursor.execute(f"DROP TABLE {tables} CASCADE")
+    cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cursor.close()
+
+def create_synthetic_catalog(conn, table_count, batch_size=500):
+    """Cria `table_count` tabelas no schema de benchmark, em lotes (um por transação)"""
+    drop_synthetic_catalog(conn, batch_size)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+
+    for start in range(0, table_count, batch_size):
+        end = min(start + batch_size, table_count)
+        cursor.execute(f"""
+            DO $$
+            BEGIN
+                FOR i IN {start}..{end - 1} LOOP
+                    EXECUTE format('
+                        CREATE TABLE {BENCH_SCHEMA}.t_%s (
+                            id serial PRIMARY KEY,
+                            name varchar(100) NOT NULL,
+                            amount numeric(12,2) DEFAULT 0,
+                            created_at timestamptz DEFAULT now(),
+                            active boolean NOT NULL DEFAULT true,
+                            payload jsonb
+                        )', lpad(i::text, 6, '0'));
+                END LOOP;
+            END $$;
+        """)
+        print(f"  {end}/{table_count} tabelas criadas", end='\r', flush=True)
+    print()
+    cursor.close()
+
+def timed(fn, repeat):
+    """Executa fn `repeat` vezes e retorna (resultado, mediana em segundos)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings)
+
+def legacy_list_tables(cursor):
+    cursor.execute("""
+        SELECT
+            table_schema,
+            table_name
+        FROM information_schema.tables
+        WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+          AND table_type = 'BASE TABLE'
+          AND table_name !~ '(_p|p_|_)[0-9]+$'
+        ORDER BY table_schema, table_name
+    """)
+    return cursor.fetchall()
+
+def catalog_list_tables(cursor):
+    return [(schema, table) for _, schema, table in fetch_catalog_tables(cursor)
+            if not PARTITION_NAME_PATTERN.search(table)]
+
+def legacy_schema_columns(cursor):
+    cursor.execute("""
+        SELECT
+            table_name,
+            column_name,
+            data_type,
+            character_maximum_length,
+            numeric_precision,
+            numeric_scale,
+            is_nullable,
+            column_default,
+            udt_name,
+            ordinal_position
+        FROM information_schema.columns
+        WHERE table_schema = %s
+        ORDER BY table_name, ordinal_position
+    """, (BENCH_SCHEMA,))
+    return cursor.fetchall()
+
+def catalog_schema_columns(cursor):
+    tables = fetch_catalog_tables(cursor, [BENCH_SCHEMA])
+    columns = fetch_catalog_columns(cursor, [table_oid for table_oid, _, _ in tables])
+    return [(table, *col) for table_oid, _, table in tables for col in columns.get(table_oid, [])]
+
+def legacy_table_details(cursor, sample):
+    rows = []
+    for table in sample:
+        cursor.execute("""
+            SELECT
+                column_name,
+                data_type,
+                character_maximum_length,
+                numeric_precision,
+                numeric_scale,
+                is_nullable,
+                column_default
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+        """, (BENCH_SCHEMA, table))
+        rows.append(cursor.fetchall())
+        cursor.execute("""
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = %s::regclass AND i.indisprimary
+        """, (f'{BENCH_SCHEMA}.{table}',))
+        rows.append([row[0] for row in cursor.fetchall()])
+    return rows
+
+def catalog_table_details(cursor, sample):
+    rows = []
+    for table in sample:
+        relations = fetch_catalog_relations(cursor, [{'schema': BENCH_SCHEMA, 'table': table}])
+        table_oid, _ = relations[(BENCH_SCHEMA, table)]
+        columns = fetch_catalog_columns(cursor, [table_oid]).get(table_oid, [])
+        rows.append([tuple(col[:7]) for col in columns])
+        rows.append(fetch_catalog_primary_keys(cursor, [table_oid]).get(table_oid, []))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark information_schema x pg_catalog')
+    parser.add_argument('--dsn', required=True, help='String de conexão libpq/psycopg2')
+    parser.add_argument('--tables', type=int, default=10000, help='Tabelas sintéticas a criar (padrão: 10000)')
+    parser.add_argument('--sample', type=int, default=100, help='Tabelas consultadas uma a uma no cenário de detalhes')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições de cada cenário (usa a mediana)')
+    parser.add_argument('--skip-setup', action='store_true', help='Reaproveita o schema sintético já existente')
+    parser.add_argument('--drop', action='store_true', help='Remove o schema sintético ao final')
+    parser.add_argument('--parallelism', type=int, nargs='*', default=[2, 4],
+                        help='Conexões simultâneas na extração em paralelo (padrão: 2 4)')
+    parser.add_argument('--batch-tables', type=int, nargs='*', default=[100, 1000, 10000],
+                        help='Tamanhos de lote (CATALOG_BATCH_TABLES) comparados na geração Prisma em streaming')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    if not args.skip_setup:
+        print(f"Criando catálogo sintético com {args.tables} tabelas em '{BENCH_SCHEMA}'...")
+        create_synthetic_catalog(conn, args.tables)
+        cursor.execute("ANALYZE")
+
+    cursor.execute("SELECT count(*) FROM pg_class WHERE relkind IN ('r', 'p')")
+    print(f"Tabelas no banco: {cursor.fetchone()[0]}")
+
+    sample = [table for _, _, table in fetch_catalog_tables(cursor, [BENCH_SCHEMA])][:args.sample]
+
+    scenarios = [
+        ('Listagem de tabelas (/schemas)', legacy_list_tables, catalog_list_tables),
+        (f"Colunas de todo o schema '{BENCH_SCHEMA}'", legacy_schema_columns, catalog_schema_columns),
+        (f"Detalhes tabela a tabela ({len(sample)} tabelas)",
+         lambda cur: legacy_table_details(cur, sample),
+         lambda cur: catalog_table_details(cur, sample)),
+    ]
+
+    print()
+    print(f"{'Cenário':<48} {'information_schema':>20} {'pg_catalog':>12} {'ganho':>8}  resultado")
+    for name, legacy, catalog in scenarios:
+        legacy_result, legacy_time = timed(lambda: legacy(cursor), args.repeat)
+        catalog_result, catalog_time = timed(lambda: catalog(cursor), args.repeat)
+        identical = [tuple(row) if isinstance(row, tuple) else row for row in legacy_result] == \
+                    [tuple(row) if isinstance(row, tuple) else row for row in catalog_result]
+        speedup = legacy_time / catalog_time if catalog_time else float('inf')
+        print(f"{name:<48} {legacy_time * 1000:>18.1f}ms {catalog_time * 1000:>10.1f}ms {speedup:>7.1f}x  "
+              f"{'idêntico' if identical else 'DIFERENTE'}")
+
+    # Extração completa de metadados: uma conexão x lotes em várias conexões
+    run_on_new_connection = connection_runner(args.dsn)
+
+    print()
+    sequential, sequential_time = timed(lambda: extract_database_metadata(conn, [BENCH_SCHEMA]), args.repeat)
+    print(f"{'Metadados completos, 1 conexão':<48} {sequential_time * 1000:>18.1f}ms")
+    for parallelism in args.parallelism:
+        prisma_catalog.CATALOG_PARALLELISM = parallelism
+        parallel, parallel_time = timed(
+            lambda: extract_database_metadata(conn, [BENCH_SCHEMA], run_chunk=run_on_new_connection), args.repeat
+        )
+        print(f"{f'Metadados completos, {parallelism} conexões':<48} {parallel_time * 1000:>18.1f}ms "
+              f"{sequential_time / parallel_time:>7.1f}x  {'idêntico' if parallel == sequential else 'DIFERENTE'}")
+
+    # Geração Prisma em streaming: o pico de memória acompanha o lote, não o catálogo
+    bench_tables = [{'schema': schema_name, 'table': table_name}
+                    for _, schema_name, table_name in fetch_catalog_tables(cursor, [BENCH_SCHEMA])]
+    print()
+    print(f"{f'schema.prisma de {len(bench_tables)} tabelas':<48} {'tempo':>20} {'pico (tracemalloc)':>20}")
+    for batch_tables in args.batch_tables:
+        prisma_catalog.CATALOG_BATCH_TABLES = batch_tables
+        tracemalloc.start()
+        start = time.perf_counter()
+        catalog = resolve_prisma_catalog(conn, bench_tables, EnumRegistry())
+        catalog['tables'] = iter_prisma_tables(catalog['tables'], run_on_new_connection)
+        for _ in stream_prisma_file(catalog):
+            pass
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{f'Lotes de {batch_tables} tabelas':<48} {elapsed * 1000:>18.1f}ms {peak / 2 ** 20:>18.1f}MB")
+
+    if args.drop:
+        drop_synthetic_catalog(conn)
+        print(f"\nSchema '{BENCH_SCHEMA}' removido")
+
+    cursor.close()
+    conn.close()
+
+if __name__ == '__main__':
+    main()
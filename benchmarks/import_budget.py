@@ -0,0 +1,89 @@
+"""
+Orçamento de tempo de importação (inicialização a frio) dos módulos da aplicação.
+
+Importa cada módulo em um processo Python novo, com -X importtime, e compara o
+tempo acumulado da importação (mediana de várias execuções) com o orçamento do
+módulo. Também confere quais subsistemas foram carregados: a geração Prisma
+(prisma_catalog/prisma_cli) e a extração do dicionário (data_dictionary) não
+podem carregar Flask, OpenAI nem requests, e o main.py só carrega OpenAI e
+requests no primeiro uso do chat/introspection.
+
+Sai com código 1 se algum módulo estourar o orçamento ou carregar o que não deve.
+
+Uso:
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --repeat 9 --scale 2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# (módulo, orçamento em ms, módulos que a importação não pode carregar)
+BUDGETS = [
+    ('prisma_catalog', 100, ('flask', 'openai', 'requests', 'dotenv')),
+    ('prisma_cli', 120, ('flask', 'openai', 'requests', 'dotenv')),
+    ('data_dictionary', 100, ('flask', 'openai', 'requests', 'dotenv')),
+    ('main', 400, ('openai', 'requests')),
+]
+
+def measure_import(module):
+    """
+    Importa module em um processo novo.
+
+    Returns:
+        tuple: (tempo acumulado da importação em ms, nomes dos módulos carregados)
+    """
+    code = f"import {module}, sys, json; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Importação de nível mais alto (sem indentação extra) do próprio módulo
+        if name.rstrip() == f" {module}":
+            cumulative_us = int(cumulative)
+
+    if cumulative_us is None:
+        raise RuntimeError(f"Importação de {module} não encontrada na saída de -X importtime")
+    return cumulative_us / 1000, set(json.loads(result.stdout.splitlines()[-1]))
+
+def main():
+    parser = argparse.ArgumentParser(description='Confere o tempo de importação dos módulos contra o orçamento')
+    parser.add_argument('--repeat', type=int, default=5, help='Importações por módulo (usa a mediana; padrão: 5)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplica os orçamentos (máquinas mais lentas; padrão: 1)')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'Módulo':<16} {'mediana':>10} {'orçamento':>10}  situação")
+    for module, budget_ms, forbidden in BUDGETS:
+        times = []
+        loaded = set()
+        for _ in range(args.repeat):
+            elapsed_ms, loaded = measure_import(module)
+            times.append(elapsed_ms)
+
+        median_ms = statistics.median(times)
+        budget_ms *= args.scale
+        problems = []
+        if median_ms > budget_ms:
+            problems.append('acima do orçamento')
+        unexpected = sorted(name for name in forbidden if name in loaded)
+        if unexpected:
+            problems.append(f"carregou {', '.join(unexpected)}")
+
+        failed = failed or bool(problems)
+        print(f"{module:<16} {median_ms:>8.1f}ms {budget_ms:>8.0f}ms  {'; '.join(problems) or 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
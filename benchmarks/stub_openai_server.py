@@ -0,0 +1,125 @@
+"""
+Servidor local compatível com a API de chat da OpenAI, para testar o dictionary_batch.py
+sem chamadas pagas.
+
+Responde /v1/chat/completions com descrições fictícias para as tabelas e colunas
+presentes no prompt, com latência configurável, e devolve 429 (com Retry-After)
+em uma fração das requisições para exercitar a espera em rate limit.
+
+Uso:
+    python benchmarks/stub_openai_server.py --port 8089 --rate-limit-ratio 0.2
+    python dictionary_batch.py --dsn "..." --base-url http://localhost:8089/v1 --api-key stub
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TABLE_PATTERN = re.compile(r'### Schema: (\S+)\s+#### Tabela: (\S+)(.*?)(?=### Schema: |\Z)', re.S)
+COLUMN_PATTERN = re.compile(r'^- `([^`]+)`', re.M)
+
+def describe_prompt(prompt):
+    """Monta a resposta JSON esperada pelo dictionary_batch a partir das tabelas do prompt"""
+    tables = []
+    for schema_name, table_name, body in TABLE_PATTERN.findall(prompt):
+        columns_section = body.split('**Chave Primária:**')[0]
+        tables.append({
+            'schema': schema_name,
+            'table': table_name,
+            'description': f"Tabela {table_name} do schema {schema_name}.",
+            'columns': {column: f"Coluna {column} de {table_name}." for column in COLUMN_PATTERN.findall(columns_section)}
+        })
+    return json.dumps({'tables': tables}, ensure_ascii=False)
+
+class StubHandler(BaseHTTPRequestHandler):
+    stats = {'requests': 0, 'rate_limited': 0, 'in_flight': 0, 'max_in_flight': 0}
+    stats_lock = threading.Lock()
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.stats_lock:
+                self._send_json(200, dict(self.stats))
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            if random.random() < self.server.rate_limit_ratio:
+                self.stats['rate_limited'] += 1
+                limited = True
+            else:
+                limited = False
+                self.stats['in_flight'] += 1
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+        if limited:
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit_error'}},
+                            {'Retry-After': '0.2'})
+            return
+
+        try:
+            time.sleep(self.server.latency)
+            prompt = request['messages'][-1]['content']
+            content = describe_prompt(prompt)
+            self._send_json(200, {
+                'id': f"stub-{random.getrandbits(32):08x}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': len(prompt) // 4,
+                    'completion_tokens': len(content) // 4,
+                    'total_tokens': (len(prompt) + len(content)) // 4
+                }
+            })
+        finally:
+            with self.stats_lock:
+                self.stats['in_flight'] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    # Fila de conexões maior que a padrão (5), para testes com centenas de chamadas simultâneas
+    request_queue_size = 1024
+    daemon_threads = True
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor stub compatível com a API de chat da OpenAI')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.3, help='Segundos de espera por resposta')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help='Fração das requisições que recebem 429')
+    args = parser.parse_args()
+
+    server = StubServer(('127.0.0.1', args.port), StubHandler)
+    server.latency = args.latency
+    server.rate_limit_ratio = args.rate_limit_ratio
+    print(f"Stub em http://127.0.0.1:{args.port}/v1 (estatísticas em /stats)")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Extração e renderização do dicionário de dados.
+
+Camada sem dependência do Flask (nem da IA): monta os metadados das tabelas a
+partir do catálogo e os renderiza em markdown para o prompt. É usada pelo chat
+da aplicação web (main.py) e pela geração offline do dicionário
+(dictionary_batch.py), que não precisa carregar o servidor.
+"""
+from prisma_catalog import (
+    fetch_catalog_constraints,
+    fetch_catalog_foreign_keys,
+    fetch_catalog_indexes,
+    fetch_catalog_primary_keys,
+    fetch_catalog_tables,
+    iter_catalog_columns,
+    run_catalog_chunks,
+)
+
+# Parâmetros das chamadas de chat ao Grok
+GROK_CHAT_OPTIONS = {
+    'model': 'grok-3',
+    'max_tokens': 4096,
+    'temperature': 0.7
+}
+
+def build_tables_metadata(cursor, tables):
+    """
+    Monta os metadados (colunas, chaves, índices e constraints) de uma lista de tabelas.
+
+    Cada categoria do catálogo é lida uma única vez para todas as tabelas (consultas
+    por oid), então o número de consultas não cresce com o número de tabelas. As
+    colunas, a maior das categorias, são convertidas tabela a tabela à medida que
+    chegam do cursor no servidor, sem uma cópia intermediária do resultado.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        tables: Tuplas (oid, schema, tabela)
+
+    Returns:
+        dict: (schema, tabela) -> metadados da tabela, na ordem recebida
+    """
+    table_oids = [table_oid for table_oid, _, _ in tables]
+
+    # Lê cada categoria do catálogo uma vez para todas as tabelas
+    primary_keys = fetch_catalog_primary_keys(cursor, table_oids, server_side=True)
+    foreign_keys = fetch_catalog_foreign_keys(cursor, table_oids, server_side=True)
+    indexes = fetch_catalog_indexes(cursor, table_oids, server_side=True)
+    constraints = fetch_catalog_constraints(cursor, table_oids, server_side=True)
+
+    columns = {}
+    for table_oid, table_columns in iter_catalog_columns(cursor, table_oids, server_side=True):
+        columns[table_oid] = []
+        for col in table_columns:
+            type_detail = col.data_type
+            if col.character_maximum_length:
+                type_detail += f"({col.character_maximum_length})"
+            elif col.numeric_precision:
+                if col.numeric_scale:
+                    type_detail += f"({col.numeric_precision},{col.numeric_scale})"
+                else:
+                    type_detail += f"({col.numeric_precision})"
+
+            columns[table_oid].append({
+                'name': col.column_name,
+                'type': col.data_type,
+                'type_detail': type_detail,
+                'nullable': col.is_nullable == 'YES',
+                'default': col.column_default,
+                'position': col.ordinal_position
+            })
+
+    tables_metadata = {}
+    for table_oid, schema_name, table_name in tables:
+        tables_metadata[(schema_name, table_name)] = {
+            'columns': columns.get(table_oid, []),
+            'primary_keys': primary_keys.get(table_oid, []),
+            'foreign_keys': foreign_keys.get(table_oid, []),
+            'indexes': indexes.get(table_oid, []),
+            'constraints': constraints.get(table_oid, [])
+        }
+
+    return tables_metadata
+
+def extract_database_metadata(conn, selected_schemas=None, run_chunk=None):
+    """
+    Extrai metadados completos do banco de dados incluindo schemas, tabelas, colunas,
+    constraints, relacionamentos e índices.
+
+    Args:
+        conn: Conexão com o banco de dados PostgreSQL
+        selected_schemas: Lista de schemas a extrair. Se None, extrai todos (exceto system schemas)
+        run_chunk: Executor de lotes em outras conexões, para extrair em paralelo (ver run_catalog_chunks)
+
+    Returns:
+        dict: Metadados estruturados do banco de dados
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        metadata = {
+            'database_name': '',
+            'schemas': {}
+        }
+
+        # Nome do banco de dados
+        cursor.execute("SELECT current_database()")
+        metadata['database_name'] = cursor.fetchone()[0]
+
+        # Busca todas as tabelas dos schemas selecionados e seus metadados
+        tables = fetch_catalog_tables(cursor, selected_schemas)
+        tables_metadata = run_catalog_chunks(cursor, tables, build_tables_metadata, run_chunk)
+        for (schema_name, table_name), table_metadata in tables_metadata.items():
+            schema_data = metadata['schemas'].setdefault(schema_name, {'tables': {}})
+            schema_data['tables'][table_name] = table_metadata
+
+        return metadata
+    finally:
+        if cursor:
+            cursor.close()
+
+def render_dictionary_table(table_name, table_data):
+    """Renderiza o bloco markdown completo de uma tabela (colunas, chaves, índices e constraints)"""
+    block = f"#### Tabela: {table_name}\n\n"
+
+    # Colunas
+    block += "**Colunas:**\n"
+    for col in table_data['columns']:
+        nullable = "NULL" if col['nullable'] else "NOT NULL"
+        default = f", DEFAULT: {col['default']}" if col['default'] else ""
+        block += f"- `{col['name']}` {col['type_detail']} {nullable}{default}\n"
+
+    # Chave primária
+    if table_data['primary_keys']:
+        block += f"\n**Chave Primária:** {', '.join(table_data['primary_keys'])}\n"
+
+    # Chaves estrangeiras
+    if table_data['foreign_keys']:
+        block += "\n**Chaves Estrangeiras:**\n"
+        for fk in table_data['foreign_keys']:
+            block += f"- `{fk['column']}` → `{fk['references_schema']}.{fk['references_table']}.{fk['references_column']}`\n"
+
+    # Índices
+    if table_data['indexes']:
+        block += "\n**Índices:**\n"
+        for idx in table_data['indexes']:
+            unique = "UNIQUE" if idx['unique'] else ""
+            block += f"- {idx['name']} {unique} ({', '.join(idx['columns'])})\n"
+
+    # Constraints
+    if table_data['constraints']:
+        block += "\n**Constraints:**\n"
+        for const in table_data['constraints']:
+            cols = f"({', '.join(const['columns'])})" if const['columns'] else ""
+            block += f"- {const['name']} ({const['type']}) {cols}\n"
+
+    return block + "\n"
+
+def render_dictionary_summary(schema_name, table_name, table_data):
+    """Renderiza uma linha compacta da tabela: nomes das colunas, chave primária e chaves estrangeiras"""
+    line = f"- `{schema_name}.{table_name}`: {', '.join(col['name'] for col in table_data['columns'])}"
+    if table_data['primary_keys']:
+        line += f" | PK {', '.join(table_data['primary_keys'])}"
+    if table_data['foreign_keys']:
+        line += " | FK " + ', '.join(
+            f"{fk['column']}→{fk['references_schema']}.{fk['references_table']}"
+            for fk in table_data['foreign_keys']
+        )
+    return line + "\n"
@@ -0,0 +1,279 @@
+"""
+Geração offline do dicionário de dados completo (descrição de cada tabela e coluna).
+
+Extrai os metadados dos schemas, divide as tabelas em lotes e envia os lotes ao
+modelo (API compatível com OpenAI) em paralelo, com limite de concorrência,
+espera exponencial em rate limit/erros temporários e progresso salvo a cada
+lote: se o job for interrompido, a próxima execução retoma de onde parou.
+O resultado é gravado em markdown e JSON.
+
+Uso:
+    python dictionary_batch.py --dsn "host=localhost dbname=app user=postgres" --output dicionario
+    python dictionary_batch.py --dsn "..." --schemas public sales --chunk-size 5 --concurrency 8
+    python dictionary_batch.py --dsn "..." --base-url http://localhost:8089/v1 --api-key stub
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import openai
+import psycopg2
+from openai import OpenAI
+
+from data_dictionary import GROK_CHAT_OPTIONS, extract_database_metadata, render_dictionary_table
+from prisma_catalog import connection_runner
+
+logger = logging.getLogger('dictionary_batch')
+
+# Espera máxima (segundos) entre tentativas, inclusive quando a API pede mais via Retry-After
+RETRY_MAX_DELAY = 60.0
+
+SYSTEM_PROMPT = """Você é um especialista em bancos de dados PostgreSQL e está documentando um banco de dados.
+
+Para cada tabela recebida, escreva uma descrição curta do propósito da tabela e uma descrição de cada coluna,
+deduzidas dos nomes, tipos, chaves e relacionamentos. Escreva em português brasileiro.
+
+Responda somente com JSON, sem texto adicional, no formato:
+{"tables": [{"schema": "...", "table": "...", "description": "...", "columns": {"coluna": "descrição"}}]}
+"""
+
+class ProgressFile:
+    """
+    Progresso do job em um arquivo JSON: resultado de cada lote já concluído.
+
+    Os lotes são identificados por um hash do seu conteúdo (tabelas e estrutura),
+    então um lote só é reaproveitado se as tabelas não mudaram. O arquivo é
+    regravado (de forma atômica) a cada lote concluído. Um arquivo ilegível
+    (ex.: corrompido) é registrado e tratado como vazio: os lotes são refeitos.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.chunks = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                chunks = json.load(f).get('chunks', {})
+            if not isinstance(chunks, dict):
+                raise ValueError('chunks não é um objeto')
+            return chunks
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Arquivo de progresso {self.path} ilegível, recomeçando do zero: {e}")
+            return {}
+
+    def save_chunk(self, chunk_id, result):
+        """Registra o resultado do lote; grava em <path>.tmp e só então substitui o arquivo"""
+        with self._lock:
+            self.chunks[chunk_id] = result
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'chunks': self.chunks}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+def build_chunks(metadata, chunk_size):
+    """
+    Divide as tabelas em lotes de até chunk_size tabelas.
+
+    Returns:
+        list: Dicts {id, tables: [(schema, tabela)], prompt}
+    """
+    tables = [(schema_name, table_name, table_data)
+              for schema_name, schema_data in metadata['schemas'].items()
+              for table_name, table_data in schema_data['tables'].items()]
+
+    chunks = []
+    for start in range(0, len(tables), chunk_size):
+        prompt = ''
+        for schema_name, table_name, table_data in tables[start:start + chunk_size]:
+            prompt += f"### Schema: {schema_name}\n\n" + render_dictionary_table(table_name, table_data)
+        chunks.append({
+            'id': hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16],
+            'tables': [(schema_name, table_name) for schema_name, table_name, _ in tables[start:start + chunk_size]],
+            'prompt': prompt
+        })
+    return chunks
+
+def parse_chunk_response(content):
+    """Extrai o JSON da resposta do modelo (aceita blocos ```json)"""
+    match = re.search(r'\{.*\}', content, re.S)
+    if not match:
+        raise ValueError('Resposta sem JSON')
+    return json.loads(match.group(0))
+
+def retry_delay(error, attempt):
+    """
+    Tempo de espera antes da próxima tentativa: Retry-After se informado, senão exponencial com jitter.
+
+    O resultado fica sempre entre 0 e RETRY_MAX_DELAY, mesmo com um Retry-After maior.
+    """
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_MAX_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return min(RETRY_MAX_DELAY, 2 ** attempt) * (0.5 + random.random() / 2)
+
+def describe_chunk(client, model, chunk, max_retries):
+    """
+    Envia um lote ao modelo e retorna as descrições, repetindo em rate limit e erros temporários.
+
+    Returns:
+        dict: {'schema.tabela': {description, columns}}
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {'role': 'system', 'content': SYSTEM_PROMPT},
+                    {'role': 'user', 'content': chunk['prompt']}
+                ],
+                max_tokens=GROK_CHAT_OPTIONS['max_tokens'],
+                temperature=0.2
+            )
+            parsed = parse_chunk_response(response.choices[0].message.content)
+            return {
+                f"{item['schema']}.{item['table']}": {
+                    'description': item.get('description', ''),
+                    'columns': item.get('columns', {})
+                }
+                for item in parsed.get('tables', [])
+            }
+        except (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError,
+                openai.InternalServerError, ValueError) as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(e, attempt)
+            logger.warning(f"Lote {chunk['id']}: {type(e).__name__}, nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+
+def build_dictionary(metadata, results):
+    """Junta metadados e descrições no formato do JSON de saída"""
+    dictionary = {
+        'database': metadata['database_name'],
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'schemas': {}
+    }
+    for schema_name, schema_data in metadata['schemas'].items():
+        for table_name, table_data in schema_data['tables'].items():
+            described = results.get(f"{schema_name}.{table_name}", {})
+            dictionary['schemas'].setdefault(schema_name, {})[table_name] = {
+                'description': described.get('description', ''),
+                'columns': {
+                    col['name']: {
+                        'type': col['type_detail'],
+                        'nullable': col['nullable'],
+                        'description': described.get('columns', {}).get(col['name'], '')
+                    }
+                    for col in table_data['columns']
+                }
+            }
+    return dictionary
+
+def render_markdown(dictionary):
+    """Renderiza o dicionário de dados em markdown"""
+    lines = [
+        f"# Dicionário de dados: {dictionary['database']}",
+        '',
+        f"Gerado em {dictionary['generated_at']}",
+        ''
+    ]
+    for schema_name, tables in dictionary['schemas'].items():
+        lines += [f"## Schema: {schema_name}", '']
+        for table_name, table in tables.items():
+            lines += [f"### {schema_name}.{table_name}", '']
+            if table['description']:
+                lines += [table['description'], '']
+            lines += ['| Coluna | Tipo | Nulo | Descrição |', '|---|---|---|---|']
+            for column_name, column in table['columns'].items():
+                description = column['description'].replace('|', '\\|').replace('\n', ' ')
+                lines.append(f"| `{column_name}` | {column['type']} | {'sim' if column['nullable'] else 'não'} | {description} |")
+            lines.append('')
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o dicionário de dados completo via LLM, em lotes paralelos')
+    parser.add_argument('--dsn', required=True, help='String de conexão libpq/psycopg2')
+    parser.add_argument('--schemas', nargs='*', help='Schemas a documentar (padrão: todos, exceto os do sistema)')
+    parser.add_argument('--output', default='dicionario', help='Prefixo dos arquivos de saída (.md e .json)')
+    parser.add_argument('--progress', help='Arquivo de progresso (padrão: <output>.progress.json)')
+    parser.add_argument('--chunk-size', type=int, default=10, help='Tabelas por chamada ao modelo (padrão: 10)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Chamadas simultâneas ao modelo (padrão: 4)')
+    parser.add_argument('--max-retries', type=int, default=6, help='Tentativas extras por lote em rate limit/erro (padrão: 6)')
+    parser.add_argument('--model', default=GROK_CHAT_OPTIONS['model'], help='Modelo (padrão: %(default)s)')
+    parser.add_argument('--base-url', default=os.getenv('XAI_BASE_URL', 'https://api.x.ai/v1'),
+                        help='URL base da API compatível com OpenAI (padrão: XAI_BASE_URL ou xAI)')
+    parser.add_argument('--api-key', default=os.getenv('XAI_API_KEY'), help='Chave da API (padrão: XAI_API_KEY)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', force=True)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    if not args.api_key:
+        parser.error('Informe --api-key ou defina XAI_API_KEY')
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        # Schemas grandes são extraídos em paralelo (CATALOG_PARALLELISM conexões)
+        metadata = extract_database_metadata(conn, args.schemas, run_chunk=connection_runner(args.dsn))
+    finally:
+        conn.close()
+
+    chunks = build_chunks(metadata, args.chunk_size)
+    progress = ProgressFile(args.progress or f"{args.output}.progress.json")
+    pending = [chunk for chunk in chunks if chunk['id'] not in progress.chunks]
+    logger.info(f"{len(chunks)} lotes, {len(chunks) - len(pending)} já concluídos, {len(pending)} a processar")
+
+    # As tentativas ficam a cargo de describe_chunk (com espera entre elas)
+    client = OpenAI(api_key=args.api_key, base_url=args.base_url, max_retries=0)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(describe_chunk, client, args.model, chunk, args.max_retries): chunk
+                   for chunk in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk = futures[future]
+            try:
+                progress.save_chunk(chunk['id'], future.result())
+                logger.info(f"[{done}/{len(pending)}] Lote {chunk['id']} concluído ({len(chunk['tables'])} tabelas)")
+            except Exception as e:
+                failed += 1
+                logger.error(f"[{done}/{len(pending)}] Lote {chunk['id']} falhou: {e}")
+
+    results = {}
+    for chunk in chunks:
+        results.update(progress.chunks.get(chunk['id'], {}))
+
+    dictionary = build_dictionary(metadata, results)
+    with open(f"{args.output}.json", 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f, ensure_ascii=False, indent=2)
+    with open(f"{args.output}.md", 'w', encoding='utf-8') as f:
+        f.write(render_markdown(dictionary))
+
+    logger.info(f"Dicionário gravado em {args.output}.md e {args.output}.json")
+    if failed:
+        logger.error(f"{failed} lotes falharam; execute novamente para retomar")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,52 @@
-from flask import Flask, render_template_string, request, jsonify, send_file
+from flask import Flask, Response, render_template_string, request, jsonify
 from flask_cors import CORS
 import psycopg2
 from psycopg2 import sql
+import psycopg2.extensions
 import psycopg2.pool
-import io
-import zipfile
 import json
+import re
+import hashlib
 import os
 from datetime import datetime
 import logging
-from openai import OpenAI
-from dotenv import load_dotenv
-import requests
-
-# Carrega variáveis de ambiente
-load_dotenv()
+import threading
+import time
+import functools
+import secrets
+import contextvars
+import sqlite3
+import zlib
+from collections import namedtuple, OrderedDict
+
+# Carrega variáveis de ambiente do .env da pasta do projeto. Sem o arquivo (ex.: em
+# containers, com as variáveis vindas do ambiente) o python-dotenv nem é importado
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
+
+# Camada de catálogo e geração Prisma (lê CATALOG_* do ambiente, então vem depois do .env)
+from prisma_catalog import (  # noqa: E402
+    CATALOG_TABLE_FILTER,
+    fetch_catalog_columns,
+    fetch_catalog_primary_keys,
+    fetch_catalog_relations,
+    fetch_catalog_tables,
+    iter_catalog_rows,
+    iter_prisma_tables,
+    resolve_prisma_catalog,
+    run_catalog_chunks,
+    stream_prisma_file,
+    stream_prisma_zip,
+)
+# Extração e renderização do dicionário de dados, compartilhadas com dictionary_batch.py
+from data_dictionary import (  # noqa: E402
+    GROK_CHAT_OPTIONS,
+    build_tables_metadata,
+    render_dictionary_summary,
+    render_dictionary_table,
+)
 
 app = Flask(__name__)
 CORS(app)  # Adiciona suporte CORS
@@ -23,26 +55,104 @@ CORS(app)  # Adiciona suporte CORS
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Pool de conexões (mais robusto que conexão simples)
-connection_pool = None
+# Dimensionamento do pool de conexões (configurável via .env)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+# Conexões ociosas há mais tempo que isso (segundos) são testadas antes do uso
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '60'))
+
+# Pools por alvo de conexão, compartilhados pelas sessões do navegador (ver ConnectionPoolRegistry)
+# Limite rígido de conexões abertas somando todos os pools (ver ConnectionBudget)
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '50'))
+# Pools sem uso há mais que isso (segundos) são fechados
+DB_POOL_IDLE_TTL = float(os.getenv('DB_POOL_IDLE_TTL', '600'))
+# Sessões do navegador lembradas (as usadas há mais tempo são esquecidas)
+DB_MAX_SESSIONS = int(os.getenv('DB_MAX_SESSIONS', '1000'))
+
+# Cookie que identifica a sessão do navegador e a sessão da requisição atual
+DB_SESSION_COOKIE = 'db_session'
+db_session_id = contextvars.ContextVar('db_session_id', default=None)
+
+# Intervalo mínimo (segundos) entre verificações de mudança no catálogo
+CATALOG_CHECK_INTERVAL = float(os.getenv('CATALOG_CHECK_INTERVAL', '2'))
+# Entradas do cache de catálogo (árvore de schemas, índice de busca) por alvo; as usadas há mais tempo saem primeiro
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '100'))
+
+# Diretório dos snapshots de metadados do dicionário de dados (vazio desativa o cache em disco)
+METADATA_CACHE_DIR = os.getenv('METADATA_CACHE_DIR', '.cache')
+# Tabelas dos snapshots mantidas decodificadas em memória (os schemas usados há mais tempo saem primeiro)
+METADATA_MEMORY_MAX_TABLES = int(os.getenv('METADATA_MEMORY_MAX_TABLES', '50000'))
+
+# Sessões de chat do dicionário de dados: prompt de sistema em cache por sessão
+DICTIONARY_SESSION_TTL = float(os.getenv('DICTIONARY_SESSION_TTL', '3600'))
+DICTIONARY_MAX_SESSIONS = int(os.getenv('DICTIONARY_MAX_SESSIONS', '100'))
+# Intervalo mínimo (segundos) entre verificações do catálogo dos schemas do chat (lê pg_class/xmin de cada tabela)
+DICTIONARY_CHECK_INTERVAL = float(os.getenv('DICTIONARY_CHECK_INTERVAL', '30'))
+# Orçamento estimado de tokens do contexto do chat (detalhes completos só das tabelas mais relevantes)
+DICTIONARY_CONTEXT_TOKENS = int(os.getenv('DICTIONARY_CONTEXT_TOKENS', '24000'))
+
+# Cache local de respostas do chat (mesmo diretório dos snapshots; TTL 0 desativa)
+CHAT_CACHE_TTL = float(os.getenv('CHAT_CACHE_TTL', '86400'))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1000'))
+
+# Paginação do streaming de detalhes: tabelas por página e por lote de consultas
+DETAILS_PAGE_SIZE = int(os.getenv('DETAILS_PAGE_SIZE', '100'))
+DETAILS_CHUNK_SIZE = int(os.getenv('DETAILS_CHUNK_SIZE', '10'))
 
 # Arquivo para persistir configurações
 CONFIG_FILE = 'db_config.json'
 
-# Cliente Grok (xAI) para integração com IA
-grok_client = None
-try:
+class LazyClient:
+    """
+    Cliente criado no primeiro uso, uma única vez mesmo com várias threads.
+
+    Deixa a importação de SDKs pesados (o openai leva quase um segundo) fora da
+    inicialização da aplicação: um subsistema que ninguém usa não custa nada.
+    factory() retorna o cliente, ou None se o recurso estiver desabilitado; o
+    resultado (inclusive None) é guardado.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._client = None
+
+    @property
+    def initialized(self):
+        return self._initialized
+
+    def get(self):
+        """Retorna o cliente, criando-o na primeira chamada"""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    self._client = self._factory()
+                    self._initialized = True
+        return self._client
+
+# API do Grok (xAI), compatível com a da OpenAI
+GROK_BASE_URL = 'https://api.x.ai/v1'
+
+def create_grok_client():
+    """Cria o cliente Grok (xAI); None sem XAI_API_KEY ou se a criação falhar"""
     api_key = os.getenv('XAI_API_KEY')
-    if api_key:
-        grok_client = OpenAI(
-            api_key=api_key,
-            base_url="https://api.x.ai/v1"
-        )
+    if not api_key:
+        return None
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key, base_url=GROK_BASE_URL)
         logger.info("Cliente Grok (xAI) inicializado com sucesso")
-    else:
-        logger.warning("XAI_API_KEY não encontrada. Recurso de dicionário de dados desabilitado.")
-except Exception as e:
-    logger.error(f"Erro ao inicializar cliente Grok: {e}")
+        return client
+    except Exception as e:
+        logger.error(f"Erro ao inicializar cliente Grok: {e}")
+        return None
+
+# Cliente Grok (xAI) para integração com IA, criado na primeira conversa
+grok_client = LazyClient(create_grok_client)
+if not os.getenv('XAI_API_KEY'):
+    logger.warning("XAI_API_KEY não encontrada. Recurso de dicionário de dados desabilitado.")
 
 def load_config():
     """Carrega configurações salvas do arquivo JSON"""
@@ -70,29 +180,523 @@ def save_config(config):
         logger.error(f"Erro ao salvar configuração: {e}")
         return False
 
-def get_db_connection():
-    """Obtém uma conexão do pool"""
-    global connection_pool
-    if connection_pool:
+class PoolTimeoutError(psycopg2.pool.PoolError):
+    """Nenhuma conexão foi liberada no pool dentro do tempo limite"""
+
+# Intervalo (segundos) entre novas tentativas de um pool à espera de vaga no limite global
+CONNECTION_BUDGET_POLL = 0.05
+
+class ConnectionBudget:
+    """
+    Limite de conexões abertas somando vários pools.
+
+    Cada pool reserva uma vaga antes de abrir uma conexão e a devolve ao fechá-la.
+    Com o limite atingido, `reclaim(pool)` (se informado) tenta liberar vagas
+    fechando conexões ociosas de outros pools. O lock interno nunca é mantido
+    enquanto se adquire o lock de um pool.
+    """
+
+    def __init__(self, limit, reclaim=None):
+        self.limit = limit
+        self.reclaim = reclaim
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Reserva uma vaga; retorna False se o limite foi atingido"""
+        with self._lock:
+            if self._open >= self.limit:
+                return False
+            self._open += 1
+            return True
+
+    def release(self, count=1):
+        """Devolve vagas de conexões fechadas (ou que não chegaram a abrir)"""
+        with self._lock:
+            self._open -= count
+
+    def open_connections(self):
+        with self._lock:
+            return self._open
+
+class BlockingConnectionPool(psycopg2.pool.AbstractConnectionPool):
+    """
+    Pool de conexões thread-safe que bloqueia quando está esgotado.
+
+    Ao contrário do SimpleConnectionPool (que não é thread-safe) e do
+    ThreadedConnectionPool (que falha imediatamente quando não há conexões
+    livres), aqui a thread espera até uma conexão ser devolvida ou até o
+    tempo limite expirar. Também mantém estatísticas de uso e de espera.
+
+    A conexão só é testada (SELECT 1) quando ficou ociosa por mais de
+    `max_idle` segundos; conexões usadas com frequência não pagam round trip extra.
+
+    Com `budget` (ConnectionBudget), cada conexão aberta também ocupa uma vaga do
+    limite global: sem vaga, o pool espera (até o mesmo tempo limite) que outro
+    pool feche uma conexão, e as conexões iniciais (minconn) só são abertas se houver vaga.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, max_idle, *args, budget=None, **kwargs):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._budget = budget
+        self._condition = threading.Condition()
+        self._idle_since = {}
+        self._waiting = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+        self._connecting = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        """Abre as conexões iniciais (minconn), chamado pelo construtor do psycopg2"""
+        if self._budget and not self._budget.try_acquire():
+            return None  # Limite global atingido: o pool começa com menos conexões
+        try:
+            conn = self._new_connection()
+        except Exception:
+            self._release_slots(1)
+            raise
+        self._pool.append(conn)
+        self._idle_since[id(conn)] = time.monotonic()
+        return conn
+
+    def _release_slots(self, count):
+        if self._budget and count:
+            self._budget.release(count)
+
+    def _new_connection(self):
+        """Abre uma conexão nova, sem registrá-la no pool (chamado fora do lock)"""
+        conn = psycopg2.connect(*self._args, **self._kwargs)
+        conn.autocommit = True  # Garante que cada query veja o estado mais recente do banco
+        return conn
+
+    def getconn(self, key=None, timeout=None, block=True):
+        """Obtém uma conexão, esperando até `timeout` segundos se o pool estiver esgotado
+
+        Com block=False não espera: se o pool estiver esgotado, levanta PoolError
+        na hora, sem contar espera nem tempo esgotado nas estatísticas.
+
+        Conexões ociosas há mais de `max_idle` segundos são testadas; as que não
+        respondem são descartadas e substituídas de forma transparente.
+        """
+        while True:
+            conn, idle_since = self._checkout(key, timeout, block)
+            if not conn.closed and (idle_since is None or time.monotonic() - idle_since <= self.max_idle):
+                return conn
+            if not conn.closed and self._is_alive(conn):
+                return conn
+
+            logger.warning("Conexão ociosa do pool não responde; descartando e obtendo outra")
+            self.putconn(conn, key, close=True)
+
+    def _is_alive(self, conn):
         try:
-            conn = connection_pool.getconn()
-            conn.autocommit = True  # Garante que cada query veja o estado mais recente do banco
-            # Testa se a conexão está ativa
             cursor = conn.cursor()
             cursor.execute("SELECT 1")
             cursor.close()
-            return conn
-        except Exception as e:
-            logger.error(f"Erro ao obter conexão do pool: {e}")
-            if conn:
-                connection_pool.putconn(conn)
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self, key, timeout, block=True):
+        """
+        Retira uma conexão ociosa ou reserva uma vaga e abre uma conexão nova.
+
+        A conexão nova é aberta fora do lock: um servidor lento para aceitar
+        conexões não trava quem só quer devolver ou pegar uma conexão ociosa.
+        A vaga reservada conta para maxconn (e para o limite global, se houver)
+        e é liberada se a conexão falhar.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        with self._condition:
+            self._waiting += 1
+        try:
+            while True:
+                with self._condition:
+                    while not self.closed and not self._pool and len(self._used) + self._connecting >= self.maxconn:
+                        if not block:
+                            raise psycopg2.pool.PoolError("connection pool exhausted")
+                        waited = True
+                        self._wait(deadline, timeout)
+
+                    if self.closed or self._pool or key in self._used:
+                        conn = self._getconn(key)
+                        return conn, self._idle_since.pop(id(conn), None)
+                    if not self._budget or self._budget.try_acquire():
+                        self._connecting += 1
+                        break
+
+                # Limite global atingido: tenta fechar uma conexão ociosa de outro pool
+                if self._budget.reclaim and self._budget.reclaim(self):
+                    continue
+                if not block:
+                    raise psycopg2.pool.PoolError("connection limit reached")
+                waited = True
+                with self._condition:
+                    # Acorda antes se uma conexão deste pool for devolvida
+                    self._wait(deadline, timeout, CONNECTION_BUDGET_POLL)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+                if waited:
+                    self._waits += 1
+                    self._wait_time += time.monotonic() - started
+
+        try:
+            conn = self._new_connection()
+        except Exception:
+            with self._condition:
+                self._connecting -= 1
+                self._release_slots(1)
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._connecting -= 1
+            if self.closed:
+                conn.close()
+                self._release_slots(1)
+                raise psycopg2.pool.PoolError("connection pool is closed")
+            if key is None:
+                key = self._getkey()
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+            return conn, None
+
+    def _wait(self, deadline, timeout, interval=None):
+        """Espera (com o lock) até ser notificado, até interval ou até o prazo; no prazo, levanta PoolTimeoutError"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"Tempo esgotado ({timeout:g}s) aguardando conexão livre no pool"
+            )
+        self._condition.wait(remaining if interval is None else min(remaining, interval))
+
+    def putconn(self, conn, key=None, close=False):
+        """Devolve uma conexão ao pool e acorda uma thread em espera
+
+        Diferente do psycopg2 (que fecha tudo que passa de minconn), as conexões
+        ociosas ficam abertas até o máximo do pool, evitando reconexões.
+        """
+        with self._condition:
+            if self.closed:
+                raise psycopg2.pool.PoolError("connection pool is closed")
+            if key is None:
+                key = self._rused.get(id(conn))
+                if key is None:
+                    raise psycopg2.pool.PoolError("trying to put unkeyed connection")
+
+            if not conn.closed:
+                status = conn.info.transaction_status
+                if close or status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    conn.close()
+                else:
+                    # Devolve a conexão ao pool em um estado consistente
+                    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    self._pool.append(conn)
+                    self._idle_since[id(conn)] = time.monotonic()
+            if conn.closed:
+                self._discarded += 1
+                self._release_slots(1)
+
+            del self._used[key]
+            del self._rused[id(conn)]
+            self._condition.notify()
+
+    def discard_idle(self, limit=None):
+        """
+        Fecha as conexões ociosas (ex.: após detectar que o servidor caiu), até `limit` delas.
+
+        Returns:
+            int: Número de conexões fechadas
+        """
+        with self._condition:
+            count = 0
+            while not self.closed and self._pool and (limit is None or count < limit):
+                conn = self._pool.pop(0)
+                self._idle_since.pop(id(conn), None)
+                self._discarded += 1
+                conn.close()
+                count += 1
+            self._release_slots(count)
+            return count
+
+    def closeall(self):
+        """Fecha todas as conexões do pool"""
+        with self._condition:
+            if not self.closed:
+                self._release_slots(len(self._pool) + len(self._used))
+            self._closeall()
+            self._idle_since.clear()
+            self._condition.notify_all()
+
+    def close_if_idle(self):
+        """Fecha o pool se nenhuma conexão estiver em uso; retorna True se fechou"""
+        with self._condition:
+            if self._used or self._connecting:
+                return False
+            if not self.closed:
+                self._release_slots(len(self._pool))
+            self._closeall()
+            self._idle_since.clear()
+            self._condition.notify_all()
+            return True
+
+    def open_connections(self):
+        """Conexões abertas (em uso, ociosas e sendo abertas)"""
+        with self._condition:
+            return len(self._used) + len(self._pool) + self._connecting
+
+    def stats(self):
+        """Retorna estatísticas de uso do pool"""
+        with self._condition:
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'in_use': len(self._used),
+                'idle': len(self._pool),
+                'waiting': self._waiting,
+                'waits': self._waits,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_avg': round(self._wait_time / self._waits, 6) if self._waits else 0.0,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded
+            }
+
+class NotConnectedError(Exception):
+    """Nenhum banco de dados conectado"""
+
+DatabaseSession = namedtuple('DatabaseSession', ['target', 'pool'])
+
+class ConnectionPoolRegistry:
+    """
+    Pools de conexão por alvo (usuário@host:porta/banco), associados às sessões do navegador.
+
+    Cada sessão (cookie) aponta para um alvo; sessões no mesmo alvo, com a mesma
+    senha, compartilham o pool. Conectar a outro banco não afeta as outras sessões.
+    Pools sem uso há mais de `idle_ttl` segundos são fechados. Todos os pools
+    dividem um ConnectionBudget de `max_connections` conexões: com o limite
+    atingido, um pool que precisa de conexão nova fecha uma conexão ociosa dos
+    pools usados há mais tempo ou espera uma vaga. A sessão guarda os parâmetros
+    de conexão, então um pool fechado é recriado na próxima requisição da sessão.
+    """
+
+    def __init__(self, max_connections, idle_ttl, max_sessions):
+        self.max_connections = max_connections
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.budget = ConnectionBudget(max_connections, self._reclaim)
+        self._pools = OrderedDict()
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(params):
+        """
+        Returns:
+            tuple: (alvo, chave do pool); a senha entra na chave como hash, para que
+            credenciais diferentes não compartilhem conexões
+        """
+        target = f"{params['user']}@{params['host']}:{params['port']}/{params['database']}"
+        password_hash = hashlib.sha256((params.get('password') or '').encode('utf-8')).hexdigest()
+        return target, (target, password_hash)
+
+    def connect(self, session_id, params):
+        """
+        Associa a sessão ao pool do alvo (criando-o se preciso) e testa a conexão.
+
+        Returns:
+            str: Versão do servidor PostgreSQL
+        """
+        target, key = self.make_key(params)
+        pool = self._acquire(key, target, params)
+
+        conn = pool.getconn()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version()")
+            version = cursor.fetchone()[0]
+        finally:
+            if cursor:
+                cursor.close()
+            pool.putconn(conn)
+
+        with self._lock:
+            self._sessions[session_id] = {'key': key, 'target': target, 'params': params}
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return version
+
+    def get(self, session_id):
+        """
+        Retorna o DatabaseSession (alvo e pool) da sessão.
+
+        Raises:
+            NotConnectedError: Sessão sem conexão
+        """
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if not session:
+                raise NotConnectedError('Não conectado ao banco de dados')
+            self._sessions.move_to_end(session_id)
+        return DatabaseSession(session['target'], self._acquire(session['key'], session['target'], session['params']))
+
+    def _acquire(self, key, target, params):
+        """Retorna o pool da chave, criando-o (fora do lock, conectar é lento) se não existir"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry and not entry['pool'].closed:
+                entry['used_at'] = now
+                self._pools.move_to_end(key)
+                self._evict(now, key)
+                return entry['pool']
+
+        # Cria o pool de conexões (thread-safe, bloqueia quando esgotado)
+        pool = BlockingConnectionPool(
+            DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE,
+            host=params['host'],
+            port=int(params['port']),
+            database=params['database'],
+            user=params['user'],
+            password=params['password'],
+            budget=self.budget
+        )
+        logger.info(f"Pool de conexões criado para {target}")
+
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry and not entry['pool'].closed:
+                # Outra requisição criou o pool da mesma chave ao mesmo tempo
+                pool.closeall()
+                pool = entry['pool']
+            self._pools[key] = {'target': target, 'pool': pool, 'used_at': now}
+            self._pools.move_to_end(key)
+            self._evict(now, key)
+        return pool
+
+    def _evict(self, now, keep):
+        """Fecha os pools ociosos sem uso há mais de idle_ttl"""
+        for key, entry in list(self._pools.items()):
+            if key != keep and now - entry['used_at'] > self.idle_ttl and entry['pool'].close_if_idle():
+                del self._pools[key]
+                logger.info(f"Pool de conexões de {entry['target']} fechado (ocioso)")
+
+    def _reclaim(self, requester):
+        """
+        Fecha uma conexão ociosa de outro pool (o usado há mais tempo) para liberar vaga no limite.
+
+        Chamado pelo pool sem estar com o próprio lock; os locks dos outros pools
+        são adquiridos sem o lock do registro.
+
+        Returns:
+            bool: True se alguma conexão foi fechada
+        """
+        with self._lock:
+            pools = [entry['pool'] for entry in self._pools.values()]
+        for pool in pools:
+            if pool is not requester and pool.discard_idle(limit=1):
+                return True
+        return False
+
+    def stats(self):
+        """Retorna estatísticas do registro (pools, conexões abertas, sessões)"""
+        with self._lock:
+            return {
+                'pools': len(self._pools),
+                'open_connections': self.budget.open_connections(),
+                'max_connections': self.max_connections,
+                'sessions': len(self._sessions)
+            }
+
+pool_registry = ConnectionPoolRegistry(DB_MAX_CONNECTIONS, DB_POOL_IDLE_TTL, DB_MAX_SESSIONS)
+
+def get_connection_target(conn):
+    """Alvo (usuário@host:porta/banco) de uma conexão, no mesmo formato de ConnectionPoolRegistry.make_key"""
+    return f"{conn.info.user}@{conn.info.host}:{conn.info.port}/{conn.info.dbname}"
+
+def get_session_database(session_id=None):
+    """Retorna o DatabaseSession da sessão informada ou, por padrão, da requisição atual"""
+    return pool_registry.get(session_id or db_session_id.get())
+
+def get_db_connection(pool):
+    """Obtém uma conexão do pool (o pool só testa conexões que ficaram ociosas por muito tempo)"""
+    try:
+        return pool.getconn()
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter conexão do pool: {e}")
     return None
 
-def return_db_connection(conn):
+def return_db_connection(pool, conn):
     """Retorna uma conexão ao pool"""
-    global connection_pool
-    if connection_pool and conn:
-        connection_pool.putconn(conn)
+    if conn and not pool.closed:
+        pool.putconn(conn)
+    elif conn:
+        conn.close()
+
+def session_runner(session_id=None, wait=True):
+    """
+    Retorna run(operation, *args) que executa no pool da sessão (padrão: a da requisição atual).
+
+    É o run_chunk das extrações em paralelo: cada lote roda em uma thread própria,
+    que não herda a sessão da requisição. Com wait=False (as threads auxiliares
+    dos lotes), não espera conexão livre: se o pool estiver esgotado, levanta
+    PoolError e o lote fica com a thread da requisição.
+    """
+    session_id = session_id or db_session_id.get()
+    if wait:
+        return functools.partial(run_session_db, session_id)
+
+    def run(operation, *args, **kwargs):
+        pool = get_session_database(session_id).pool
+        conn = pool.getconn(block=False)
+        try:
+            return operation(conn, *args, **kwargs)
+        finally:
+            return_db_connection(pool, conn)
+    return run
+
+def run_db(operation, *args, **kwargs):
+    """Executa operation(conn, *args, **kwargs) no banco da sessão da requisição atual (ver run_session_db)"""
+    return run_session_db(db_session_id.get(), operation, *args, **kwargs)
+
+def run_session_db(session_id, operation, *args, **kwargs):
+    """
+    Executa operation(conn, *args, **kwargs) com uma conexão do pool da sessão e a devolve ao final.
+
+    Se a conexão cair no meio da operação (servidor reiniciado, conexão de rede
+    encerrada), as conexões ociosas são descartadas e a operação é repetida uma
+    vez com uma conexão nova. O mesmo vale se o pool acabou de ser fechado pelo
+    registro: a segunda tentativa usa um pool novo.
+    """
+    for attempt in range(2):
+        pool = get_session_database(session_id).pool
+        conn = get_db_connection(pool)
+        if not conn:
+            if pool.closed and not attempt:
+                continue
+            raise NotConnectedError('Não conectado ao banco de dados')
+        try:
+            return operation(conn, *args, **kwargs)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if not conn.closed or attempt:
+                raise
+            logger.warning(f"Conexão perdida durante a consulta, tentando novamente: {e}")
+            pool.discard_idle()
+        finally:
+            return_db_connection(pool, conn)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -564,10 +1168,51 @@ HTML_TEMPLATE = """
             }
         }
 
+        function renderTableDetailsBlock(table, index) {
+            return `
+                <div class="mb-4 ${index > 0 ? 'mt-6 pt-4 border-t border-slate-200' : ''}">
+                    <div class="mb-3 p-2 bg-blue-50 rounded-md border border-blue-200 text-sm">
+                        <span class="font-medium text-blue-700">Schema:</span> <span class="text-blue-600">${table.schema}</span> |
+                        <span class="font-medium text-blue-700">Tabela:</span> <span class="text-blue-600">${table.table}</span> |
+                        <span class="font-medium text-blue-700">FDW:</span> <span class="text-blue-600">${table.fdw}</span>
+                    </div>
+                    <div>
+                        <div class="text-sm font-medium text-slate-700 mb-2">DDL:</div>
+                        <div class="bg-slate-900 text-slate-50 p-4 rounded-md font-mono text-xs overflow-x-auto max-h-96 overflow-y-auto">${table.ddl}</div>
+                    </div>
+                </div>
+            `;
+        }
+
+        // Lê uma resposta NDJSON linha a linha, chamando onLine para cada objeto recebido
+        async function readNdjson(response, onLine) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            while (true) {
+                const {done, value} = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, {stream: true});
+                const lines = buffer.split('\\n');
+                buffer = lines.pop();
+                lines.filter(line => line.trim()).forEach(line => onLine(JSON.parse(line)));
+            }
+
+            buffer += decoder.decode();
+            if (buffer.trim()) onLine(JSON.parse(buffer));
+        }
+
+        let tableDetailsRequest = 0;
+
         async function showAllSelectedTableDetails() {
             const detailsContent = document.getElementById('tableDetailsContent');
             detailsContent.innerHTML = '<div class="text-center py-8"><div class="spinner mx-auto mb-2"></div><p class="text-sm text-slate-500">Carregando...</p></div>';
 
+            // Uma nova seleção interrompe a renderização da anterior
+            const requestId = ++tableDetailsRequest;
+
             try {
                 // Coletar todas as tabelas selecionadas
                 const checkboxes = document.querySelectorAll('input[type="checkbox"]:checked');
@@ -586,48 +1231,71 @@ HTML_TEMPLATE = """
                     return;
                 }
 
-                // Buscar detalhes de todas as tabelas
-                const response = await fetch('/multiple-table-details', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({tables: selected})
-                });
+                // Buscar detalhes em streaming, página a página: cada tabela é exibida assim que chega
+                let cursor = 0;
+                let rendered = 0;
+                let tablesContainer = null;
+                let loadingIndicator = null;
+
+                while (cursor !== null && requestId === tableDetailsRequest) {
+                    const response = await fetch('/multiple-table-details/stream', {
+                        method: 'POST',
+                        headers: {'Content-Type': 'application/json'},
+                        body: JSON.stringify({tables: selected, cursor: cursor})
+                    });
 
-                const data = await response.json();
+                    if (!response.ok) {
+                        const data = await response.json();
+                        detailsContent.innerHTML = `<p class="text-sm text-red-600">Erro: ${data.error}</p>`;
+                        return;
+                    }
 
-                if (data.error) {
-                    detailsContent.innerHTML = `<p class="text-sm text-red-600">Erro: ${data.error}</p>`;
-                    return;
-                }
+                    let nextCursor = null;
+                    let streamError = null;
 
-                // Construir HTML com todas as tabelas
-                let html = `
-                    <div class="mb-4 p-3 bg-slate-50 rounded-md border border-slate-200 text-sm">
-                        <span class="font-medium text-slate-700">Database:</span> <span class="text-slate-600">${data.database}</span> |
-                        <span class="font-medium text-slate-700">Total de tabelas:</span> <span class="text-slate-600">${data.tables.length}</span>
-                    </div>
-                `;
+                    await readNdjson(response, line => {
+                        if (requestId !== tableDetailsRequest) return;
 
-                // Adicionar cada tabela
-                data.tables.forEach((table, index) => {
-                    html += `
-                        <div class="mb-4 ${index > 0 ? 'mt-6 pt-4 border-t border-slate-200' : ''}">
-                            <div class="mb-3 p-2 bg-blue-50 rounded-md border border-blue-200 text-sm">
-                                <span class="font-medium text-blue-700">Schema:</span> <span class="text-blue-600">${table.schema}</span> |
-                                <span class="font-medium text-blue-700">Tabela:</span> <span class="text-blue-600">${table.table}</span> |
-                                <span class="font-medium text-blue-700">FDW:</span> <span class="text-blue-600">${table.fdw}</span>
-                            </div>
-                            <div>
-                                <div class="text-sm font-medium text-slate-700 mb-2">DDL:</div>
-                                <div class="bg-slate-900 text-slate-50 p-4 rounded-md font-mono text-xs overflow-x-auto max-h-96 overflow-y-auto">${table.ddl}</div>
-                            </div>
-                        </div>
-                    `;
-                });
+                        if (line.error) {
+                            streamError = line.error;
+                        } else if (line.database !== undefined && !tablesContainer) {
+                            detailsContent.innerHTML = `
+                                <div class="mb-4 p-3 bg-slate-50 rounded-md border border-slate-200 text-sm">
+                                    <span class="font-medium text-slate-700">Database:</span> <span class="text-slate-600">${line.database}</span> |
+                                    <span class="font-medium text-slate-700">Total de tabelas:</span> <span class="text-slate-600">${line.total}</span>
+                                </div>
+                                <div id="tableDetailsList"></div>
+                                <div id="tableDetailsLoading" class="text-center py-4"><div class="spinner mx-auto"></div></div>
+                            `;
+                            tablesContainer = document.getElementById('tableDetailsList');
+                            loadingIndicator = document.getElementById('tableDetailsLoading');
+                        } else if (line.table) {
+                            tablesContainer.insertAdjacentHTML('beforeend', renderTableDetailsBlock(line.table, rendered++));
+                        } else if (line.next_cursor !== undefined) {
+                            nextCursor = line.next_cursor;
+                        }
+                    });
+
+                    if (streamError) {
+                        const message = `<p class="text-sm text-red-600">Erro: ${streamError}</p>`;
+                        if (loadingIndicator) {
+                            loadingIndicator.outerHTML = message;
+                        } else {
+                            detailsContent.innerHTML = message;
+                        }
+                        return;
+                    }
+
+                    cursor = nextCursor;
+                }
 
-                detailsContent.innerHTML = html;
+                if (loadingIndicator && requestId === tableDetailsRequest) {
+                    loadingIndicator.remove();
+                }
             } catch (error) {
-                detailsContent.innerHTML = `<p class="text-sm text-red-600">Erro ao carregar detalhes: ${error.message}</p>`;
+                if (requestId === tableDetailsRequest) {
+                    detailsContent.innerHTML = `<p class="text-sm text-red-600">Erro ao carregar detalhes: ${error.message}</p>`;
+                }
             }
         }
 
@@ -780,6 +1448,15 @@ HTML_TEMPLATE = """
 
         let conversationHistory = [];
         let selectedSchemas = [];
+        let dictionarySessionId = null;
+
+        // Identificador da sessão de chat: o servidor guarda o contexto da IA por sessão
+        function newDictionarySessionId() {
+            if (window.crypto && crypto.randomUUID) {
+                return crypto.randomUUID();
+            }
+            return Date.now().toString(36) + Math.random().toString(36).slice(2);
+        }
 
         function switchTab(tabName) {
             // Update tab buttons
@@ -849,6 +1526,7 @@ HTML_TEMPLATE = """
 
             // Clear chat
             conversationHistory = [];
+            dictionarySessionId = newDictionarySessionId();
             const chatMessages = document.getElementById('chatMessages');
             chatMessages.innerHTML = `
                 <div class="mb-4 p-4 bg-blue-50 border border-blue-200 rounded-md">
@@ -893,29 +1571,71 @@ HTML_TEMPLATE = """
                     body: JSON.stringify({
                         message: message,
                         schemas: selectedSchemas,
-                        history: conversationHistory
+                        history: conversationHistory,
+                        session_id: dictionarySessionId,
+                        stream: true
                     })
                 });
 
-                const data = await response.json();
-
-                if (response.ok) {
-                    // Add assistant message
-                    addMessageToChat('assistant', data.message);
-
-                    // Update conversation history
-                    conversationHistory.push({role: 'user', content: message});
-                    conversationHistory.push({role: 'assistant', content: data.message});
-
-                    // Update status with token usage
-                    status.textContent = `Tokens: ${data.usage.input_tokens} entrada, ${data.usage.output_tokens} saída | Modelo: ${data.model}`;
-                    status.className = 'mt-2 text-xs text-slate-500';
-                } else {
+                if (!response.ok) {
+                    const data = await response.json();
                     status.textContent = 'Erro: ' + data.error;
                     status.className = 'mt-2 text-xs text-red-600';
 
                     addMessageToChat('system', '❌ Erro: ' + data.error);
+                    return;
                 }
+
+                // Resposta em streaming (server-sent events): cada trecho é exibido assim que chega
+                const chatMessages = document.getElementById('chatMessages');
+                let answer = '';
+                let answerContent = null;
+                let renderPending = false;
+
+                const renderAnswer = () => {
+                    renderPending = false;
+                    answerContent.innerHTML = formatMarkdown(answer);
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                };
+
+                await readServerSentEvents(response, (event, data) => {
+                    if (event === 'delta') {
+                        if (!answerContent) {
+                            answerContent = addMessageToChat('assistant', '').querySelector('.prose');
+                            status.textContent = 'Recebendo resposta da IA...';
+                        }
+                        answer += data.content;
+                        if (!renderPending) {
+                            renderPending = true;
+                            requestAnimationFrame(renderAnswer);
+                        }
+                    } else if (event === 'done') {
+                        if (!answerContent) {
+                            answerContent = addMessageToChat('assistant', '').querySelector('.prose');
+                        }
+                        answer = data.message;
+                        renderAnswer();
+
+                        // Update conversation history
+                        conversationHistory.push({role: 'user', content: message});
+                        conversationHistory.push({role: 'assistant', content: data.message});
+
+                        // Update status with token usage
+                        let usage = 'não informado';
+                        if (data.usage && data.usage.cached) {
+                            usage = 'resposta do cache, nenhuma chamada à IA';
+                        } else if (data.usage) {
+                            usage = `${data.usage.input_tokens} entrada, ${data.usage.output_tokens} saída`;
+                        }
+                        status.textContent = `Tokens: ${usage} | Modelo: ${data.model}`;
+                        status.className = 'mt-2 text-xs text-slate-500';
+                    } else if (event === 'error') {
+                        status.textContent = 'Erro: ' + data.error;
+                        status.className = 'mt-2 text-xs text-red-600';
+
+                        addMessageToChat('system', '❌ Erro: ' + data.error);
+                    }
+                });
             } catch (error) {
                 status.textContent = 'Erro de conexão: ' + error.message;
                 status.className = 'mt-2 text-xs text-red-600';
@@ -955,6 +1675,42 @@ HTML_TEMPLATE = """
 
             chatMessages.appendChild(messageDiv);
             chatMessages.scrollTop = chatMessages.scrollHeight;
+            return messageDiv;
+        }
+
+        // Lê uma resposta text/event-stream, chamando onEvent(evento, dados JSON) para cada evento
+        async function readServerSentEvents(response, onEvent) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            const dispatch = (block) => {
+                let event = 'message';
+                const dataLines = [];
+                block.split('\\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        event = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataLines.push(line.slice(5).trim());
+                    }
+                });
+                if (dataLines.length > 0) {
+                    onEvent(event, JSON.parse(dataLines.join('\\n')));
+                }
+            };
+
+            while (true) {
+                const {done, value} = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, {stream: true});
+                const blocks = buffer.split('\\n\\n');
+                buffer = blocks.pop();
+                blocks.forEach(dispatch);
+            }
+
+            buffer += decoder.decode();
+            if (buffer.trim()) dispatch(buffer);
         }
 
         function escapeHtml(text) {
@@ -1269,474 +2025,1482 @@ HTML_TEMPLATE = """
 </html>
 """
 
-def extract_database_metadata(conn, selected_schemas=None):
+# Catálogos cujas alterações mudam a lista de schemas/tabelas
+RELATION_CATALOGS = ('pg_namespace', 'pg_class')
+
+def get_catalog_fingerprint(conn, catalogs=RELATION_CATALOGS):
     """
-    Extrai metadados completos do banco de dados incluindo schemas, tabelas, colunas,
-    constraints, relacionamentos e índices.
+    Calcula uma impressão digital barata do estado do catálogo.
+
+    Qualquer CREATE/ALTER/DROP reescreve linhas dos catálogos envolvidos, o que
+    muda a contagem de linhas ou a soma dos xmin. Basta comparar o resultado
+    com o anterior para saber se dados derivados do catálogo ficaram velhos.
 
     Args:
         conn: Conexão com o banco de dados PostgreSQL
-        selected_schemas: Lista de schemas a extrair. Se None, extrai todos (exceto system schemas)
+        catalogs: Nomes das tabelas de pg_catalog a considerar
 
     Returns:
-        dict: Metadados estruturados do banco de dados
+        str: Hash hexadecimal do estado dos catálogos
     """
     cursor = None
     try:
         cursor = conn.cursor()
-        metadata = {
-            'database_name': '',
-            'schemas': {}
-        }
+        query = sql.SQL(' UNION ALL ').join(
+            sql.SQL("SELECT {name}, count(*), sum(xmin::text::bigint) FROM pg_catalog.{table}").format(
+                name=sql.Literal(catalog),
+                table=sql.Identifier(catalog)
+            )
+            for catalog in catalogs
+        )
+        cursor.execute(query)
+        state = '|'.join(f"{name}:{count}:{xmin_sum}" for name, count, xmin_sum in cursor.fetchall())
+        return hashlib.md5(state.encode('utf-8')).hexdigest()
+    finally:
+        if cursor:
+            cursor.close()
 
-        # Nome do banco de dados
-        cursor.execute("SELECT current_database()")
-        metadata['database_name'] = cursor.fetchone()[0]
-
-        # Query para buscar schemas
-        schema_filter = ""
-        if selected_schemas:
-            schema_placeholders = ','.join(['%s'] * len(selected_schemas))
-            schema_filter = f"AND table_schema IN ({schema_placeholders})"
-
-        # Busca todas as tabelas dos schemas selecionados
-        query = f"""
-            SELECT DISTINCT table_schema
-            FROM information_schema.tables
-            WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-              AND table_type = 'BASE TABLE'
-              {schema_filter}
-            ORDER BY table_schema
-        """
+class CatalogCache:
+    """
+    Cache em memória de dados derivados do catálogo (ex.: árvore de schemas).
 
-        if selected_schemas:
-            cursor.execute(query, tuple(selected_schemas))
-        else:
-            cursor.execute(query)
-
-        schemas = [row[0] for row in cursor.fetchall()]
-
-        for schema_name in schemas:
-            metadata['schemas'][schema_name] = {'tables': {}}
-
-            # Busca tabelas do schema
-            cursor.execute("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = %s AND table_type = 'BASE TABLE'
-                ORDER BY table_name
-            """, (schema_name,))
-
-            tables = [row[0] for row in cursor.fetchall()]
-
-            for table_name in tables:
-                table_metadata = {
-                    'columns': [],
-                    'primary_keys': [],
-                    'foreign_keys': [],
-                    'indexes': [],
-                    'constraints': []
-                }
+    Cada entrada guarda a impressão digital do catálogo do momento em que foi
+    montada. A impressão é recalculada no máximo a cada `check_interval`
+    segundos; se mudou, o valor é reconstruído. Além de `max_entries`, as
+    entradas usadas há mais tempo são descartadas.
+    """
 
-                # Busca colunas
-                cursor.execute("""
-                    SELECT
-                        column_name,
-                        data_type,
-                        character_maximum_length,
-                        numeric_precision,
-                        numeric_scale,
-                        is_nullable,
-                        column_default,
-                        ordinal_position
-                    FROM information_schema.columns
-                    WHERE table_schema = %s AND table_name = %s
-                    ORDER BY ordinal_position
-                """, (schema_name, table_name))
-
-                for row in cursor.fetchall():
-                    col_name, data_type, char_len, num_prec, num_scale, is_nullable, col_default, ordinal_pos = row
-
-                    type_detail = data_type
-                    if char_len:
-                        type_detail += f"({char_len})"
-                    elif num_prec:
-                        if num_scale:
-                            type_detail += f"({num_prec},{num_scale})"
-                        else:
-                            type_detail += f"({num_prec})"
-
-                    table_metadata['columns'].append({
-                        'name': col_name,
-                        'type': data_type,
-                        'type_detail': type_detail,
-                        'nullable': is_nullable == 'YES',
-                        'default': col_default,
-                        'position': ordinal_pos
-                    })
+    def __init__(self, check_interval, max_entries):
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
 
-                # Busca chaves primárias
-                cursor.execute("""
-                    SELECT a.attname
-                    FROM pg_index i
-                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                    WHERE i.indrelid = %s::regclass AND i.indisprimary
-                    ORDER BY array_position(i.indkey, a.attnum)
-                """, (f'{schema_name}.{table_name}',))
-
-                table_metadata['primary_keys'] = [row[0] for row in cursor.fetchall()]
-
-                # Busca chaves estrangeiras
-                cursor.execute("""
-                    SELECT
-                        tc.constraint_name,
-                        kcu.column_name,
-                        ccu.table_schema AS foreign_schema,
-                        ccu.table_name AS foreign_table,
-                        ccu.column_name AS foreign_column
-                    FROM information_schema.table_constraints AS tc
-                    JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                        AND tc.table_schema = kcu.table_schema
-                    JOIN information_schema.constraint_column_usage AS ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                        AND ccu.table_schema = tc.table_schema
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                        AND tc.table_schema = %s
-                        AND tc.table_name = %s
-                """, (schema_name, table_name))
-
-                for row in cursor.fetchall():
-                    constraint_name, column_name, foreign_schema, foreign_table, foreign_column = row
-                    table_metadata['foreign_keys'].append({
-                        'constraint_name': constraint_name,
-                        'column': column_name,
-                        'references_schema': foreign_schema,
-                        'references_table': foreign_table,
-                        'references_column': foreign_column
-                    })
+    def get(self, key, fingerprint_fn, loader):
+        """
+        Retorna (valor, impressão digital) para a chave, reconstruindo se necessário.
 
-                # Busca índices
-                cursor.execute("""
-                    SELECT
-                        i.relname AS index_name,
-                        a.attname AS column_name,
-                        ix.indisunique AS is_unique,
-                        ix.indisprimary AS is_primary
-                    FROM pg_class t
-                    JOIN pg_index ix ON t.oid = ix.indrelid
-                    JOIN pg_class i ON i.oid = ix.indexrelid
-                    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
-                    JOIN pg_namespace n ON n.oid = t.relnamespace
-                    WHERE n.nspname = %s
-                        AND t.relname = %s
-                        AND NOT ix.indisprimary
-                    ORDER BY i.relname, a.attnum
-                """, (schema_name, table_name))
-
-                indexes = {}
-                for row in cursor.fetchall():
-                    index_name, column_name, is_unique, is_primary = row
-                    if index_name not in indexes:
-                        indexes[index_name] = {
-                            'name': index_name,
-                            'columns': [],
-                            'unique': is_unique
-                        }
-                    indexes[index_name]['columns'].append(column_name)
-
-                table_metadata['indexes'] = list(indexes.values())
-
-                # Busca outras constraints (UNIQUE, CHECK)
-                cursor.execute("""
-                    SELECT
-                        tc.constraint_name,
-                        tc.constraint_type,
-                        kcu.column_name
-                    FROM information_schema.table_constraints AS tc
-                    LEFT JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                        AND tc.table_schema = kcu.table_schema
-                    WHERE tc.table_schema = %s
-                        AND tc.table_name = %s
-                        AND tc.constraint_type IN ('UNIQUE', 'CHECK')
-                    ORDER BY tc.constraint_name
-                """, (schema_name, table_name))
-
-                constraints = {}
-                for row in cursor.fetchall():
-                    constraint_name, constraint_type, column_name = row
-                    if constraint_name not in constraints:
-                        constraints[constraint_name] = {
-                            'name': constraint_name,
-                            'type': constraint_type,
-                            'columns': []
-                        }
-                    if column_name:
-                        constraints[constraint_name]['columns'].append(column_name)
+        Args:
+            key: Chave da entrada (inclui o alvo da conexão)
+            fingerprint_fn: Função sem argumentos que calcula a impressão digital atual
+            loader: Função sem argumentos que monta o valor
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+            if entry and now - entry['checked_at'] < self.check_interval:
+                return entry['value'], entry['fingerprint']
+            if entry:
+                # Só esta requisição confere a impressão digital; as concorrentes usam o valor atual
+                entry['checked_at'] = now
+
+        fingerprint = fingerprint_fn()
+        if entry and entry['fingerprint'] == fingerprint:
+            with self._lock:
+                entry['checked_at'] = now
+            return entry['value'], fingerprint
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = {'value': value, 'fingerprint': fingerprint, 'checked_at': now}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value, fingerprint
+
+catalog_cache = CatalogCache(CATALOG_CHECK_INTERVAL, CATALOG_CACHE_MAX_ENTRIES)
+
+def get_cached_schema_tables():
+    """Retorna (árvore de schemas, impressão digital) do alvo atual, usando o cache de catálogo"""
+    return catalog_cache.get(
+        (get_session_database().target, 'schemas'),
+        lambda: run_db(get_catalog_fingerprint),
+        lambda: run_db(list_schema_tables)
+    )
+
+def fetch_table_fingerprints(cursor, schemas):
+    """
+    Calcula uma impressão digital do catálogo para cada tabela dos schemas, em uma única consulta.
 
-                table_metadata['constraints'] = list(constraints.values())
+    Considera a linha da tabela em pg_class e as linhas de pg_attribute (com o
+    pg_type de cada coluna), pg_attrdef, pg_index (com o pg_class do índice) e
+    pg_constraint, além das tabelas e colunas referenciadas pelas suas chaves
+    estrangeiras (que podem estar em outro schema). Qualquer DDL que altere os
+    metadados extraídos da tabela muda a contagem ou a soma dos xmin.
 
-                metadata['schemas'][schema_name]['tables'][table_name] = table_metadata
+    Cada catálogo é agregado uma vez por tabela (GROUP BY) e os resultados são
+    unidos pelo oid, em vez de subconsultas correlacionadas por tabela.
 
-        return metadata
-    finally:
-        if cursor:
-            cursor.close()
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        schemas: Lista de schemas
 
-def schema_exists(conn, schema_name):
+    Returns:
+        dict: (schema, tabela) -> (oid, hash hexadecimal)
+    """
+    rows = iter_catalog_rows(cursor, f"""
+        WITH rel AS (
+            SELECT c.oid, n.nspname, c.relname, n.xmin AS nsp_xmin, c.xmin AS rel_xmin
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE {CATALOG_TABLE_FILTER}
+              AND n.nspname = ANY(%s)
+              AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+        ),
+        att AS (
+            SELECT a.attrelid AS oid, count(*) || ':' || sum(a.xmin::text::bigint + t.xmin::text::bigint) AS state
+            FROM pg_attribute a
+            JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid IN (SELECT oid FROM rel) AND a.attnum > 0
+            GROUP BY a.attrelid
+        ),
+        def AS (
+            SELECT ad.adrelid AS oid, count(*) || ':' || sum(ad.xmin::text::bigint) AS state
+            FROM pg_attrdef ad
+            WHERE ad.adrelid IN (SELECT oid FROM rel)
+            GROUP BY ad.adrelid
+        ),
+        idx AS (
+            SELECT i.indrelid AS oid, count(*) || ':' || sum(i.xmin::text::bigint + ic.xmin::text::bigint) AS state
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid IN (SELECT oid FROM rel)
+            GROUP BY i.indrelid
+        ),
+        con AS (
+            SELECT k.conrelid AS oid, count(*) || ':' || sum(k.xmin::text::bigint) AS state
+            FROM pg_constraint k
+            WHERE k.conrelid IN (SELECT oid FROM rel)
+            GROUP BY k.conrelid
+        ),
+        ref AS (
+            SELECT k.conrelid AS oid,
+                   count(*) || ':' || sum(rc.xmin::text::bigint + rn.xmin::text::bigint + ra.xmin::text::bigint) AS state
+            FROM pg_constraint k
+            JOIN pg_class rc ON rc.oid = k.confrelid
+            JOIN pg_namespace rn ON rn.oid = rc.relnamespace
+            JOIN pg_attribute ra ON ra.attrelid = k.confrelid AND ra.attnum = ANY(k.confkey)
+            WHERE k.contype = 'f' AND k.conrelid IN (SELECT oid FROM rel)
+            GROUP BY k.conrelid
+        )
+        SELECT
+            rel.nspname,
+            rel.relname,
+            rel.oid,
+            md5(concat_ws('|', rel.nsp_xmin, rel.rel_xmin, att.state, def.state, idx.state, con.state, ref.state))
+        FROM rel
+        LEFT JOIN att ON att.oid = rel.oid
+        LEFT JOIN def ON def.oid = rel.oid
+        LEFT JOIN idx ON idx.oid = rel.oid
+        LEFT JOIN con ON con.oid = rel.oid
+        LEFT JOIN ref ON ref.oid = rel.oid
+    """, (list(schemas),))
+
+    return {(schema_name, table_name): (table_oid, fingerprint)
+            for schema_name, table_name, table_oid, fingerprint in rows}
+
+class MetadataSnapshotStore:
     """
-    Verifica se um schema existe no banco de dados.
+    Snapshots em disco (SQLite) dos metadados extraídos, um por alvo de conexão e tabela.
 
-    Args:
-        conn: Conexão com o banco de dados PostgreSQL
-        schema_name: Nome do schema a verificar
+    Cada snapshot guarda a impressão digital da tabela no momento da extração e
+    os metadados em JSON comprimido, de modo que uma mudança em uma tabela só
+    reescreve a linha dela. Sobrevive a reinícios da aplicação; falhas de
+    leitura ou escrita são registradas e tratadas como cache vazio.
 
-    Returns:
-        bool: True se o schema existe, False caso contrário
+    Os snapshots já lidos ficam também em memória (decodificados), então só o
+    primeiro acesso a um schema após o início da aplicação lê o arquivo. Acima de
+    `max_memory_tables` tabelas em memória, os schemas usados há mais tempo são
+    descartados dela (e relidos do arquivo se voltarem a ser usados).
     """
-    cursor = None
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT EXISTS(
-                SELECT 1
-                FROM information_schema.schemata
-                WHERE schema_name = %s
-            )
-        """, (schema_name,))
 
-        return cursor.fetchone()[0]
-    finally:
-        if cursor:
-            cursor.close()
+    # Incrementar quando o formato gravado mudar: snapshots antigos são descartados
+    FORMAT_VERSION = 2
+
+    def __init__(self, path, max_memory_tables):
+        self.path = path
+        self.max_memory_tables = max_memory_tables
+        self._lock = threading.Lock()
+        self._initialized = False
+        # (alvo, schema) já lidos do disco -> {tabela: (impressão digital, metadados)}, do menos ao mais usado
+        self._memory = OrderedDict()
+
+    def _trim_memory(self):
+        """Descarta da memória os schemas usados há mais tempo até caber no limite (chamado com o lock)"""
+        total = sum(len(tables) for tables in self._memory.values())
+        while len(self._memory) > 1 and total > self.max_memory_tables:
+            _, tables = self._memory.popitem(last=False)
+            total -= len(tables)
+
+    def _connect(self):
+        """Abre o arquivo SQLite, criando diretório e tabela na primeira vez"""
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10)
+            if not self._initialized:
+                db.execute("PRAGMA journal_mode=WAL")
+                if db.execute("PRAGMA user_version").fetchone()[0] != self.FORMAT_VERSION:
+                    with db:
+                        db.execute("DROP TABLE IF EXISTS metadata_snapshots")
+                        db.execute("DROP TABLE IF EXISTS table_snapshots")
+                        db.execute(f"PRAGMA user_version = {self.FORMAT_VERSION}")
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS table_snapshots (
+                        target TEXT NOT NULL,
+                        schema_name TEXT NOT NULL,
+                        table_name TEXT NOT NULL,
+                        fingerprint TEXT NOT NULL,
+                        data BLOB NOT NULL,
+                        updated_at TEXT NOT NULL,
+                        PRIMARY KEY (target, schema_name, table_name)
+                    )
+                """)
+                self._initialized = True
+            return db
+
+    def load(self, target, schemas):
+        """
+        Args:
+            target: Alvo da conexão (usuário@host:porta/banco)
+            schemas: Lista de schemas
+
+        Returns:
+            dict: (schema, tabela) -> (impressão digital, metadados da tabela) dos snapshots existentes
+        """
+        schemas = list(schemas)
+        with self._lock:
+            missing = [schema_name for schema_name in schemas if (target, schema_name) not in self._memory]
 
-def table_exists(conn, schema_name, table_name):
+        if missing:
+            loaded = {schema_name: {} for schema_name in missing}
+            db = None
+            try:
+                db = self._connect()
+                rows = db.execute(
+                    f"SELECT schema_name, table_name, fingerprint, data FROM table_snapshots "
+                    f"WHERE target = ? AND schema_name IN ({', '.join('?' * len(missing))})",
+                    [target, *missing]
+                ).fetchall()
+                for schema_name, table_name, fingerprint, data in rows:
+                    loaded[schema_name][table_name] = (fingerprint, json.loads(zlib.decompress(data)))
+            except (sqlite3.Error, zlib.error, ValueError) as e:
+                logger.warning(f"Erro ao ler snapshots de metadados: {e}")
+                loaded = {schema_name: {} for schema_name in missing}
+            finally:
+                if db:
+                    db.close()
+
+            with self._lock:
+                for schema_name, tables in loaded.items():
+                    self._memory.setdefault((target, schema_name), tables)
+
+        with self._lock:
+            snapshots = {}
+            for schema_name in schemas:
+                key = (target, schema_name)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    for table_name, snapshot in self._memory[key].items():
+                        snapshots[(schema_name, table_name)] = snapshot
+            self._trim_memory()
+            return snapshots
+
+    def save(self, target, snapshots, removed=()):
+        """
+        Args:
+            target: Alvo da conexão (usuário@host:porta/banco)
+            snapshots: dict (schema, tabela) -> (impressão digital, metadados da tabela)
+            removed: Pares (schema, tabela) que não existem mais no banco
+        """
+        with self._lock:
+            for schema_name, table_name in removed:
+                self._memory.get((target, schema_name), {}).pop(table_name, None)
+            for (schema_name, table_name), snapshot in snapshots.items():
+                self._memory.setdefault((target, schema_name), {})[table_name] = snapshot
+                self._memory.move_to_end((target, schema_name))
+            self._trim_memory()
+
+        db = None
+        try:
+            db = self._connect()
+            updated_at = datetime.now().isoformat()
+            with db:
+                db.executemany(
+                    "DELETE FROM table_snapshots WHERE target = ? AND schema_name = ? AND table_name = ?",
+                    [(target, schema_name, table_name) for schema_name, table_name in removed]
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO table_snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                    [(target, schema_name, table_name, fingerprint,
+                      zlib.compress(json.dumps(table_metadata, separators=(',', ':')).encode('utf-8')),
+                      updated_at)
+                     for (schema_name, table_name), (fingerprint, table_metadata) in snapshots.items()]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar snapshots de metadados: {e}")
+        finally:
+            if db:
+                db.close()
+
+metadata_store = (MetadataSnapshotStore(os.path.join(METADATA_CACHE_DIR, 'metadata.sqlite3'), METADATA_MEMORY_MAX_TABLES)
+                  if METADATA_CACHE_DIR else None)
+
+def load_database_metadata(conn, selected_schemas, run_chunk=None, fingerprints=None):
     """
-    Verifica se uma tabela existe em um schema específico.
+    Retorna os metadados dos schemas selecionados, reaproveitando os snapshots em disco.
+
+    Calcula a impressão digital de cada tabela e só extrai as tabelas novas ou
+    cujo catálogo mudou; as demais vêm do snapshot, e as removidas do banco são
+    apagadas dele.
 
     Args:
         conn: Conexão com o banco de dados PostgreSQL
-        schema_name: Nome do schema onde procurar
-        table_name: Nome da tabela a verificar
+        selected_schemas: Lista de schemas
+        run_chunk: Executor de lotes em outras conexões, para extrair em paralelo (ver run_catalog_chunks)
+        fingerprints: Resultado de fetch_table_fingerprints já calculado para esses schemas
+                      (ex.: na verificação do cache do chat); se None, é calculado aqui
 
     Returns:
-        bool: True se a tabela existe, False caso contrário
+        dict: Metadados no mesmo formato de extract_database_metadata
     """
     cursor = None
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT EXISTS(
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = %s
-                  AND table_name = %s
-                  AND table_type = 'BASE TABLE'
-            )
-        """, (schema_name, table_name))
+        cursor.execute("SELECT current_database()")
+        database_name = cursor.fetchone()[0]
 
-        return cursor.fetchone()[0]
-    finally:
-        if cursor:
-            cursor.close()
+        target = get_connection_target(conn)
+        if fingerprints is None:
+            fingerprints = fetch_table_fingerprints(cursor, selected_schemas)
+        snapshots = metadata_store.load(target, selected_schemas) if metadata_store else {}
 
-def get_schema_enums(conn, schema_name):
-    """Busca todos os ENUMs definidos em um schema do PostgreSQL"""
-    cursor = None
-    try:
-        # Força commit para garantir que vemos o estado atual do banco
-        conn.commit()
+        changed = sorted(key for key, (_, fingerprint) in fingerprints.items()
+                         if snapshots.get(key, (None, None))[0] != fingerprint)
+        removed = [key for key in snapshots if key not in fingerprints]
 
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT
-                t.typname as enum_name,
-                array_agg(e.enumlabel ORDER BY e.enumsortorder) as enum_values
-            FROM pg_type t
-            JOIN pg_enum e ON t.oid = e.enumtypid
-            JOIN pg_namespace n ON n.oid = t.typnamespace
-            WHERE n.nspname = %s
-            GROUP BY t.typname
-            ORDER BY t.typname
-        """, (schema_name,))
-
-        enums = {}
-        for row in cursor.fetchall():
-            enum_name, enum_values = row
-            enums[enum_name] = enum_values
-
-        logger.debug(f"ENUMs encontrados no schema '{schema_name}': {list(enums.keys())}")
-        return enums
+        if changed or removed:
+            tables_metadata = run_catalog_chunks(
+                cursor, [(fingerprints[key][0], *key) for key in changed], build_tables_metadata, run_chunk
+            )
+            fresh = {key: (fingerprints[key][1], tables_metadata[key]) for key in changed}
+            if metadata_store:
+                metadata_store.save(target, fresh, removed)
+            snapshots.update(fresh)
     finally:
         if cursor:
             cursor.close()
 
-def map_postgres_to_prisma_type(pg_type, udt_name=None):
-    """Mapeia tipos PostgreSQL para tipos Prisma"""
-    type_mapping = {
-        'integer': 'Int',
-        'bigint': 'BigInt',
-        'smallint': 'Int',
-        'serial': 'Int',
-        'bigserial': 'BigInt',
-        'numeric': 'Decimal',
-        'decimal': 'Decimal',
-        'real': 'Float',
-        'double precision': 'Float',
-        'money': 'Decimal',
-        'character varying': 'String',
-        'varchar': 'String',
-        'character': 'String',
-        'char': 'String',
-        'text': 'String',
-        'boolean': 'Boolean',
-        'date': 'DateTime',
-        'timestamp': 'DateTime',
-        'timestamp without time zone': 'DateTime',
-        'timestamp with time zone': 'DateTime',
-        'time': 'DateTime',
-        'json': 'Json',
-        'jsonb': 'Json',
-        'uuid': 'String',
-        'bytea': 'Bytes',
-    }
+    logger.info(f"Metadados: {len(changed)} de {len(fingerprints)} tabelas extraídas, "
+                f"{len(removed)} removidas, demais do snapshot")
 
-    # Se o tipo é USER-DEFINED (enum), retorna o nome do tipo
-    if pg_type.lower() == 'user-defined' and udt_name:
-        # Converte para PascalCase (padrão Prisma)
-        return ''.join(word.capitalize() for word in udt_name.split('_'))
+    metadata = {
+        'database_name': database_name,
+        'schemas': {}
+    }
+    for schema_name, table_name in sorted(fingerprints):
+        schema_data = metadata['schemas'].setdefault(schema_name, {'tables': {}})
+        schema_data['tables'][table_name] = snapshots[(schema_name, table_name)][1]
+    return metadata
 
-    return type_mapping.get(pg_type.lower(), 'String')
+def get_dictionary_fingerprint(conn, selected_schemas):
+    """
+    Calcula a impressão digital do contexto do dicionário para os schemas selecionados.
 
-def generate_prisma_schema(schema_name, table_name, conn, include_enums=True):
-    """Gera o schema Prisma para uma tabela específica
+    Combina as impressões por tabela de fetch_table_fingerprints, então só as
+    linhas de catálogo das tabelas desses schemas são lidas, em vez de somar
+    pg_attribute, pg_constraint etc. do banco inteiro a cada verificação.
 
-    Args:
-        schema_name: Nome do schema PostgreSQL
-        table_name: Nome da tabela
-        conn: Conexão com o banco
-        include_enums: Se True, inclui definições de enum no output
+    Returns:
+        tuple: (hash hexadecimal do estado das tabelas dos schemas, impressões por
+               tabela de fetch_table_fingerprints, reaproveitáveis em load_database_metadata)
     """
     cursor = None
     try:
         cursor = conn.cursor()
-
-        # Busca ENUMs do schema
-        enums = get_schema_enums(conn, schema_name)
-
-        # Busca colunas da tabela (incluindo udt_name para enums)
-        cursor.execute("""
-            SELECT
-                column_name,
-                data_type,
-                is_nullable,
-                column_default,
-                udt_name
-            FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position
-        """, (schema_name, table_name))
-
-        columns = cursor.fetchall()
-
-        # Busca chaves primárias
-        cursor.execute("""
-            SELECT a.attname
-            FROM pg_index i
-            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-            WHERE i.indrelid = %s::regclass AND i.indisprimary
-        """, (f'{schema_name}.{table_name}',))
-
-        primary_keys = [row[0] for row in cursor.fetchall()]
-
-        # Identifica quais enums são usados nesta tabela
-        used_enums = set()
-        for col_name, data_type, is_nullable, col_default, udt_name in columns:
-            if data_type.lower() == 'user-defined' and udt_name in enums:
-                used_enums.add(udt_name)
-                logger.debug(f"Coluna '{col_name}' usa ENUM '{udt_name}' em {schema_name}.{table_name}")
-            elif data_type.lower() == 'user-defined':
-                logger.debug(f"Coluna '{col_name}' é USER-DEFINED mas udt_name='{udt_name}' não encontrado nos enums: {list(enums.keys())}")
-
-        # Gera definições de ENUMs usados (se solicitado)
-        prisma_schema = ''
-        if include_enums:
-            for enum_name in sorted(used_enums):
-                enum_prisma_name = ''.join(word.capitalize() for word in enum_name.split('_'))
-                prisma_schema += f'enum {enum_prisma_name} {{\n'
-                for value in enums[enum_name]:
-                    prisma_schema += f'  {value}\n'
-                prisma_schema += '}\n\n'
-
-        # Gera o modelo Prisma
-        model_name = ''.join(word.capitalize() for word in table_name.split('_'))
-
-        prisma_schema += f'model {model_name} {{\n'
-
-        for col_name, data_type, is_nullable, col_default, udt_name in columns:
-            prisma_type = map_postgres_to_prisma_type(data_type, udt_name)
-
-            # Campos que devem ser sempre opcionais
-            always_optional_fields = ['deleted_at', 'deletedAt', 'updated_at', 'updatedAt', 'createdBy', 'deletedBy']
-            optional = '?' if (is_nullable == 'YES' and col_name not in primary_keys) or col_name in always_optional_fields else ''
-
-            attributes = []
-            if col_name in primary_keys:
-                attributes.append('@id')
-            if col_default and 'nextval' in str(col_default):
-                attributes.append('@default(autoincrement())')
-            elif col_default:
-                if 'now()' in str(col_default) or 'CURRENT_TIMESTAMP' in str(col_default):
-                    attributes.append('@default(now())')
-
-            attr_str = ' ' + ' '.join(attributes) if attributes else ''
-            prisma_schema += f'  {col_name} {prisma_type}{optional}{attr_str}\n'
-
-        prisma_schema += f'\n  @@map("{table_name}")\n'
-        if schema_name != 'public':
-            prisma_schema += f'  @@schema("{schema_name}")\n'
-        prisma_schema += '}\n'
-
-        return prisma_schema
+        fingerprints = fetch_table_fingerprints(cursor, selected_schemas)
     finally:
         if cursor:
             cursor.close()
 
-def generate_enum_definitions(conn, schemas_list):
-    """Gera todas as definições de ENUMs para uma lista de schemas
+    state = '|'.join(f"{schema_name}.{table_name}:{table_oid}:{digest}"
+                     for (schema_name, table_name), (table_oid, digest) in sorted(fingerprints.items()))
+    return hashlib.md5(state.encode('utf-8')).hexdigest(), fingerprints
 
-    Args:
-        conn: Conexão com o banco
-        schemas_list: Lista de nomes de schemas
+DICTIONARY_INSTRUCTIONS = """
 
-    Returns:
-        str: Definições de ENUMs em formato Prisma
+**Sua tarefa é:**
+1. Analisar a estrutura do banco de dados acima
+2. Explicar o propósito e significado dos schemas, tabelas e campos
+3. Identificar e explicar os relacionamentos entre as tabelas
+4. Sugerir prováveis casos de uso e finalidades do banco de dados
+5. Responder perguntas do usuário sobre a estrutura do banco de dados
+
+**Diretrizes:**
+- Seja claro e didático nas explicações
+- Use exemplos quando apropriado
+- Identifique padrões de design (normalização, denormalização, etc)
+- Sugira melhorias quando relevante
+- Explique em português brasileiro
+"""
+
+def estimate_tokens(text):
+    """Estimativa barata de tokens (~4 caracteres por token), sem depender do tokenizador do modelo"""
+    return (len(text) + 3) // 4
+
+def normalize_term(term):
+    """Forma usada na comparação de nomes: minúsculas e sem o plural simples em 's'"""
+    term = term.lower()
+    return term[:-1] if len(term) > 3 and term.endswith('s') else term
+
+class DictionaryContext:
+    """
+    Contexto do chat do dicionário de dados, pronto para ser montado por pergunta.
+
+    Guarda, para cada tabela, o bloco markdown completo e um resumo de uma linha
+    (com as estimativas de tokens), além do grafo de chaves estrangeiras. A cada
+    mensagem, as tabelas são ordenadas por relevância à pergunta e o prompt é
+    montado dentro do orçamento de tokens: detalhes completos para as mais
+    relevantes, resumo para as demais. Se tudo couber, o prompt traz todas as
+    tabelas completas.
     """
-    all_enums = {}
-
-    # Coleta todos os enums de todos os schemas
-    for schema_name in schemas_list:
-        enums = get_schema_enums(conn, schema_name)
-        for enum_name, enum_values in enums.items():
-            # Usa chave única: schema.enum_name para evitar conflitos
-            key = f"{schema_name}.{enum_name}"
-            if key not in all_enums:
-                all_enums[key] = (enum_name, enum_values)
-
-    # Gera definições
-    prisma_enums = ''
-    for key in sorted(all_enums.keys()):
-        enum_name, enum_values = all_enums[key]
-        enum_prisma_name = ''.join(word.capitalize() for word in enum_name.split('_'))
-        prisma_enums += f'enum {enum_prisma_name} {{\n'
-        for value in enum_values:
-            prisma_enums += f'  {value}\n'
-        prisma_enums += '}\n\n'
-
-    return prisma_enums
 
-@app.route('/')
+    def __init__(self, metadata):
+        self.database_name = metadata['database_name']
+        self.tables = []
+        self.neighbors = {}
+
+        for schema_name, schema_data in metadata['schemas'].items():
+            for table_name, table_data in schema_data['tables'].items():
+                key = (schema_name, table_name)
+                full = render_dictionary_table(table_name, table_data)
+                summary = render_dictionary_summary(schema_name, table_name, table_data)
+                self.tables.append({
+                    'key': key,
+                    'full': full,
+                    'summary': summary,
+                    'full_tokens': estimate_tokens(full),
+                    'summary_tokens': estimate_tokens(summary),
+                    'name': normalize_term(table_name),
+                    'parts': {normalize_term(part) for part in table_name.split('_') if len(part) >= 3},
+                    'columns': {normalize_term(col['name']) for col in table_data['columns']}
+                })
+                self.neighbors.setdefault(key, set())
+
+        # Grafo não direcionado de chaves estrangeiras entre as tabelas do contexto
+        for schema_name, schema_data in metadata['schemas'].items():
+            for table_name, table_data in schema_data['tables'].items():
+                for fk in table_data['foreign_keys']:
+                    target = (fk['references_schema'], fk['references_table'])
+                    if target in self.neighbors and target != (schema_name, table_name):
+                        self.neighbors[(schema_name, table_name)].add(target)
+                        self.neighbors[target].add((schema_name, table_name))
+
+    def _header(self):
+        return f"""Você é um especialista em bancos de dados PostgreSQL e está analisando o seguinte banco de dados:
+
+**Banco de Dados:** {self.database_name}
+
+**Estrutura do Banco de Dados:**
+
+"""
+
+    def rank(self, question):
+        """
+        Ordena as tabelas por relevância à pergunta.
+
+        Pontua menções ao nome da tabela, a partes do nome (separadas por '_'),
+        ao schema e a colunas; tabelas ligadas por chave estrangeira às tabelas
+        citadas ganham pontos pela proximidade no grafo (1 ou 2 saltos).
+
+        Returns:
+            list: Pares (entrada de self.tables, pontuação), da mais para a menos relevante
+        """
+        terms = {normalize_term(term) for term in re.findall(r'\w+', question)}
+        scores = {}
+        for table in self.tables:
+            schema_name = table['key'][0]
+            score = 0
+            if table['name'] in terms:
+                score += 10
+            score += 3 * len(table['parts'] & (terms - {table['name']}))
+            if normalize_term(schema_name) in terms:
+                score += 2
+            score += min(len(table['columns'] & terms), 3)
+            scores[table['key']] = score
+
+        # Proximidade no grafo de FKs a partir das tabelas citadas pelo nome
+        seeds = [key for key, score in scores.items() if score >= 3]
+        distances = {key: 0 for key in seeds}
+        frontier = seeds
+        for distance in (1, 2):
+            next_frontier = []
+            for key in frontier:
+                for neighbor in self.neighbors[key]:
+                    if neighbor not in distances:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        for key, distance in distances.items():
+            if distance:
+                scores[key] += 4 if distance == 1 else 2
+
+        order = {table['key']: position for position, table in enumerate(self.tables)}
+        ranked = sorted(self.tables, key=lambda table: (-scores[table['key']], order[table['key']]))
+        return [(table, scores[table['key']]) for table in ranked]
+
+    def render(self, question, token_budget):
+        """
+        Monta o prompt de sistema para a pergunta, dentro do orçamento de tokens.
+
+        Args:
+            question: Texto usado para a relevância (mensagem atual e a anterior do usuário)
+            token_budget: Limite estimado de tokens do prompt
+
+        Returns:
+            str: Prompt de sistema em markdown
+        """
+        header = self._header()
+        fixed_tokens = estimate_tokens(header) + estimate_tokens(DICTIONARY_INSTRUCTIONS)
+
+        full_tables = {table['key'] for table in self.tables}
+        schemas = {key[0] for key in full_tables}
+        if fixed_tokens + sum(table['full_tokens'] for table in self.tables) \
+                + sum(estimate_tokens(f"\n### Schema: {schema_name}\n\n") for schema_name in schemas) > token_budget:
+            full_tables = set()
+            schemas = set()
+            ranked = self.rank(question)
+            used = fixed_tokens + estimate_tokens(self._summary_header()) \
+                + estimate_tokens(self._omitted_note(len(self.tables)))
+
+            def add_full(table, limit, replaces_summary=False):
+                """Inclui a tabela com detalhes completos se couber até o limite"""
+                nonlocal used
+                schema_name = table['key'][0]
+                extra = table['full_tokens'] - (table['summary_tokens'] if replaces_summary else 0)
+                if schema_name not in schemas:
+                    extra += estimate_tokens(f"\n### Schema: {schema_name}\n\n")
+                if used + extra <= limit:
+                    full_tables.add(table['key'])
+                    schemas.add(schema_name)
+                    used += extra
+
+            # 1) Detalhes completos das tabelas relevantes, usando até 3/4 do orçamento
+            for table, score in ranked:
+                if score > 0:
+                    add_full(table, token_budget * 3 // 4)
+
+            # 2) Resumo das demais, na ordem de relevância, enquanto couber
+            summarized = []
+            for table, _ in ranked:
+                if table['key'] in full_tables:
+                    continue
+                if used + table['summary_tokens'] > token_budget:
+                    break
+                summarized.append(table)
+                used += table['summary_tokens']
+
+            # 3) Troca resumos por detalhes completos com o orçamento que sobrou
+            for table in summarized:
+                add_full(table, token_budget, replaces_summary=True)
+
+            summary_keys = {table['key'] for table in summarized} - full_tables
+            omitted = len(self.tables) - len(full_tables) - len(summary_keys)
+        else:
+            summary_keys = set()
+            omitted = 0
+
+        context = header
+        current_schema = None
+        for table in self.tables:
+            if table['key'] not in full_tables:
+                continue
+            if table['key'][0] != current_schema:
+                current_schema = table['key'][0]
+                context += f"\n### Schema: {current_schema}\n\n"
+            context += table['full']
+
+        if summary_keys or omitted:
+            context += self._summary_header()
+            context += ''.join(table['summary'] for table in self.tables if table['key'] in summary_keys)
+            if omitted:
+                context += self._omitted_note(omitted)
+
+        return context + DICTIONARY_INSTRUCTIONS
+
+    def _omitted_note(self, omitted):
+        return f"\n_{omitted} tabelas omitidas por limite de contexto._\n"
+
+    def _summary_header(self):
+        return ("\n### Demais tabelas (resumo)\n\n"
+                "Tabelas menos relevantes para a pergunta atual, apenas com nomes de colunas, "
+                "chave primária e chaves estrangeiras:\n\n")
+
+class DictionaryContextCache:
+    """
+    Cache do contexto do chat (DictionaryContext), por sessão de chat.
+
+    Cada sessão guarda os schemas selecionados, a impressão digital do catálogo
+    e o contexto preparado. Nas mensagens seguintes o contexto é reaproveitado
+    sem extrair metadados nem renderizar as tabelas; a impressão digital é conferida
+    no máximo a cada `check_interval` segundos. Sessões ociosas há mais de `ttl`
+    segundos, ou as mais antigas além de `max_sessions`, são descartadas.
+    """
+
+    def __init__(self, check_interval, ttl, max_sessions):
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        """Remove as sessões ociosas há mais de ttl (as mais antigas ficam no início)"""
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry['used_at'] <= self.ttl:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id, key, fingerprint_fn, loader):
+        """
+        Retorna o contexto da sessão, reconstruindo se os schemas ou o catálogo mudaram.
+
+        Args:
+            session_id: Identificador da sessão de chat
+            key: Alvo da conexão e schemas selecionados
+            fingerprint_fn: Função sem argumentos que retorna (impressão digital atual, estado
+                            usado no cálculo)
+            loader: Função loader(estado) que monta o contexto, reaproveitando o estado
+                    calculado por fingerprint_fn
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry and entry['key'] == key:
+                entry['used_at'] = now
+                self._sessions.move_to_end(session_id)
+                if now - entry['checked_at'] < self.check_interval:
+                    return entry['context']
+                # Só esta requisição confere a impressão digital; as concorrentes usam o contexto atual
+                entry['checked_at'] = now
+            else:
+                entry = None
+
+        fingerprint, state = fingerprint_fn()
+        if entry and entry['fingerprint'] == fingerprint:
+            with self._lock:
+                entry['checked_at'] = now
+            return entry['context']
+
+        context = loader(state)
+        with self._lock:
+            self._sessions[session_id] = {
+                'key': key,
+                'fingerprint': fingerprint,
+                'context': context,
+                'checked_at': now,
+                'used_at': now
+            }
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return context
+
+dictionary_context_cache = DictionaryContextCache(DICTIONARY_CHECK_INTERVAL, DICTIONARY_SESSION_TTL, DICTIONARY_MAX_SESSIONS)
+
+def get_dictionary_context(session_id, selected_schemas):
+    """
+    Retorna o DictionaryContext do chat para os schemas selecionados.
+
+    Com session_id, usa o cache da sessão; sem ele, extrai e prepara a cada chamada.
+    """
+    def load_context(fingerprints=None):
+        return DictionaryContext(run_db(load_database_metadata, selected_schemas,
+                                        run_chunk=session_runner(wait=False), fingerprints=fingerprints))
+
+    if not session_id:
+        return load_context()
+
+    return dictionary_context_cache.get(
+        session_id,
+        (get_session_database().target, tuple(sorted(set(selected_schemas)))),
+        lambda: run_db(get_dictionary_fingerprint, selected_schemas),
+        load_context
+    )
+
+class ChatResponseCache:
+    """
+    Cache local (SQLite) das respostas do chat do dicionário de dados.
+
+    A chave é um hash do modelo/parâmetros, do prompt de sistema renderizado, do
+    histórico e da mensagem, então a mesma pergunta sobre o mesmo contexto não
+    gera uma nova chamada paga. Entradas vencem após `ttl` segundos; além de
+    `max_entries`, as menos usadas recentemente são removidas. Falhas de leitura
+    ou escrita são registradas e tratadas como cache vazio.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        """Abre o arquivo SQLite, criando diretório e tabela na primeira vez"""
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10)
+            if not self._initialized:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS chat_responses (
+                        key TEXT PRIMARY KEY,
+                        message TEXT NOT NULL,
+                        model TEXT,
+                        created_at REAL NOT NULL,
+                        used_at REAL NOT NULL
+                    )
+                """)
+                db.execute("CREATE INDEX IF NOT EXISTS chat_responses_used_at ON chat_responses (used_at)")
+                self._initialized = True
+            return db
+
+    @staticmethod
+    def make_key(messages):
+        """Hash das mensagens (sistema, histórico e pergunta) e dos parâmetros do modelo"""
+        payload = json.dumps([GROK_CHAT_OPTIONS, messages], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Returns:
+            dict: {'message', 'model'} da resposta em cache, ou None
+        """
+        db = None
+        try:
+            db = self._connect()
+            now = time.time()
+            with db:
+                row = db.execute(
+                    "SELECT message, model FROM chat_responses WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    db.execute("UPDATE chat_responses SET used_at = ? WHERE key = ?", (now, key))
+            return {'message': row[0], 'model': row[1]} if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao ler cache de respostas do chat: {e}")
+            return None
+        finally:
+            if db:
+                db.close()
+
+    def put(self, key, message, model):
+        """Grava a resposta e remove as entradas vencidas e as excedentes (LRU)"""
+        db = None
+        try:
+            db = self._connect()
+            now = time.time()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO chat_responses VALUES (?, ?, ?, ?, ?)",
+                    (key, message, model, now, now)
+                )
+                db.execute("DELETE FROM chat_responses WHERE created_at <= ?", (now - self.ttl,))
+                db.execute("""
+                    DELETE FROM chat_responses WHERE key IN (
+                        SELECT key FROM chat_responses ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar cache de respostas do chat: {e}")
+        finally:
+            if db:
+                db.close()
+
+chat_response_cache = ChatResponseCache(
+    os.path.join(METADATA_CACHE_DIR, 'chat_responses.sqlite3'), CHAT_CACHE_TTL, CHAT_CACHE_MAX_ENTRIES
+) if METADATA_CACHE_DIR and CHAT_CACHE_TTL > 0 else None
+
+# Uso de tokens informado quando a resposta vem do cache (nenhuma chamada à API)
+CACHED_USAGE = {'input_tokens': 0, 'output_tokens': 0, 'cached': True}
+
+# Parâmetros da chamada em streaming ao Grok (o uso de tokens chega no último chunk)
+CHAT_STREAM_OPTIONS = {'stream': True, 'stream_options': {'include_usage': True}, **GROK_CHAT_OPTIONS}
+
+def format_usage(usage):
+    """Uso de tokens de uma resposta da API no formato devolvido ao navegador"""
+    return {
+        'input_tokens': usage.prompt_tokens,
+        'output_tokens': usage.completion_tokens,
+        'cached': False
+    }
+
+def complete_chat(response, cache_key=None):
+    """
+    Converte a resposta (sem streaming) da API no JSON devolvido ao navegador.
+
+    Com cache_key, grava a resposta no cache de respostas (acesso a disco: no
+    modo ASGI roda em uma thread).
+    """
+    assistant_message = response.choices[0].message.content
+    if cache_key:
+        chat_response_cache.put(cache_key, assistant_message, response.model)
+
+    return {
+        'message': assistant_message,
+        'model': response.model,
+        'usage': format_usage(response.usage)
+    }
+
+class RequestError(Exception):
+    """Requisição inválida; respondida com a mensagem e o status HTTP informados"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def prepare_chat(data):
+    """
+    Valida a requisição de chat e monta as mensagens para o Grok.
+
+    O prompt de sistema traz as tabelas mais relevantes à pergunta (e à anterior)
+    dentro do orçamento de tokens. Compartilhado pelo servidor Flask e pelo modo
+    ASGI (asgi.py), onde roda em uma thread por acessar o banco.
+
+    Returns:
+        tuple: (messages, cache_key, cached); cached é a resposta em cache ou None
+
+    Raises:
+        RequestError: Mensagem vazia ou nenhum schema selecionado
+    """
+    user_message = data.get('message', '').strip()
+    selected_schemas = data.get('schemas', [])
+    conversation_history = data.get('history', [])
+    session_id = data.get('session_id')
+
+    if not user_message:
+        raise RequestError('Mensagem vazia')
+
+    if not selected_schemas:
+        raise RequestError('Nenhum schema selecionado')
+
+    previous_questions = [msg['content'] for msg in conversation_history if msg.get('role') == 'user'][-1:]
+    context = get_dictionary_context(session_id, selected_schemas).render(
+        '\n'.join(previous_questions + [user_message]),
+        DICTIONARY_CONTEXT_TOKENS
+    )
+
+    # Monta histórico de mensagens no formato OpenAI
+    messages = [
+        {"role": "system", "content": context}
+    ]
+
+    # Adiciona histórico de conversação se houver
+    for msg in conversation_history:
+        messages.append({
+            "role": msg['role'],
+            "content": msg['content']
+        })
+
+    # Adiciona mensagem atual do usuário
+    messages.append({
+        "role": "user",
+        "content": user_message
+    })
+
+    # Mesma pergunta sobre o mesmo contexto e histórico: responde do cache
+    cache_key = ChatResponseCache.make_key(messages) if chat_response_cache else None
+    cached = chat_response_cache.get(cache_key) if cache_key else None
+    return messages, cache_key, cached
+
+def cached_chat_events(cached):
+    """Eventos SSE de uma resposta vinda do cache"""
+    return [
+        format_sse('delta', {'content': cached['message']}),
+        format_sse('done', {**cached, 'usage': CACHED_USAGE})
+    ]
+
+def format_sse(event, payload):
+    """Formata um server-sent event com payload JSON"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+class ChatStream:
+    """
+    Acumula uma resposta do Grok em streaming e monta os server-sent events.
+
+    Compartilhado pelo servidor Flask (stream_chat_completion) e pelo modo ASGI
+    (asgi.py), que só mudam a forma de ler os chunks da API.
+
+    Eventos gerados:
+        delta  {"content": "..."}                    trecho da resposta
+        done   {"message", "model", "usage"}         resposta completa e uso de tokens
+        error  {"error": "..."}                      falha durante a geração
+    """
+
+    def __init__(self, cache_key=None):
+        """
+        Args:
+            cache_key: Chave do cache de respostas (ChatResponseCache.make_key); se informada,
+                       a resposta completa é gravada no cache em finish()
+        """
+        self.cache_key = cache_key
+        self.parts = []
+        self.model = None
+        self.usage = None
+
+    def feed(self, chunk):
+        """Registra um chunk da API; retorna o evento delta, ou None se o chunk não traz texto"""
+        self.model = chunk.model or self.model
+        # O uso de tokens chega no último chunk, sem choices
+        if chunk.usage:
+            self.usage = format_usage(chunk.usage)
+        if chunk.choices and chunk.choices[0].delta.content:
+            self.parts.append(chunk.choices[0].delta.content)
+            return format_sse('delta', {'content': chunk.choices[0].delta.content})
+        return None
+
+    def finish(self):
+        """Grava a resposta no cache (acesso a disco) e retorna o evento done"""
+        message = ''.join(self.parts)
+        if self.cache_key:
+            chat_response_cache.put(self.cache_key, message, self.model)
+        return format_sse('done', {'message': message, 'model': self.model, 'usage': self.usage})
+
+    def fail(self, error):
+        """Registra a falha e retorna o evento error"""
+        logger.error(f"Erro no streaming do chat: {error}")
+        return format_sse('error', {'error': str(error)})
+
+def stream_chat_completion(messages, cache_key=None):
+    """
+    Chama o Grok em modo streaming e repassa a resposta como server-sent events (ver ChatStream).
+
+    Args:
+        messages: Mensagens no formato OpenAI (sistema, histórico e pergunta)
+        cache_key: Chave do cache de respostas (ChatResponseCache.make_key)
+
+    Yields:
+        str: Eventos SSE
+    """
+    chat = ChatStream(cache_key)
+    stream = None
+    try:
+        stream = grok_client.get().chat.completions.create(messages=messages, **CHAT_STREAM_OPTIONS)
+        for chunk in stream:
+            event = chat.feed(chunk)
+            if event:
+                yield event
+        yield chat.finish()
+    except Exception as e:
+        yield chat.fail(e)
+    finally:
+        # Cliente desconectado no meio da resposta: encerra a conexão com a API
+        if stream is not None:
+            stream.close()
+
+def list_schema_tables(conn):
+    """Lista as tabelas de cada schema (exceto partições numeradas) para a árvore da interface"""
+    cursor = None
+    try:
+        cursor = conn.cursor()
+
+        schemas = {}
+        for _, schema, table in fetch_catalog_tables(cursor):
+            if PARTITION_NAME_PATTERN.search(table):
+                continue
+            if schema not in schemas:
+                schemas[schema] = []
+            schemas[schema].append(table)
+
+        return schemas
+    finally:
+        if cursor:
+            cursor.close()
+
+def render_table_ddl(schema_name, table_name, columns, primary_keys):
+    """Monta o CREATE TABLE exibido no painel de detalhes
+
+    Args:
+        schema_name: Nome do schema
+        table_name: Nome da tabela
+        columns: Lista de CatalogColumn da tabela
+        primary_keys: Lista de colunas da chave primária
+    """
+    ddl = f"CREATE TABLE {schema_name}.{table_name} (\n"
+    col_defs = []
+
+    for col in columns:
+        col_def = f"  {col.column_name} {col.data_type.upper()}"
+
+        if col.character_maximum_length:
+            col_def += f"({col.character_maximum_length})"
+        elif col.numeric_precision:
+            if col.numeric_scale:
+                col_def += f"({col.numeric_precision},{col.numeric_scale})"
+            else:
+                col_def += f"({col.numeric_precision})"
+
+        if col.is_nullable == 'NO':
+            col_def += " NOT NULL"
+
+        if col.column_default:
+            col_def += f" DEFAULT {col.column_default}"
+
+        col_defs.append(col_def)
+
+    if primary_keys:
+        pk_str = ", ".join(primary_keys)
+        col_defs.append(f"  PRIMARY KEY ({pk_str})")
+
+    ddl += ",\n".join(col_defs)
+    ddl += "\n);"
+    return ddl
+
+def describe_table(conn, schema_name, table_name):
+    """Retorna banco, FDW e DDL de uma tabela para o painel de detalhes"""
+    details = describe_tables(conn, [{'schema': schema_name, 'table': table_name}])
+    table = details['tables'][0]
+    return {
+        'database': details['database'],
+        'schema': schema_name,
+        'table': table_name,
+        'fdw': table['fdw'],
+        'ddl': table['ddl']
+    }
+
+def describe_tables(conn, tables):
+    """
+    Retorna banco, FDW e DDL de várias tabelas, na ordem recebida.
+
+    Todas as tabelas são resolvidas de uma vez: uma consulta de relações (pares
+    schema/tabela via unnest), uma de colunas e uma de chaves primárias,
+    independentemente da quantidade selecionada. O DDL é montado em memória.
+
+    Args:
+        conn: Conexão PostgreSQL
+        tables: Lista de {schema: 'nome', table: 'nome'}
+
+    Returns:
+        dict: {'database': nome do banco, 'tables': [{schema, table, fdw, ddl}]}
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+
+        # Busca o nome do banco de dados
+        cursor.execute("SELECT current_database()")
+        database_name = cursor.fetchone()[0]
+
+        # Resolve todas as tabelas no catálogo (oid e tipo da relação)
+        relations = fetch_catalog_relations(cursor, tables)
+        for table_info in tables:
+            if (table_info['schema'], table_info['table']) not in relations:
+                raise ValueError(f"Tabela não encontrada: {table_info['schema']}.{table_info['table']}")
+
+        # Busca colunas e chaves primárias de todas as tabelas
+        table_oids = list({table_oid for table_oid, _ in relations.values()})
+        columns = fetch_catalog_columns(cursor, table_oids)
+        primary_keys = fetch_catalog_primary_keys(cursor, table_oids)
+
+        result_tables = []
+        for table_info in tables:
+            schema_name = table_info['schema']
+            table_name = table_info['table']
+            table_oid, relkind = relations[(schema_name, table_name)]
+
+            result_tables.append({
+                'schema': schema_name,
+                'table': table_name,
+                'fdw': 'Sim' if relkind == 'f' else 'Não',
+                'ddl': render_table_ddl(schema_name, table_name,
+                                        columns.get(table_oid, []),
+                                        primary_keys.get(table_oid, []))
+            })
+
+        return {
+            'database': database_name,
+            'tables': result_tables
+        }
+    finally:
+        if cursor:
+            cursor.close()
+
+def stream_table_details(tables, cursor, page_size, session_id):
+    """
+    Gera os detalhes de uma página de tabelas em NDJSON, uma tabela por linha.
+
+    A página é processada em lotes de DETAILS_CHUNK_SIZE tabelas (cada lote com
+    as consultas em bloco de describe_tables), de modo que as primeiras linhas
+    saem antes de a página inteira ser consultada. A conexão só fica presa
+    durante cada lote, não enquanto o cliente lê a resposta.
+
+    Linhas geradas:
+        {"database": ..., "total": ..., "cursor": ...}  cabeçalho
+        {"table": {schema, table, fdw, ddl}}            uma por tabela
+        {"next_cursor": n | null}                       fim da página
+        {"error": "..."}                                falha no meio do stream
+
+    Args:
+        tables: Lista completa de {schema: 'nome', table: 'nome'} selecionadas
+        cursor: Posição da primeira tabela da página na lista
+        page_size: Quantidade máxima de tabelas na página
+        session_id: Sessão do navegador (o gerador roda depois que a view retorna)
+
+    Yields:
+        str: Linhas JSON terminadas em quebra de linha
+    """
+    page = tables[cursor:cursor + page_size]
+    header_sent = False
+    try:
+        for start in range(0, len(page), DETAILS_CHUNK_SIZE):
+            details = run_session_db(session_id, describe_tables, page[start:start + DETAILS_CHUNK_SIZE])
+
+            if not header_sent:
+                yield json.dumps({'database': details['database'], 'total': len(tables), 'cursor': cursor}) + '\n'
+                header_sent = True
+
+            for table in details['tables']:
+                yield json.dumps({'table': table}) + '\n'
+
+        next_cursor = cursor + len(page)
+        yield json.dumps({'next_cursor': next_cursor if next_cursor < len(tables) else None}) + '\n'
+    except Exception as e:
+        logger.error(f"Erro no streaming de detalhes das tabelas: {e}")
+        yield json.dumps({'error': str(e)}) + '\n'
+
+# Tabelas com sufixo numérico (partições/cópias) ficam fora da árvore e da busca
+PARTITION_NAME_PATTERN = re.compile(r'(_p|p_|_)[0-9]+\Z')
+
+class TableSearchIndex:
+    """
+    Índice em memória dos nomes de schemas e tabelas para a busca da interface.
+
+    Guarda um índice de trigramas sobre os nomes das tabelas (em minúsculas),
+    de modo que buscas exatas, por prefixo ou por trecho sejam respondidas sem
+    consultar o banco. As tabelas ficam na ordem recebida (a do ORDER BY da
+    consulta, com a collation do banco).
+    """
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: Tuplas (schema, tabela) de pg_namespace/pg_class, ordenadas por
+                  schema e tabela; tabela é None para schemas sem tabelas
+        """
+        self.table_counts = {}
+        self.entries = []
+        self._by_name = {}
+        self._by_schema = {}
+        self._exact = set()
+        self._trigrams = {}
+
+        for schema_name, table_name in rows:
+            self.table_counts.setdefault(schema_name, 0)
+            if table_name is None:
+                continue
+            self.table_counts[schema_name] += 1
+
+            if schema_name in ('pg_catalog', 'information_schema') or PARTITION_NAME_PATTERN.search(table_name):
+                continue
+
+            entry_id = len(self.entries)
+            self.entries.append((schema_name, table_name))
+            self._by_name.setdefault(table_name, []).append(entry_id)
+            self._by_schema.setdefault(schema_name, []).append(entry_id)
+            self._exact.add((schema_name, table_name))
+            for trigram in self._split_trigrams(table_name.lower()):
+                self._trigrams.setdefault(trigram, set()).add(entry_id)
+
+    @staticmethod
+    def _split_trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def _compile_like(like_pattern):
+        """
+        Converte um padrão ILIKE em regex, com as regras do LIKE: % é qualquer
+        sequência, _ é qualquer caractere e \\ escapa o seguinte.
+
+        Returns:
+            tuple: (regex para fullmatch do nome em minúsculas, trechos literais entre os curingas)
+        """
+        parts = []
+        literals = ['']
+        chars = iter(like_pattern.lower())
+        for char in chars:
+            if char == '%':
+                parts.append('.*')
+                literals.append('')
+            elif char == '_':
+                parts.append('.')
+                literals.append('')
+            else:
+                if char == '\\':
+                    char = next(chars, '')
+                parts.append(re.escape(char))
+                literals[-1] += char
+        return re.compile(''.join(parts), re.DOTALL), literals
+
+    def has_table(self, schema_name, table_name):
+        """Verifica se a tabela existe (comparação exata)"""
+        return (schema_name, table_name) in self._exact
+
+    def find_by_name(self, table_name):
+        """Tabelas com exatamente este nome, em qualquer schema"""
+        return [self.entries[entry_id] for entry_id in self._by_name.get(table_name, [])]
+
+    def find_by_fragment(self, fragment, schema_name=None, limit=None):
+        """
+        Tabelas cujo nome contém o trecho (sem diferenciar maiúsculas), como ILIKE '%trecho%'.
+
+        Os curingas do LIKE no trecho (% e _) valem como no banco; os trigramas dos
+        trechos literais só filtram os candidatos antes da comparação.
+
+        Args:
+            fragment: Trecho a procurar no nome da tabela
+            schema_name: Se informado, restringe a busca a este schema
+            limit: Número máximo de resultados
+        """
+        pattern, literals = self._compile_like(f'%{fragment}%')
+
+        if schema_name is not None:
+            candidates = self._by_schema.get(schema_name, [])
+        else:
+            candidates = range(len(self.entries))
+
+        trigrams = set().union(*(self._split_trigrams(literal) for literal in literals))
+        if trigrams:
+            postings = sorted((self._trigrams.get(trigram, set()) for trigram in trigrams), key=len)
+            matches = set.intersection(*postings)
+            candidates = sorted(matches.intersection(candidates))
+
+        results = []
+        for entry_id in candidates:
+            schema, table = self.entries[entry_id]
+            if pattern.fullmatch(table.lower()):
+                results.append((schema, table))
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+def load_table_search_index(conn):
+    """Monta o TableSearchIndex com uma única consulta ao pg_catalog"""
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        # Schemas visíveis em information_schema.schemata, com as tabelas de information_schema.tables
+        cursor.execute(f"""
+            SELECT n.nspname, c.relname
+            FROM pg_namespace n
+            LEFT JOIN pg_class c ON c.relnamespace = n.oid AND {CATALOG_TABLE_FILTER}
+            WHERE pg_has_role(n.nspowner, 'USAGE') OR has_schema_privilege(n.oid, 'CREATE, USAGE')
+            ORDER BY n.nspname, c.relname
+        """)
+        return TableSearchIndex(cursor.fetchall())
+    finally:
+        if cursor:
+            cursor.close()
+
+def get_cached_search_index():
+    """Retorna o índice de busca do alvo atual, reconstruído quando o catálogo muda"""
+    index, _ = catalog_cache.get(
+        (get_session_database().target, 'search_index'),
+        lambda: run_db(get_catalog_fingerprint),
+        lambda: run_db(load_table_search_index)
+    )
+    return index
+
+def search_catalog(index, query):
+    """Busca por schema ou tabela (exata ou parcial) no índice e retorna o resultado para a interface"""
+    result_data = {
+        'schema_found': False,
+        'tables': []
+    }
+
+    # Verifica se a query contém ponto (schema.tabela)
+    if '.' in query:
+        parts = query.split('.')
+        schema_name = parts[0].strip()
+        table_name = parts[1].strip()
+
+        # Busca exata
+        if index.has_table(schema_name, table_name):
+            matches = [(schema_name, table_name)]
+        else:
+            # Busca parcial no schema especificado
+            matches = index.find_by_fragment(table_name, schema_name=schema_name)
+    else:
+        # Primeiro tenta como schema
+        if query in index.table_counts:
+            result_data['schema_found'] = True
+            result_data['schema'] = query
+            result_data['table_count'] = index.table_counts[query]
+
+        # Busca exata de tabelas em todos os schemas
+        matches = index.find_by_name(query)
+
+        # Se não encontrou nada exato, busca parcial
+        if not result_data['schema_found'] and len(matches) == 0:
+            matches = index.find_by_fragment(query, limit=50)
+
+    for schema, table in matches:
+        result_data['tables'].append({
+            'schema': schema,
+            'table': table
+        })
+
+    return result_data
+
+# Introspection query padrão do GraphQL
+GRAPHQL_INTROSPECTION_QUERY = """
+query IntrospectionQuery {
+    __schema {
+        queryType { name }
+        mutationType { name }
+        subscriptionType { name }
+        types {
+            name
+            kind
+            description
+            fields(includeDeprecated: false) {
+                name
+                description
+                args {
+                    name
+                    description
+                    type {
+                        name
+                        kind
+                        ofType {
+                            name
+                            kind
+                            ofType {
+                                name
+                                kind
+                                ofType {
+                                    name
+                                    kind
+                                }
+                            }
+                        }
+                    }
+                }
+                type {
+                    name
+                    kind
+                    ofType {
+                        name
+                        kind
+                        ofType {
+                            name
+                            kind
+                            ofType {
+                                name
+                                kind
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+def parse_graphql_introspection(introspection_data):
+    """
+    Extrai queries, mutations e subscriptions do resultado de uma introspection GraphQL.
+
+    Compartilhado pelo servidor Flask e pelo modo ASGI (asgi.py).
+
+    Returns:
+        dict: {'queries', 'mutations', 'subscriptions'}
+
+    Raises:
+        RequestError: Introspection com erros ou schema vazio
+    """
+    if 'errors' in introspection_data:
+        errors = introspection_data['errors']
+        error_messages = [err.get('message', str(err)) for err in errors]
+        raise RequestError(f'Erro na introspection: {", ".join(error_messages)}')
+
+    schema_data = introspection_data.get('data', {}).get('__schema', {})
+
+    if not schema_data:
+        raise RequestError('Schema vazio ou inválido')
+
+    # Extrai os tipos Query, Mutation e Subscription
+    query_type_name = schema_data.get('queryType', {}).get('name') if schema_data.get('queryType') else None
+    mutation_type_name = schema_data.get('mutationType', {}).get('name') if schema_data.get('mutationType') else None
+    subscription_type_name = schema_data.get('subscriptionType', {}).get('name') if schema_data.get('subscriptionType') else None
+
+    types = schema_data.get('types', [])
+
+    def format_type(type_obj):
+        """Formata recursivamente um tipo GraphQL para string legível"""
+        if not type_obj:
+            return 'Unknown'
+
+        kind = type_obj.get('kind')
+        name = type_obj.get('name')
+        of_type = type_obj.get('ofType')
+
+        if kind == 'NON_NULL':
+            return f'{format_type(of_type)}!'
+        elif kind == 'LIST':
+            return f'[{format_type(of_type)}]'
+        elif name:
+            return name
+        elif of_type:
+            return format_type(of_type)
+        else:
+            return 'Unknown'
+
+    def extract_fields(type_name):
+        """Extrai campos de um tipo específico"""
+        if not type_name:
+            return []
+
+        for t in types:
+            if t.get('name') == type_name:
+                fields = t.get('fields', [])
+                result = []
+                for field in fields:
+                    args = []
+                    for arg in field.get('args', []):
+                        args.append({
+                            'name': arg.get('name'),
+                            'type': format_type(arg.get('type')),
+                            'description': arg.get('description')
+                        })
+
+                    result.append({
+                        'name': field.get('name'),
+                        'description': field.get('description'),
+                        'type': format_type(field.get('type')),
+                        'args': args
+                    })
+                return result
+        return []
+
+    queries = extract_fields(query_type_name)
+    mutations = extract_fields(mutation_type_name)
+    subscriptions = extract_fields(subscription_type_name)
+
+    return {
+        'queries': queries,
+        'mutations': mutations,
+        'subscriptions': subscriptions
+    }
+
+@app.route('/')
 def index():
     config = load_config()
     return render_template_string(HTML_TEMPLATE,
@@ -1746,9 +3510,13 @@ def index():
                                    user=config.get('user', 'postgres'),
                                    password=config.get('password', ''))
 
+@app.before_request
+def bind_db_session():
+    """Associa a requisição à sessão do navegador (cookie), que define o banco e o pool usados"""
+    db_session_id.set(request.cookies.get(DB_SESSION_COOKIE))
+
 @app.route('/connect', methods=['POST'])
 def connect():
-    global connection_pool
     try:
         params = request.json
         logger.info(f"Tentando conectar com: host={params['host']}, port={params['port']}, database={params['database']}, user={params['user']}")
@@ -1757,34 +3525,15 @@ def connect():
         if not all([params.get('host'), params.get('port'), params.get('database'), params.get('user')]):
             return jsonify({'success': False, 'error': 'Parâmetros incompletos'})
         
-        # Fecha pool anterior se existir
-        if connection_pool:
-            try:
-                connection_pool.closeall()
-            except:
-                pass
-        
-        # Cria novo pool de conexões
-        connection_pool = psycopg2.pool.SimpleConnectionPool(
-            1, 5,  # min e max conexões
-            host=params['host'],
-            port=int(params['port']),
-            database=params['database'],
-            user=params['user'],
-            password=params['password']
-        )
-        
-        # Testa a conexão
-        conn = connection_pool.getconn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT version()")
-        version = cursor.fetchone()
-        logger.info(f"Conectado ao PostgreSQL: {version[0]}")
-        cursor.close()
-        connection_pool.putconn(conn)
-        
+        # Sessão do navegador: trocar de banco aqui não fecha os pools usados por outras sessões
+        session_id = request.cookies.get(DB_SESSION_COOKIE) or secrets.token_urlsafe(32)
+        version = pool_registry.connect(session_id, params)
+        logger.info(f"Conectado ao PostgreSQL: {version}")
+
         save_config(params)
-        return jsonify({'success': True, 'message': 'Conexão estabelecida com sucesso'})
+        response = jsonify({'success': True, 'message': 'Conexão estabelecida com sucesso'})
+        response.set_cookie(DB_SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        return response
         
     except psycopg2.OperationalError as e:
         logger.error(f"Erro operacional do PostgreSQL: {e}")
@@ -1793,148 +3542,43 @@ def connect():
         logger.error(f"Erro ao conectar: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/pool-stats')
+def pool_stats():
+    """Retorna estatísticas do pool da sessão (em uso, ociosas, esperas) e do registro de pools"""
+    try:
+        return jsonify({**get_session_database().pool.stats(), 'registry': pool_registry.stats()})
+    except NotConnectedError as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/schemas')
 def get_schemas():
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        cursor = conn.cursor()
+        schemas, fingerprint = get_cached_schema_tables()
 
-        cursor.execute("""
-            SELECT
-                table_schema,
-                table_name
-            FROM information_schema.tables
-            WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-              AND table_type = 'BASE TABLE'
-              AND table_name !~ '(_p|p_|_)[0-9]+$'
-            ORDER BY table_schema, table_name
-        """)
-
-        results = cursor.fetchall()
-        schemas = {}
-
-        for schema, table in results:
-            if schema not in schemas:
-                schemas[schema] = []
-            schemas[schema].append(table)
-
-        cursor.close()
-        return_db_connection(conn)
-
-        return jsonify(schemas)
+        # ETag derivado do catálogo: o navegador recebe 304 quando nada mudou
+        response = jsonify(schemas)
+        response.set_etag(hashlib.md5(f"{get_session_database().target}|{fingerprint}".encode('utf-8')).hexdigest())
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Erro ao buscar schemas: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/table-details', methods=['POST'])
 def table_details():
-    conn = None
     try:
         data = request.json
         schema_name = data['schema']
         table_name = data['table']
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        cursor = conn.cursor()
-
-        # Busca o nome do banco de dados
-        cursor.execute("SELECT current_database()")
-        database_name = cursor.fetchone()[0]
-
-        # Verifica se é Foreign Data Wrapper
-        cursor.execute("""
-            SELECT c.relkind
-            FROM pg_class c
-            JOIN pg_namespace n ON n.oid = c.relnamespace
-            WHERE n.nspname = %s AND c.relname = %s
-        """, (schema_name, table_name))
-
-        result = cursor.fetchone()
-        is_fdw = 'Sim' if result and result[0] == 'f' else 'Não'
-
-        # Gera DDL da tabela
-        cursor.execute("""
-            SELECT
-                column_name,
-                data_type,
-                character_maximum_length,
-                numeric_precision,
-                numeric_scale,
-                is_nullable,
-                column_default
-            FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position
-        """, (schema_name, table_name))
-
-        columns = cursor.fetchall()
-
-        # Busca constraints (chave primária)
-        cursor.execute("""
-            SELECT a.attname
-            FROM pg_index i
-            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-            WHERE i.indrelid = %s::regclass AND i.indisprimary
-        """, (f'{schema_name}.{table_name}',))
-
-        primary_keys = [row[0] for row in cursor.fetchall()]
-
-        # Gera DDL
-        ddl = f"CREATE TABLE {schema_name}.{table_name} (\n"
-        col_defs = []
-
-        for col_name, data_type, char_len, num_prec, num_scale, is_nullable, col_default in columns:
-            col_def = f"  {col_name} {data_type.upper()}"
-
-            if char_len:
-                col_def += f"({char_len})"
-            elif num_prec:
-                if num_scale:
-                    col_def += f"({num_prec},{num_scale})"
-                else:
-                    col_def += f"({num_prec})"
-
-            if is_nullable == 'NO':
-                col_def += " NOT NULL"
-
-            if col_default:
-                col_def += f" DEFAULT {col_default}"
-
-            col_defs.append(col_def)
-
-        if primary_keys:
-            pk_str = ", ".join(primary_keys)
-            col_defs.append(f"  PRIMARY KEY ({pk_str})")
-
-        ddl += ",\n".join(col_defs)
-        ddl += "\n);"
-
-        cursor.close()
-
-        return jsonify({
-            'database': database_name,
-            'schema': schema_name,
-            'table': table_name,
-            'fdw': is_fdw,
-            'ddl': ddl
-        })
+        return jsonify(run_db(describe_table, schema_name, table_name))
     except Exception as e:
         logger.error(f"Erro ao buscar detalhes da tabela: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/multiple-table-details', methods=['POST'])
 def multiple_table_details():
     """Retorna detalhes de múltiplas tabelas selecionadas"""
-    conn = None
     try:
         data = request.json
         tables = data.get('tables', [])  # Lista de {schema: 'nome', table: 'nome'}
@@ -1942,114 +3586,47 @@ def multiple_table_details():
         if not tables:
             return jsonify({'error': 'Nenhuma tabela selecionada'}), 400
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        cursor = conn.cursor()
-
-        # Busca o nome do banco de dados
-        cursor.execute("SELECT current_database()")
-        database_name = cursor.fetchone()[0]
-
-        result_tables = []
-
-        for table_info in tables:
-            schema_name = table_info['schema']
-            table_name = table_info['table']
+        return jsonify(run_db(describe_tables, tables))
+    except Exception as e:
+        logger.error(f"Erro ao buscar detalhes de múltiplas tabelas: {e}")
+        return jsonify({'error': str(e)}), 500
 
-            # Verifica se é Foreign Data Wrapper
-            cursor.execute("""
-                SELECT c.relkind
-                FROM pg_class c
-                JOIN pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname = %s AND c.relname = %s
-            """, (schema_name, table_name))
-
-            result = cursor.fetchone()
-            is_fdw = 'Sim' if result and result[0] == 'f' else 'Não'
-
-            # Busca colunas da tabela
-            cursor.execute("""
-                SELECT
-                    column_name,
-                    data_type,
-                    character_maximum_length,
-                    numeric_precision,
-                    numeric_scale,
-                    is_nullable,
-                    column_default
-                FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-                ORDER BY ordinal_position
-            """, (schema_name, table_name))
-
-            columns = cursor.fetchall()
-
-            # Busca constraints (chave primária)
-            cursor.execute("""
-                SELECT a.attname
-                FROM pg_index i
-                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                WHERE i.indrelid = %s::regclass AND i.indisprimary
-            """, (f'{schema_name}.{table_name}',))
-
-            primary_keys = [row[0] for row in cursor.fetchall()]
-
-            # Gera DDL
-            ddl = f"CREATE TABLE {schema_name}.{table_name} (\n"
-            col_defs = []
-
-            for col_name, data_type, char_len, num_prec, num_scale, is_nullable, col_default in columns:
-                col_def = f"  {col_name} {data_type.upper()}"
-
-                if char_len:
-                    col_def += f"({char_len})"
-                elif num_prec:
-                    if num_scale:
-                        col_def += f"({num_prec},{num_scale})"
-                    else:
-                        col_def += f"({num_prec})"
-
-                if is_nullable == 'NO':
-                    col_def += " NOT NULL"
-
-                if col_default:
-                    col_def += f" DEFAULT {col_default}"
-
-                col_defs.append(col_def)
-
-            if primary_keys:
-                pk_str = ", ".join(primary_keys)
-                col_defs.append(f"  PRIMARY KEY ({pk_str})")
-
-            ddl += ",\n".join(col_defs)
-            ddl += "\n);"
+@app.route('/multiple-table-details/stream', methods=['POST'])
+def multiple_table_details_stream():
+    """
+    Retorna detalhes de múltiplas tabelas em NDJSON, paginado por cursor.
 
-            result_tables.append({
-                'schema': schema_name,
-                'table': table_name,
-                'fdw': is_fdw,
-                'ddl': ddl
-            })
+    Corpo: {tables: [...], cursor: 0, page_size: DETAILS_PAGE_SIZE}. A última
+    linha traz next_cursor, que o cliente reenvia para buscar a próxima página.
+    """
+    try:
+        data = request.json
+        tables = data.get('tables', [])  # Lista de {schema: 'nome', table: 'nome'}
 
-        cursor.close()
+        if not tables:
+            return jsonify({'error': 'Nenhuma tabela selecionada'}), 400
 
-        return jsonify({
-            'database': database_name,
-            'tables': result_tables
-        })
+        try:
+            cursor = int(data.get('cursor') or 0)
+            page_size = int(data.get('page_size') or DETAILS_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'cursor e page_size devem ser inteiros'}), 400
+
+        if cursor < 0 or cursor >= len(tables) or page_size < 1:
+            return jsonify({'error': 'cursor ou page_size inválido'}), 400
+
+        return Response(
+            stream_table_details(tables, cursor, min(page_size, DETAILS_PAGE_SIZE), db_session_id.get()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
     except Exception as e:
         logger.error(f"Erro ao buscar detalhes de múltiplas tabelas: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/search', methods=['POST'])
 def search():
     """Busca por schema ou tabela no banco de dados (exata ou parcial)"""
-    conn = None
     try:
         data = request.json
         query = data.get('query', '').strip()
@@ -2057,227 +3634,46 @@ def search():
         if not query:
             return jsonify({'error': 'Query vazia'}), 400
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        cursor = conn.cursor()
-        result_data = {
-            'schema_found': False,
-            'tables': []
-        }
-
-        # Verifica se a query contém ponto (schema.tabela)
-        if '.' in query:
-            parts = query.split('.')
-            schema_name = parts[0].strip()
-            table_name = parts[1].strip()
-
-            # Busca exata
-            cursor.execute("""
-                SELECT table_schema, table_name
-                FROM information_schema.tables
-                WHERE table_schema = %s
-                  AND table_name = %s
-                  AND table_type = 'BASE TABLE'
-                  AND table_schema NOT IN ('pg_catalog', 'information_schema')
-                  AND table_name !~ '(_p|p_|_)[0-9]+$'
-            """, (schema_name, table_name))
-
-            exact_match = cursor.fetchone()
-
-            if exact_match:
-                result_data['tables'].append({
-                    'schema': exact_match[0],
-                    'table': exact_match[1]
-                })
-            else:
-                # Busca parcial no schema especificado
-                cursor.execute("""
-                    SELECT table_schema, table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = %s
-                      AND table_name ILIKE %s
-                      AND table_type = 'BASE TABLE'
-                      AND table_schema NOT IN ('pg_catalog', 'information_schema')
-                      AND table_name !~ '(_p|p_|_)[0-9]+$'
-                    ORDER BY table_name
-                """, (schema_name, f'%{table_name}%'))
-
-                for row in cursor.fetchall():
-                    result_data['tables'].append({
-                        'schema': row[0],
-                        'table': row[1]
-                    })
-        else:
-            # Primeiro tenta como schema
-            if schema_exists(conn, query):
-                cursor.execute("""
-                    SELECT COUNT(*)
-                    FROM information_schema.tables
-                    WHERE table_schema = %s
-                      AND table_type = 'BASE TABLE'
-                """, (query,))
-                table_count = cursor.fetchone()[0]
-
-                result_data['schema_found'] = True
-                result_data['schema'] = query
-                result_data['table_count'] = table_count
-
-            # Busca exata de tabelas em todos os schemas
-            cursor.execute("""
-                SELECT table_schema, table_name
-                FROM information_schema.tables
-                WHERE table_name = %s
-                  AND table_type = 'BASE TABLE'
-                  AND table_schema NOT IN ('pg_catalog', 'information_schema')
-                  AND table_name !~ '(_p|p_|_)[0-9]+$'
-                ORDER BY table_schema, table_name
-            """, (query,))
-
-            exact_matches = cursor.fetchall()
-            for row in exact_matches:
-                result_data['tables'].append({
-                    'schema': row[0],
-                    'table': row[1]
-                })
-
-            # Se não encontrou nada exato, busca parcial
-            if not result_data['schema_found'] and len(result_data['tables']) == 0:
-                cursor.execute("""
-                    SELECT table_schema, table_name
-                    FROM information_schema.tables
-                    WHERE table_name ILIKE %s
-                      AND table_type = 'BASE TABLE'
-                      AND table_schema NOT IN ('pg_catalog', 'information_schema')
-                      AND table_name !~ '(_p|p_|_)[0-9]+$'
-                    ORDER BY table_schema, table_name
-                    LIMIT 50
-                """, (f'%{query}%',))
-
-                for row in cursor.fetchall():
-                    result_data['tables'].append({
-                        'schema': row[0],
-                        'table': row[1]
-                    })
-
-        cursor.close()
-        return jsonify(result_data)
+        return jsonify(search_catalog(get_cached_search_index(), query))
 
     except Exception as e:
         logger.error(f"Erro na busca: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/generate', methods=['POST'])
 def generate():
-    conn = None
     try:
         data = request.json
         tables = data['tables']
         mode = data.get('mode', 'multiple')
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
+        # Resolve as tabelas e os ENUMs usados; colunas e chaves primárias são
+        # lidas em lotes durante o streaming, à medida que os models são renderizados
+        catalog = run_db(resolve_prisma_catalog, tables)
+        catalog['tables'] = iter_prisma_tables(catalog['tables'], session_runner(), session_runner(wait=False))
 
         if mode == 'single':
-            # Gera um único arquivo com todas as tabelas
-            prisma_content = "// Schema Prisma gerado automaticamente\n"
-            prisma_content += f"// Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-
-            # Primeiro passo: identificar todos os ENUMs usados nas tabelas selecionadas
-            all_used_enums = {}
-            for item in tables:
-                schema = item['schema']
-                table = item['table']
-
-                # Busca ENUMs do schema
-                schema_enums = get_schema_enums(conn, schema)
-
-                # Busca colunas da tabela para identificar quais enums são usados
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT data_type, udt_name
-                    FROM information_schema.columns
-                    WHERE table_schema = %s AND table_name = %s
-                """, (schema, table))
-
-                for data_type, udt_name in cursor.fetchall():
-                    if data_type.lower() == 'user-defined' and udt_name in schema_enums:
-                        # Usa chave única para evitar duplicação
-                        key = f"{schema}.{udt_name}"
-                        if key not in all_used_enums:
-                            all_used_enums[key] = (udt_name, schema_enums[udt_name])
-                            logger.debug(f"ENUM '{udt_name}' será incluído no schema único")
-                    elif data_type.lower() == 'user-defined':
-                        logger.debug(f"USER-DEFINED tipo '{udt_name}' em {schema}.{table} não encontrado nos enums: {list(schema_enums.keys())}")
-
-                cursor.close()
-
-            # Gera definições de ENUMs usados
-            if all_used_enums:
-                prisma_content += "// Definições de ENUMs\n"
-                for key in sorted(all_used_enums.keys()):
-                    enum_name, enum_values = all_used_enums[key]
-                    enum_prisma_name = ''.join(word.capitalize() for word in enum_name.split('_'))
-                    prisma_content += f'enum {enum_prisma_name} {{\n'
-                    for value in enum_values:
-                        prisma_content += f'  {value}\n'
-                    prisma_content += '}\n\n'
-
-            # Gera os models (sem incluir enums, já foram gerados acima)
-            prisma_content += "// Models\n"
-            for item in tables:
-                schema = item['schema']
-                table = item['table']
-                prisma_content += generate_prisma_schema(schema, table, conn, include_enums=False)
-                prisma_content += "\n"
-
-            # Retorna o arquivo único
-            buffer = io.BytesIO()
-            buffer.write(prisma_content.encode('utf-8'))
-            buffer.seek(0)
-
-            return send_file(
-                buffer,
+            # Envia o arquivo único em streaming: cabeçalho, ENUMs e cada model
+            return Response(
+                stream_prisma_file(catalog),
                 mimetype='text/plain',
-                as_attachment=True,
-                download_name='schema.prisma'
+                headers={'Content-Disposition': 'attachment; filename=schema.prisma'}
             )
         else:
-            # Cria um arquivo ZIP com múltiplos arquivos
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for item in tables:
-                    schema = item['schema']
-                    table = item['table']
-
-                    # No modo múltiplo, cada arquivo inclui seus próprios enums
-                    prisma_content = generate_prisma_schema(schema, table, conn, include_enums=True)
-                    filename_zip = f'{schema}_{table}.prisma'
-                    zip_file.writestr(filename_zip, prisma_content)
-
-            zip_buffer.seek(0)
-            return send_file(
-                zip_buffer,
+            # Envia o ZIP em streaming: cada arquivo sai assim que é renderizado
+            download_name = f'prisma-schemas-{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+            return Response(
+                stream_prisma_zip(catalog),
                 mimetype='application/zip',
-                as_attachment=True,
-                download_name=f'prisma-schemas-{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+                headers={'Content-Disposition': f'attachment; filename={download_name}'}
             )
     except Exception as e:
         logger.error(f"Erro ao gerar schemas: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/api/data-dictionary/metadata', methods=['POST'])
 def get_data_dictionary_metadata():
     """Obtém metadados completos dos schemas/tabelas selecionados"""
-    conn = None
     try:
         data = request.json
         selected_schemas = data.get('schemas', [])
@@ -2285,161 +3681,57 @@ def get_data_dictionary_metadata():
         if not selected_schemas:
             return jsonify({'error': 'Nenhum schema selecionado'}), 400
 
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        metadata = extract_database_metadata(conn, selected_schemas)
+        metadata = run_db(load_database_metadata, selected_schemas, run_chunk=session_runner(wait=False))
         return jsonify(metadata)
 
     except Exception as e:
         logger.error(f"Erro ao buscar metadados: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/api/data-dictionary/chat', methods=['POST'])
 def chat_data_dictionary():
     """Endpoint para chat com Grok sobre o dicionário de dados"""
-    conn = None
     try:
-        if not grok_client:
+        client = grok_client.get()
+        if not client:
             return jsonify({
                 'error': 'Serviço de IA não disponível. Configure XAI_API_KEY no arquivo .env'
             }), 503
 
         data = request.json
-        user_message = data.get('message', '').strip()
-        selected_schemas = data.get('schemas', [])
-        conversation_history = data.get('history', [])
-
-        if not user_message:
-            return jsonify({'error': 'Mensagem vazia'}), 400
-
-        if not selected_schemas:
-            return jsonify({'error': 'Nenhum schema selecionado'}), 400
-
-        # Obtém metadados do banco de dados
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Não conectado ao banco de dados'}), 500
-
-        metadata = extract_database_metadata(conn, selected_schemas)
+        messages, cache_key, cached = prepare_chat(data)
 
-        # Prepara contexto para o Grok
-        context = f"""Você é um especialista em bancos de dados PostgreSQL e está analisando o seguinte banco de dados:
-
-**Banco de Dados:** {metadata['database_name']}
-
-**Estrutura do Banco de Dados:**
-
-"""
-
-        # Adiciona informações detalhadas sobre cada schema/tabela
-        for schema_name, schema_data in metadata['schemas'].items():
-            context += f"\n### Schema: {schema_name}\n\n"
-
-            for table_name, table_data in schema_data['tables'].items():
-                context += f"#### Tabela: {table_name}\n\n"
-
-                # Colunas
-                context += "**Colunas:**\n"
-                for col in table_data['columns']:
-                    nullable = "NULL" if col['nullable'] else "NOT NULL"
-                    default = f", DEFAULT: {col['default']}" if col['default'] else ""
-                    context += f"- `{col['name']}` {col['type_detail']} {nullable}{default}\n"
-
-                # Chave primária
-                if table_data['primary_keys']:
-                    context += f"\n**Chave Primária:** {', '.join(table_data['primary_keys'])}\n"
-
-                # Chaves estrangeiras
-                if table_data['foreign_keys']:
-                    context += "\n**Chaves Estrangeiras:**\n"
-                    for fk in table_data['foreign_keys']:
-                        context += f"- `{fk['column']}` → `{fk['references_schema']}.{fk['references_table']}.{fk['references_column']}`\n"
-
-                # Índices
-                if table_data['indexes']:
-                    context += "\n**Índices:**\n"
-                    for idx in table_data['indexes']:
-                        unique = "UNIQUE" if idx['unique'] else ""
-                        context += f"- {idx['name']} {unique} ({', '.join(idx['columns'])})\n"
-
-                # Constraints
-                if table_data['constraints']:
-                    context += "\n**Constraints:**\n"
-                    for const in table_data['constraints']:
-                        cols = f"({', '.join(const['columns'])})" if const['columns'] else ""
-                        context += f"- {const['name']} ({const['type']}) {cols}\n"
-
-                context += "\n"
-
-        context += """
-
-**Sua tarefa é:**
-1. Analisar a estrutura do banco de dados acima
-2. Explicar o propósito e significado dos schemas, tabelas e campos
-3. Identificar e explicar os relacionamentos entre as tabelas
-4. Sugerir prováveis casos de uso e finalidades do banco de dados
-5. Responder perguntas do usuário sobre a estrutura do banco de dados
-
-**Diretrizes:**
-- Seja claro e didático nas explicações
-- Use exemplos quando apropriado
-- Identifique padrões de design (normalização, denormalização, etc)
-- Sugira melhorias quando relevante
-- Explique em português brasileiro
-"""
-
-        # Monta histórico de mensagens no formato OpenAI
-        messages = [
-            {"role": "system", "content": context}
-        ]
-
-        # Adiciona histórico de conversação se houver
-        for msg in conversation_history:
-            messages.append({
-                "role": msg['role'],
-                "content": msg['content']
-            })
+        # Modo streaming: repassa os tokens ao navegador como server-sent events
+        if data.get('stream'):
+            if cached:
+                events = cached_chat_events(cached)
+            else:
+                events = stream_chat_completion(messages, cache_key)
+            return Response(
+                events,
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
 
-        # Adiciona mensagem atual do usuário
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        if cached:
+            return jsonify({**cached, 'usage': CACHED_USAGE})
 
         # Chama a API do Grok (formato OpenAI)
-        response = grok_client.chat.completions.create(
-            model="grok-3",
-            messages=messages,
-            max_tokens=4096,
-            temperature=0.7
-        )
-
-        assistant_message = response.choices[0].message.content
-
-        return jsonify({
-            'message': assistant_message,
-            'model': response.model,
-            'usage': {
-                'input_tokens': response.usage.prompt_tokens,
-                'output_tokens': response.usage.completion_tokens
-            }
-        })
+        response = client.chat.completions.create(messages=messages, **GROK_CHAT_OPTIONS)
+        return jsonify(complete_chat(response, cache_key))
 
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         logger.error(f"Erro no chat: {e}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        if conn:
-            return_db_connection(conn)
 
 @app.route('/api/graphql/introspect', methods=['POST'])
 def introspect_graphql():
     """Faz introspection em um endpoint GraphQL e retorna queries e mutations"""
+    # Carregado só na primeira introspection (fora da inicialização da aplicação)
+    import requests
+
     try:
         data = request.json
         graphql_url = data.get('url', '').strip()
@@ -2447,66 +3739,10 @@ def introspect_graphql():
         if not graphql_url:
             return jsonify({'error': 'URL não fornecida'}), 400
 
-        # Introspection query padrão do GraphQL
-        introspection_query = """
-        query IntrospectionQuery {
-            __schema {
-                queryType { name }
-                mutationType { name }
-                subscriptionType { name }
-                types {
-                    name
-                    kind
-                    description
-                    fields(includeDeprecated: false) {
-                        name
-                        description
-                        args {
-                            name
-                            description
-                            type {
-                                name
-                                kind
-                                ofType {
-                                    name
-                                    kind
-                                    ofType {
-                                        name
-                                        kind
-                                        ofType {
-                                            name
-                                            kind
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                        type {
-                            name
-                            kind
-                            ofType {
-                                name
-                                kind
-                                ofType {
-                                    name
-                                    kind
-                                    ofType {
-                                        name
-                                        kind
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-
         # Faz a requisição para o endpoint GraphQL
         response = requests.post(
             graphql_url,
-            json={'query': introspection_query},
+            json={'query': GRAPHQL_INTROSPECTION_QUERY},
             headers={'Content-Type': 'application/json'},
             timeout=30
         )
@@ -2516,84 +3752,10 @@ def introspect_graphql():
                 'error': f'Erro ao conectar com o endpoint GraphQL: HTTP {response.status_code}'
             }), 400
 
-        introspection_data = response.json()
-
-        if 'errors' in introspection_data:
-            errors = introspection_data['errors']
-            error_messages = [err.get('message', str(err)) for err in errors]
-            return jsonify({
-                'error': f'Erro na introspection: {", ".join(error_messages)}'
-            }), 400
-
-        schema_data = introspection_data.get('data', {}).get('__schema', {})
-
-        if not schema_data:
-            return jsonify({'error': 'Schema vazio ou inválido'}), 400
-
-        # Extrai os tipos Query, Mutation e Subscription
-        query_type_name = schema_data.get('queryType', {}).get('name') if schema_data.get('queryType') else None
-        mutation_type_name = schema_data.get('mutationType', {}).get('name') if schema_data.get('mutationType') else None
-        subscription_type_name = schema_data.get('subscriptionType', {}).get('name') if schema_data.get('subscriptionType') else None
-
-        types = schema_data.get('types', [])
-
-        def format_type(type_obj):
-            """Formata recursivamente um tipo GraphQL para string legível"""
-            if not type_obj:
-                return 'Unknown'
-
-            kind = type_obj.get('kind')
-            name = type_obj.get('name')
-            of_type = type_obj.get('ofType')
-
-            if kind == 'NON_NULL':
-                return f'{format_type(of_type)}!'
-            elif kind == 'LIST':
-                return f'[{format_type(of_type)}]'
-            elif name:
-                return name
-            elif of_type:
-                return format_type(of_type)
-            else:
-                return 'Unknown'
-
-        def extract_fields(type_name):
-            """Extrai campos de um tipo específico"""
-            if not type_name:
-                return []
-
-            for t in types:
-                if t.get('name') == type_name:
-                    fields = t.get('fields', [])
-                    result = []
-                    for field in fields:
-                        args = []
-                        for arg in field.get('args', []):
-                            args.append({
-                                'name': arg.get('name'),
-                                'type': format_type(arg.get('type')),
-                                'description': arg.get('description')
-                            })
-
-                        result.append({
-                            'name': field.get('name'),
-                            'description': field.get('description'),
-                            'type': format_type(field.get('type')),
-                            'args': args
-                        })
-                    return result
-            return []
-
-        queries = extract_fields(query_type_name)
-        mutations = extract_fields(mutation_type_name)
-        subscriptions = extract_fields(subscription_type_name)
-
-        return jsonify({
-            'queries': queries,
-            'mutations': mutations,
-            'subscriptions': subscriptions
-        })
+        return jsonify(parse_graphql_introspection(response.json()))
 
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
     except requests.exceptions.Timeout:
         return jsonify({'error': 'Timeout ao conectar com o endpoint GraphQL'}), 408
     except requests.exceptions.RequestException as e:
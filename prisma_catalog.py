@@ -0,0 +1,916 @@
+"""
+Leitura do catálogo PostgreSQL e geração de schemas Prisma.
+
+Camada sem dependência do Flask (nem da IA): consultas em lote ao pg_catalog,
+extração em paralelo e renderização dos models Prisma em streaming. É usada
+pela aplicação web (main.py) e pela linha de comando (prisma_cli.py), que não
+precisa carregar o servidor para gerar o schema.prisma.
+"""
+import itertools
+import logging
+import os
+import threading
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from operator import itemgetter
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Extração de catálogo em paralelo: lotes de tabelas em conexões diferentes do pool
+# Lotes (conexões) simultâneos por extração; 1 desativa o paralelismo
+CATALOG_PARALLELISM = int(os.getenv('CATALOG_PARALLELISM', '4'))
+# Mínimo de tabelas por lote (extrações menores não compensam conexões extras)
+CATALOG_PARALLEL_MIN_TABLES = int(os.getenv('CATALOG_PARALLEL_MIN_TABLES', '200'))
+
+# Leitura do catálogo em cursores no servidor: linhas trazidas por fetchmany
+CATALOG_FETCH_SIZE = int(os.getenv('CATALOG_FETCH_SIZE', '2000'))
+# Tabelas lidas e renderizadas por lote na geração Prisma em streaming
+CATALOG_BATCH_TABLES = int(os.getenv('CATALOG_BATCH_TABLES', '1000'))
+
+# Condição de information_schema.tables com table_type = 'BASE TABLE' sobre pg_class c:
+# sem tabelas temporárias (as de outras sessões somem com a sessão) e só as tabelas
+# em que o usuário é dono ou tem algum privilégio
+CATALOG_TABLE_FILTER = """c.relkind IN ('r', 'p')
+          AND c.relpersistence <> 't'
+          AND (pg_has_role(c.relowner, 'USAGE')
+               OR has_table_privilege(c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
+               OR has_any_column_privilege(c.oid, 'SELECT, INSERT, UPDATE, REFERENCES'))"""
+
+def connection_runner(dsn):
+    """Retorna run(operation, *args, **kwargs) que executa operation em uma conexão nova (lotes da extração em paralelo)"""
+    def run(operation, *args, **kwargs):
+        conn = psycopg2.connect(dsn)
+        try:
+            return operation(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return run
+
+# Colunas no mesmo formato de information_schema.columns, lidas direto do pg_catalog
+CatalogColumn = namedtuple('CatalogColumn', [
+    'column_name',
+    'data_type',
+    'character_maximum_length',
+    'numeric_precision',
+    'numeric_scale',
+    'is_nullable',
+    'column_default',
+    'udt_name',
+    'ordinal_position'
+])
+
+# Nomes únicos para os cursores no servidor (vários podem estar abertos na mesma conexão)
+catalog_cursor_ids = itertools.count()
+
+def iter_catalog_rows(cursor, query, params=(), server_side=False):
+    """
+    Executa uma consulta do catálogo e retorna as linhas.
+
+    Por padrão é um execute/fetchall no cursor recebido: as consultas pequenas
+    (telas interativas, ENUMs, resolução das tabelas) pagam um único round trip.
+    Com server_side=True (leituras em massa da extração e da geração), a consulta
+    roda em um cursor no servidor e as linhas chegam em lotes de
+    CATALOG_FETCH_SIZE (fetchmany), então o cliente nunca materializa o
+    resultado inteiro. Nas conexões em autocommit (as do pool) esse cursor é
+    WITH HOLD: o resultado fica no servidor até o cursor ser fechado.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL (define a conexão usada)
+        query: Consulta SQL
+        params: Parâmetros da consulta
+        server_side: Lê em lotes por um cursor no servidor
+
+    Returns:
+        Lista de tuplas ou, com server_side, gerador das tuplas (na ordem da consulta)
+    """
+    if not server_side:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    return stream_catalog_rows(cursor.connection, query, params)
+
+def stream_catalog_rows(conn, query, params):
+    """Gera as linhas da consulta a partir de um cursor no servidor (ver iter_catalog_rows)"""
+    server_cursor = conn.cursor(name=f"catalog_{next(catalog_cursor_ids)}", withhold=conn.autocommit)
+    # Se a consulta falhar, o cursor não chega a existir no servidor (não há o que fechar)
+    server_cursor.execute(query, params)
+    try:
+        while True:
+            rows = server_cursor.fetchmany(CATALOG_FETCH_SIZE)
+            yield from rows
+            # Um lote incompleto é o último: evita um round trip só para receber o vazio
+            if len(rows) < CATALOG_FETCH_SIZE:
+                return
+    finally:
+        server_cursor.close()
+
+def fetch_catalog_tables(cursor, selected_schemas=None):
+    """
+    Lista as tabelas (BASE TABLE) dos schemas informados em uma única consulta ao pg_catalog.
+
+    Segue o filtro de information_schema.tables (CATALOG_TABLE_FILTER): tabelas
+    temporárias e tabelas sem nenhum privilégio do usuário ficam de fora.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        selected_schemas: Lista de schemas a listar. Se None, lista todos (exceto system schemas)
+
+    Returns:
+        list: Tuplas (oid, schema, tabela) ordenadas por schema e tabela
+    """
+    schema_filter = ""
+    params = ()
+    if selected_schemas:
+        schema_filter = "AND n.nspname = ANY(%s)"
+        params = (list(selected_schemas),)
+
+    return iter_catalog_rows(cursor, f"""
+        SELECT c.oid, n.nspname, c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE {CATALOG_TABLE_FILTER}
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+          {schema_filter}
+        ORDER BY n.nspname, c.relname
+    """, params)
+
+def fetch_catalog_relations(cursor, tables):
+    """
+    Resolve vários pares (schema, tabela) para oid e relkind em uma única consulta.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        tables: Lista de {schema: 'nome', table: 'nome'}
+
+    Returns:
+        dict: (schema, tabela) -> (oid, relkind) para as relações encontradas
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT r.schema_name, r.table_name, c.oid, c.relkind
+        FROM unnest(%s::text[], %s::text[]) AS r(schema_name, table_name)
+        JOIN pg_namespace n ON n.nspname = r.schema_name
+        JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = r.table_name
+    """, ([item['schema'] for item in tables], [item['table'] for item in tables]))
+
+    return {(schema_name, table_name): (table_oid, relkind)
+            for schema_name, table_name, table_oid, relkind in rows}
+
+def iter_catalog_columns(cursor, table_oids, server_side=False):
+    """
+    Busca as colunas de várias tabelas de uma vez e as gera agrupadas por tabela.
+
+    Os campos reproduzem os de information_schema.columns (data_type, tamanhos,
+    is_nullable, column_default e udt_name), mas sem passar pela view: o tipo
+    "real" (base do domínio) e os tamanhos/precisões são calculados inline, com
+    as mesmas regras das funções information_schema._pg_*, que custam caro
+    quando chamadas para dezenas de milhares de colunas.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Yields:
+        tuple: (oid, lista de CatalogColumn na ordem das colunas), em ordem de oid
+    """
+    # Colunas geradas (PostgreSQL 12+) guardam a expressão em pg_attrdef, mas não têm DEFAULT;
+    # antes do 12 pg_attribute nem tem a coluna attgenerated
+    # DEFAULT não referencia colunas, então não precisa do contexto da tabela.
+    # Comentários ficam fora do texto SQL: a consulta é codificada no client
+    # encoding da conexão (ASCII nos bancos SQL_ASCII)
+    default_expr = "pg_get_expr(ad.adbin, 0)"
+    if cursor.connection.server_version >= 120000:
+        default_expr = f"CASE WHEN a.attgenerated = '' THEN {default_expr} END"
+
+    rows = iter_catalog_rows(cursor, f"""
+        SELECT
+            a.attrelid,
+            a.attname,
+            CASE
+                WHEN t.typtype = 'd' THEN
+                    CASE
+                        WHEN bt.typelem <> 0 AND bt.typlen = -1 THEN 'ARRAY'
+                        WHEN nbt.nspname = 'pg_catalog' THEN format_type(t.typbasetype, NULL)
+                        ELSE 'USER-DEFINED'
+                    END
+                ELSE
+                    CASE
+                        WHEN t.typelem <> 0 AND t.typlen = -1 THEN 'ARRAY'
+                        WHEN nt.nspname = 'pg_catalog' THEN format_type(a.atttypid, NULL)
+                        ELSE 'USER-DEFINED'
+                    END
+            END AS data_type,
+            CASE
+                WHEN tt.typmod = -1 THEN NULL
+                WHEN tt.typid IN (1042, 1043) THEN tt.typmod - 4
+                WHEN tt.typid IN (1560, 1562) THEN tt.typmod
+            END AS character_maximum_length,
+            CASE tt.typid
+                WHEN 21 THEN 16
+                WHEN 23 THEN 32
+                WHEN 20 THEN 64
+                WHEN 1700 THEN CASE WHEN tt.typmod = -1 THEN NULL ELSE ((tt.typmod - 4) >> 16) & 65535 END
+                WHEN 700 THEN 24
+                WHEN 701 THEN 53
+            END AS numeric_precision,
+            CASE
+                WHEN tt.typid IN (21, 23, 20) THEN 0
+                WHEN tt.typid = 1700 THEN CASE WHEN tt.typmod = -1 THEN NULL ELSE (tt.typmod - 4) & 65535 END
+            END AS numeric_scale,
+            CASE WHEN a.attnotnull OR (t.typtype = 'd' AND t.typnotnull) THEN 'NO' ELSE 'YES' END AS is_nullable,
+            {default_expr} AS column_default,
+            COALESCE(bt.typname, t.typname) AS udt_name,
+            a.attnum
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        JOIN pg_namespace nt ON nt.oid = t.typnamespace
+        LEFT JOIN pg_type bt ON t.typtype = 'd' AND bt.oid = t.typbasetype
+        LEFT JOIN pg_namespace nbt ON nbt.oid = bt.typnamespace
+        LEFT JOIN pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+        CROSS JOIN LATERAL (
+            SELECT
+                CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE a.atttypid END AS typid,
+                CASE WHEN t.typtype = 'd' THEN t.typtypmod ELSE a.atttypmod END AS typmod
+        ) tt
+        WHERE a.attrelid = ANY(%s::oid[])
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+        ORDER BY a.attrelid, a.attnum
+    """, (list(table_oids),), server_side)
+
+    for table_oid, table_rows in itertools.groupby(rows, key=itemgetter(0)):
+        yield table_oid, [CatalogColumn(*row[1:]) for row in table_rows]
+
+def fetch_catalog_columns(cursor, table_oids, server_side=False):
+    """
+    Busca as colunas de várias tabelas de uma vez, agrupadas pelo oid da tabela.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Returns:
+        dict: oid -> lista de CatalogColumn na ordem das colunas
+    """
+    return dict(iter_catalog_columns(cursor, table_oids, server_side))
+
+def fetch_catalog_primary_keys(cursor, table_oids, server_side=False):
+    """
+    Busca as colunas de chave primária de várias tabelas de uma vez.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Returns:
+        dict: oid -> lista de colunas na ordem da chave
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT i.indrelid, a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = ANY(%s::oid[]) AND i.indisprimary
+        ORDER BY i.indrelid, array_position(i.indkey, a.attnum)
+    """, (list(table_oids),), server_side)
+
+    primary_keys = {}
+    for table_oid, column_name in rows:
+        primary_keys.setdefault(table_oid, []).append(column_name)
+    return primary_keys
+
+def fetch_catalog_foreign_keys(cursor, table_oids, server_side=False):
+    """
+    Busca as chaves estrangeiras de várias tabelas de uma vez.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Returns:
+        dict: oid -> lista de chaves estrangeiras (uma entrada por par de colunas)
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT
+            c.conrelid,
+            c.conname,
+            a.attname,
+            fn.nspname AS foreign_schema,
+            fc.relname AS foreign_table,
+            fa.attname AS foreign_column
+        FROM pg_constraint c
+        CROSS JOIN LATERAL unnest(c.conkey, c.confkey) WITH ORDINALITY AS k(attnum, fattnum, ord)
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+        JOIN pg_class fc ON fc.oid = c.confrelid
+        JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+        JOIN pg_attribute fa ON fa.attrelid = c.confrelid AND fa.attnum = k.fattnum
+        WHERE c.contype = 'f' AND c.conrelid = ANY(%s::oid[])
+        ORDER BY c.conrelid, c.conname, k.ord
+    """, (list(table_oids),), server_side)
+
+    foreign_keys = {}
+    for row in rows:
+        table_oid, constraint_name, column_name, foreign_schema, foreign_table, foreign_column = row
+        foreign_keys.setdefault(table_oid, []).append({
+            'constraint_name': constraint_name,
+            'column': column_name,
+            'references_schema': foreign_schema,
+            'references_table': foreign_table,
+            'references_column': foreign_column
+        })
+    return foreign_keys
+
+def fetch_catalog_indexes(cursor, table_oids, server_side=False):
+    """
+    Busca os índices (exceto chave primária) de várias tabelas de uma vez.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Returns:
+        dict: oid -> lista de índices com suas colunas na ordem do índice
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT
+            ix.indrelid,
+            i.relname AS index_name,
+            a.attname AS column_name,
+            ix.indisunique AS is_unique
+        FROM pg_index ix
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        CROSS JOIN LATERAL unnest(ix.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+        WHERE ix.indrelid = ANY(%s::oid[])
+            AND NOT ix.indisprimary
+        ORDER BY ix.indrelid, i.relname, k.ord
+    """, (list(table_oids),), server_side)
+
+    indexes = {}
+    for table_oid, index_name, column_name, is_unique in rows:
+        table_indexes = indexes.setdefault(table_oid, {})
+        if index_name not in table_indexes:
+            table_indexes[index_name] = {
+                'name': index_name,
+                'columns': [],
+                'unique': is_unique
+            }
+        table_indexes[index_name]['columns'].append(column_name)
+
+    return {table_oid: list(table_indexes.values()) for table_oid, table_indexes in indexes.items()}
+
+def fetch_catalog_constraints(cursor, table_oids, server_side=False):
+    """
+    Busca as constraints UNIQUE e CHECK de várias tabelas de uma vez.
+
+    Diferenças em relação a information_schema.table_constraints/key_column_usage:
+    as entradas CHECK "*_not_null" que a view cria para colunas NOT NULL (até o
+    PostgreSQL 16) não aparecem, já que a nulidade está nas colunas; e as CHECK
+    trazem as colunas que referenciam (conkey), que key_column_usage não lista.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+        server_side: Lê em lotes por um cursor no servidor (leituras em massa)
+
+    Returns:
+        dict: oid -> lista de constraints com as colunas envolvidas
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT
+            c.conrelid,
+            c.conname,
+            CASE c.contype WHEN 'u' THEN 'UNIQUE' ELSE 'CHECK' END AS constraint_type,
+            a.attname
+        FROM pg_constraint c
+        LEFT JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord) ON true
+        LEFT JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+        WHERE c.contype IN ('u', 'c') AND c.conrelid = ANY(%s::oid[])
+        ORDER BY c.conrelid, c.conname, k.ord
+    """, (list(table_oids),), server_side)
+
+    constraints = {}
+    for table_oid, constraint_name, constraint_type, column_name in rows:
+        table_constraints = constraints.setdefault(table_oid, {})
+        if constraint_name not in table_constraints:
+            table_constraints[constraint_name] = {
+                'name': constraint_name,
+                'type': constraint_type,
+                'columns': []
+            }
+        if column_name:
+            table_constraints[constraint_name]['columns'].append(column_name)
+
+    return {table_oid: list(table_constraints.values()) for table_oid, table_constraints in constraints.items()}
+
+def split_chunks(items, parallelism, min_size):
+    """Divide items em até `parallelism` lotes contíguos de tamanho parecido, com pelo menos min_size itens cada"""
+    count = max(1, min(parallelism, len(items) // max(min_size, 1)))
+    size = max(1, -(-len(items) // count))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def run_catalog_chunks(cursor, items, operation, run_chunk=None):
+    """
+    Executa operation(cursor, lote) em lotes de items e junta os dicts retornados.
+
+    Sem run_chunk, ou com poucos itens, é uma única chamada no cursor recebido. Com
+    run_chunk, os itens são divididos em até CATALOG_PARALLELISM lotes, processados
+    pela thread atual (no cursor recebido) e por threads auxiliares, cada uma com
+    uma conexão obtida por run_chunk. Cada thread pega o próximo lote ainda não
+    iniciado. run_chunk não deve esperar conexão livre (ex.: session_runner(wait=False)):
+    se o pool estiver esgotado, a auxiliar desiste e a thread atual processa os
+    lotes sozinha, sem disputar conexões com outras requisições. Os resultados
+    são juntados na ordem dos lotes: a saída é a mesma da execução sequencial.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        items: Lista a dividir (ex.: tuplas (oid, schema, tabela))
+        operation: Função (cursor, lote) -> dict
+        run_chunk: Função run(operation, *args) que executa operation(conn, *args) com
+                   outra conexão (ex.: connection_runner ou session_runner(wait=False) do main.py)
+    """
+    chunks = split_chunks(items, CATALOG_PARALLELISM, CATALOG_PARALLEL_MIN_TABLES)
+    if not run_chunk or len(chunks) < 2:
+        return operation(cursor, items)
+
+    results = [None] * len(chunks)
+    errors = []
+    progress = {'started': 0, 'finished': 0}
+    condition = threading.Condition()
+
+    def work(chunk_cursor):
+        """Processa os lotes ainda não iniciados até acabarem (ou algum falhar)"""
+        while True:
+            with condition:
+                index = progress['started']
+                if index >= len(chunks) or errors:
+                    return
+                progress['started'] += 1
+            try:
+                results[index] = operation(chunk_cursor, chunks[index])
+            except Exception as e:
+                with condition:
+                    errors.append(e)
+                    condition.notify_all()
+                raise
+            with condition:
+                progress['finished'] += 1
+                condition.notify_all()
+
+    def run_on_connection(conn):
+        chunk_cursor = None
+        try:
+            chunk_cursor = conn.cursor()
+            work(chunk_cursor)
+        finally:
+            if chunk_cursor:
+                chunk_cursor.close()
+
+    def helper():
+        try:
+            run_chunk(run_on_connection)
+        except Exception as e:
+            # Falhas de um lote já estão em errors; aqui sobra só a falta de conexão livre
+            logger.debug(f"Thread auxiliar da extração encerrada: {e}")
+
+    executor = ThreadPoolExecutor(max_workers=len(chunks) - 1)
+    futures = []
+    try:
+        for _ in range(len(chunks) - 1):
+            futures.append(executor.submit(helper))
+        work(cursor)
+        # Espera os lotes que ainda estão em andamento nas outras conexões
+        with condition:
+            while progress['finished'] < progress['started'] and not errors:
+                condition.wait()
+    finally:
+        # Auxiliares que nem começaram são cancelados; as que já rodam não acham mais lotes
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    if errors:
+        raise errors[0]
+
+    result = {}
+    for chunk_result in results:
+        result.update(chunk_result)
+    return result
+
+def fetch_catalog_enums(cursor, schemas):
+    """
+    Busca os ENUMs de vários schemas em uma única consulta.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        schemas: Lista de nomes de schemas
+
+    Returns:
+        dict: schema -> {nome do enum: lista de valores}
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT
+            n.nspname AS schema_name,
+            t.typname AS enum_name,
+            array_agg(e.enumlabel ORDER BY e.enumsortorder) AS enum_values
+        FROM pg_type t
+        JOIN pg_enum e ON t.oid = e.enumtypid
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE n.nspname = ANY(%s)
+        GROUP BY n.nspname, t.typname
+        ORDER BY n.nspname, t.typname
+    """, (list(schemas),))
+
+    enums = {schema_name: {} for schema_name in schemas}
+    for schema_name, enum_name, enum_values in rows:
+        enums[schema_name][enum_name] = enum_values
+    return enums
+
+class EnumRegistry:
+    """
+    Cache de ENUMs por schema com escopo de uma requisição.
+
+    Os schemas ainda não conhecidos são buscados juntos em uma única consulta
+    ao pg_type/pg_enum; depois disso todas as tabelas do mesmo schema reutilizam
+    o resultado.
+    """
+
+    def __init__(self):
+        self._enums = {}
+
+    def load(self, conn, schemas):
+        """Garante que os ENUMs dos schemas informados estejam carregados"""
+        missing = sorted({schema_name for schema_name in schemas if schema_name not in self._enums})
+        if not missing:
+            return
+
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            self._enums.update(fetch_catalog_enums(cursor, missing))
+        finally:
+            if cursor:
+                cursor.close()
+
+        for schema_name in missing:
+            logger.debug(f"ENUMs encontrados no schema '{schema_name}': {list(self._enums[schema_name].keys())}")
+
+    def get(self, conn, schema_name):
+        """Retorna os ENUMs de um schema (nome -> valores)"""
+        self.load(conn, [schema_name])
+        return self._enums[schema_name]
+
+def map_postgres_to_prisma_type(pg_type, udt_name=None):
+    """Mapeia tipos PostgreSQL para tipos Prisma"""
+    type_mapping = {
+        'integer': 'Int',
+        'bigint': 'BigInt',
+        'smallint': 'Int',
+        'serial': 'Int',
+        'bigserial': 'BigInt',
+        'numeric': 'Decimal',
+        'decimal': 'Decimal',
+        'real': 'Float',
+        'double precision': 'Float',
+        'money': 'Decimal',
+        'character varying': 'String',
+        'varchar': 'String',
+        'character': 'String',
+        'char': 'String',
+        'text': 'String',
+        'boolean': 'Boolean',
+        'date': 'DateTime',
+        'timestamp': 'DateTime',
+        'timestamp without time zone': 'DateTime',
+        'timestamp with time zone': 'DateTime',
+        'time': 'DateTime',
+        'json': 'Json',
+        'jsonb': 'Json',
+        'uuid': 'String',
+        'bytea': 'Bytes',
+    }
+
+    # Se o tipo é USER-DEFINED (enum), retorna o nome do tipo
+    if pg_type.lower() == 'user-defined' and udt_name:
+        # Converte para PascalCase (padrão Prisma)
+        return ''.join(word.capitalize() for word in udt_name.split('_'))
+
+    return type_mapping.get(pg_type.lower(), 'String')
+
+def fetch_columns_and_keys(cursor, table_oids):
+    """
+    Returns:
+        dict: oid -> (colunas, chaves primárias)
+    """
+    columns = fetch_catalog_columns(cursor, table_oids, server_side=True)
+    primary_keys = fetch_catalog_primary_keys(cursor, table_oids, server_side=True)
+    return {table_oid: (columns.get(table_oid, []), primary_keys.get(table_oid, [])) for table_oid in table_oids}
+
+def fetch_catalog_used_types(cursor, table_oids):
+    """
+    Lista os tipos USER-DEFINED usados pelas colunas de várias tabelas, sem ler as colunas.
+
+    Segue as regras de data_type/udt_name de fetch_catalog_columns (domínios contam
+    pelo tipo base; arrays não contam), então o resultado coincide com o que
+    find_used_enums veria nas colunas.
+
+    Args:
+        cursor: Cursor aberto na conexão PostgreSQL
+        table_oids: Lista de oids das tabelas
+
+    Returns:
+        set: Pares (schema da tabela, udt_name)
+    """
+    rows = iter_catalog_rows(cursor, """
+        SELECT DISTINCT n.nspname, et.typname
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_type t ON t.oid = a.atttypid
+        JOIN pg_type et ON et.oid = CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE t.oid END
+        JOIN pg_namespace etn ON etn.oid = et.typnamespace
+        WHERE a.attrelid = ANY(%s::oid[])
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+          AND NOT (et.typelem <> 0 AND et.typlen = -1)
+          AND etn.nspname <> 'pg_catalog'
+    """, (list(table_oids),))
+    return set(rows)
+
+def resolve_prisma_catalog(conn, tables, enum_registry=None):
+    """
+    Resolve as tabelas da geração Prisma e os ENUMs que elas usam, sem ler as colunas.
+
+    É a parte da geração que precisa do conjunto inteiro antes do primeiro model
+    (o schema.prisma único começa pelos ENUMs usados); as colunas são lidas
+    depois, em lotes (load_prisma_tables).
+
+    Args:
+        conn: Conexão com o banco
+        tables: Lista de {schema: 'nome', table: 'nome'}
+        enum_registry: EnumRegistry a reutilizar (padrão: um novo)
+
+    Returns:
+        dict: 'tables' com tuplas (schema, tabela, oid) na ordem recebida, 'enums'
+              com os ENUMs de cada schema envolvido e 'used_enums' com os ENUMs
+              usados pelas tabelas ('schema.enum' -> (nome, valores))
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+
+        relations = fetch_catalog_relations(cursor, tables)
+        for item in tables:
+            if (item['schema'], item['table']) not in relations:
+                raise ValueError(f"Tabela não encontrada: {item['schema']}.{item['table']}")
+
+        table_oids = [table_oid for table_oid, _ in relations.values()]
+        used_types = fetch_catalog_used_types(cursor, table_oids)
+
+        # ENUMs de todos os schemas envolvidos em uma única consulta
+        enum_registry = enum_registry or EnumRegistry()
+        schemas = {item['schema'] for item in tables}
+        enum_registry.load(conn, schemas)
+        enums = {schema_name: enum_registry.get(conn, schema_name) for schema_name in schemas}
+
+        used_enums = {}
+        for schema_name, udt_name in sorted(used_types):
+            if udt_name in enums[schema_name]:
+                used_enums[f"{schema_name}.{udt_name}"] = (udt_name, enums[schema_name][udt_name])
+                logger.debug(f"ENUM '{udt_name}' usado no schema '{schema_name}'")
+
+        catalog_tables = [(item['schema'], item['table'], relations[(item['schema'], item['table'])][0])
+                          for item in tables]
+
+        return {'tables': catalog_tables, 'enums': enums, 'used_enums': used_enums}
+    finally:
+        if cursor:
+            cursor.close()
+
+def load_prisma_tables(conn, table_oids, run_chunk=None):
+    """
+    Lê colunas e chaves primárias de um lote de tabelas.
+
+    Args:
+        conn: Conexão com o banco
+        table_oids: Lista de oids das tabelas
+        run_chunk: Executor de lotes em outras conexões, para ler as colunas em paralelo (ver run_catalog_chunks)
+
+    Returns:
+        dict: oid -> (colunas, chaves primárias)
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        return run_catalog_chunks(cursor, table_oids, fetch_columns_and_keys, run_chunk)
+    finally:
+        if cursor:
+            cursor.close()
+
+def load_prisma_catalog(conn, tables, enum_registry=None, run_chunk=None):
+    """
+    Carrega de uma vez tudo que a geração Prisma precisa para uma lista de tabelas.
+
+    Colunas, chaves primárias e ENUMs de todas as tabelas são lidos com poucas
+    consultas em lote; a renderização dos models acontece depois, em memória.
+    Para muitas tabelas, prefira resolve_prisma_catalog com iter_prisma_tables.
+
+    Args:
+        conn: Conexão com o banco
+        tables: Lista de {schema: 'nome', table: 'nome'}
+        enum_registry: EnumRegistry a reutilizar (padrão: um novo)
+        run_chunk: Executor de lotes em outras conexões, para ler as colunas em paralelo (ver run_catalog_chunks)
+
+    Returns:
+        dict: Como resolve_prisma_catalog, mas com 'tables' em tuplas
+              (schema, tabela, colunas, chaves primárias) na ordem recebida
+    """
+    catalog = resolve_prisma_catalog(conn, tables, enum_registry)
+    table_oids = list(dict.fromkeys(table_oid for _, _, table_oid in catalog['tables']))
+    columns_and_keys = load_prisma_tables(conn, table_oids, run_chunk)
+    catalog['tables'] = [(schema_name, table_name, *columns_and_keys[table_oid])
+                         for schema_name, table_name, table_oid in catalog['tables']]
+    return catalog
+
+def iter_prisma_tables(catalog_tables, run, run_chunk=None):
+    """
+    Lê colunas e chaves primárias em lotes de CATALOG_BATCH_TABLES tabelas e gera uma tabela por vez.
+
+    A memória usada fica proporcional ao lote, não ao catálogo: cada lote é lido
+    (em paralelo, se for grande), entregue para renderização e descartado antes
+    do próximo. A conexão só fica presa durante a leitura de cada lote.
+
+    Args:
+        catalog_tables: Tuplas (schema, tabela, oid) de resolve_prisma_catalog
+        run: Função run(operation, *args, **kwargs) que executa operation(conn, ...)
+             em uma conexão (ex.: connection_runner, ou session_runner() no main.py,
+             já que o gerador roda depois que a view retorna)
+        run_chunk: Executor das partes de um lote grande em outras conexões (padrão:
+                   run; no main.py, session_runner(wait=False), ver run_catalog_chunks)
+
+    Yields:
+        tuple: (schema, tabela, colunas, chaves primárias) na ordem recebida
+    """
+    try:
+        for start in range(0, len(catalog_tables), CATALOG_BATCH_TABLES):
+            batch = catalog_tables[start:start + CATALOG_BATCH_TABLES]
+            table_oids = list(dict.fromkeys(table_oid for _, _, table_oid in batch))
+            columns_and_keys = run(load_prisma_tables, table_oids, run_chunk=run_chunk or run)
+            for schema_name, table_name, table_oid in batch:
+                yield (schema_name, table_name, *columns_and_keys[table_oid])
+    except Exception as e:
+        # O download já começou: interrompe a resposta em vez de entregar um arquivo incompleto
+        logger.error(f"Erro no streaming da geração Prisma: {e}")
+        raise
+
+def find_used_enums(schema_name, table_name, columns, enums):
+    """Retorna os nomes dos ENUMs do schema usados pelas colunas de uma tabela"""
+    used_enums = set()
+    for col in columns:
+        if col.data_type.lower() == 'user-defined' and col.udt_name in enums:
+            used_enums.add(col.udt_name)
+            logger.debug(f"Coluna '{col.column_name}' usa ENUM '{col.udt_name}' em {schema_name}.{table_name}")
+        elif col.data_type.lower() == 'user-defined':
+            logger.debug(f"Coluna '{col.column_name}' é USER-DEFINED mas udt_name='{col.udt_name}' não encontrado nos enums: {list(enums.keys())}")
+    return used_enums
+
+def render_prisma_enum(enum_name, enum_values):
+    """Renderiza a definição Prisma de um ENUM"""
+    enum_prisma_name = ''.join(word.capitalize() for word in enum_name.split('_'))
+    prisma_enum = f'enum {enum_prisma_name} {{\n'
+    for value in enum_values:
+        prisma_enum += f'  {value}\n'
+    prisma_enum += '}\n\n'
+    return prisma_enum
+
+def render_prisma_model(schema_name, table_name, columns, primary_keys, enums, include_enums=True):
+    """Renderiza o schema Prisma de uma tabela a partir dos metadados já carregados
+
+    Args:
+        schema_name: Nome do schema PostgreSQL
+        table_name: Nome da tabela
+        columns: Lista de CatalogColumn da tabela
+        primary_keys: Lista de colunas da chave primária
+        enums: ENUMs do schema (nome -> valores)
+        include_enums: Se True, inclui definições de enum no output
+    """
+    # Identifica quais enums são usados nesta tabela
+    used_enums = find_used_enums(schema_name, table_name, columns, enums)
+
+    # Gera definições de ENUMs usados (se solicitado)
+    prisma_schema = ''
+    if include_enums:
+        for enum_name in sorted(used_enums):
+            prisma_schema += render_prisma_enum(enum_name, enums[enum_name])
+
+    # Gera o modelo Prisma
+    model_name = ''.join(word.capitalize() for word in table_name.split('_'))
+
+    prisma_schema += f'model {model_name} {{\n'
+
+    for col in columns:
+        col_name = col.column_name
+        col_default = col.column_default
+        prisma_type = map_postgres_to_prisma_type(col.data_type, col.udt_name)
+
+        # Campos que devem ser sempre opcionais
+        always_optional_fields = ['deleted_at', 'deletedAt', 'updated_at', 'updatedAt', 'createdBy', 'deletedBy']
+        optional = '?' if (col.is_nullable == 'YES' and col_name not in primary_keys) or col_name in always_optional_fields else ''
+
+        attributes = []
+        if col_name in primary_keys:
+            attributes.append('@id')
+        if col_default and 'nextval' in str(col_default):
+            attributes.append('@default(autoincrement())')
+        elif col_default:
+            if 'now()' in str(col_default) or 'CURRENT_TIMESTAMP' in str(col_default):
+                attributes.append('@default(now())')
+
+        attr_str = ' ' + ' '.join(attributes) if attributes else ''
+        prisma_schema += f'  {col_name} {prisma_type}{optional}{attr_str}\n'
+
+    prisma_schema += f'\n  @@map("{table_name}")\n'
+    if schema_name != 'public':
+        prisma_schema += f'  @@schema("{schema_name}")\n'
+    prisma_schema += '}\n'
+
+    return prisma_schema
+
+def stream_prisma_file(catalog):
+    """Gera o schema.prisma único em partes: cabeçalho, ENUMs usados e um model por vez
+
+    Args:
+        catalog: Resultado de load_prisma_catalog, ou de resolve_prisma_catalog com
+                 'tables' trocado por iter_prisma_tables (models lidos em lotes)
+
+    Yields:
+        str: Trechos do arquivo schema.prisma
+    """
+    yield "// Schema Prisma gerado automaticamente\n"
+    yield f"// Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    # ENUMs usados nas tabelas selecionadas (já identificados no catálogo, antes de ler as colunas)
+    used_enums = catalog['used_enums']
+    if used_enums:
+        yield "// Definições de ENUMs\n" + ''.join(
+            render_prisma_enum(*used_enums[key]) for key in sorted(used_enums.keys())
+        )
+
+    # Gera os models (sem incluir enums, já foram gerados acima)
+    yield "// Models\n"
+    for schema, table, columns, primary_keys in catalog['tables']:
+        yield render_prisma_model(schema, table, columns, primary_keys,
+                                  catalog['enums'][schema], include_enums=False) + "\n"
+
+class ZipStreamBuffer:
+    """
+    Destino de escrita não-posicionável para o zipfile.
+
+    Acumula os bytes escritos até que sejam drenados, permitindo enviar cada
+    entrada do ZIP assim que ela é gerada (o zipfile usa data descriptors
+    quando o destino não suporta seek).
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Retorna e descarta os bytes acumulados desde a última chamada"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_prisma_zip(catalog):
+    """Gera o ZIP com um arquivo .prisma por tabela, em pedaços, à medida que renderiza
+
+    Args:
+        catalog: Resultado de load_prisma_catalog, ou de resolve_prisma_catalog com
+                 'tables' trocado por iter_prisma_tables (models lidos em lotes)
+
+    Yields:
+        bytes: Trechos do arquivo ZIP
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for schema, table, columns, primary_keys in catalog['tables']:
+            # No modo múltiplo, cada arquivo inclui seus próprios enums
+            prisma_content = render_prisma_model(schema, table, columns, primary_keys,
+                                                 catalog['enums'][schema], include_enums=True)
+            zip_file.writestr(f'{schema}_{table}.prisma', prisma_content)
+            yield buffer.drain()
+
+    # Diretório central do ZIP
+    yield buffer.drain()
@@ -0,0 +1,128 @@
+"""
+Geração do schema Prisma pela linha de comando, sem iniciar a aplicação web.
+
+Conecta ao banco, seleciona as tabelas por padrões de inclusão/exclusão e grava
+o schema.prisma (ou o ZIP com um arquivo por tabela) à medida que os models são
+renderizados: colunas e chaves primárias são lidas em lotes de
+CATALOG_BATCH_TABLES tabelas, então a memória usada não cresce com o tamanho
+do banco. Só depende do psycopg2 (não carrega Flask, OpenAI nem requests).
+
+Os padrões (fnmatch, diferenciando maiúsculas) são comparados com "schema.tabela";
+um padrão sem ponto vale para o schema inteiro.
+
+Uso:
+    python prisma_cli.py --dsn "host=localhost dbname=app user=postgres" --output prisma/schema.prisma
+    python prisma_cli.py --dsn "..." --include public 'sales.order_*' --exclude '*.tmp_*' --output -
+    python prisma_cli.py --dsn "..." --mode multiple --output schemas.zip
+"""
+import argparse
+import fnmatch
+import logging
+import os
+import sys
+
+import psycopg2
+
+from prisma_catalog import (
+    connection_runner,
+    fetch_catalog_tables,
+    iter_prisma_tables,
+    resolve_prisma_catalog,
+    stream_prisma_file,
+    stream_prisma_zip,
+)
+
+logger = logging.getLogger('prisma_cli')
+
+def matches(patterns, schema_name, table_name):
+    """Indica se schema.tabela casa com algum dos padrões (padrão sem ponto: o schema inteiro)"""
+    qualified_name = f"{schema_name}.{table_name}"
+    return any(fnmatch.fnmatchcase(qualified_name, pattern if '.' in pattern else f"{pattern}.*")
+               for pattern in patterns)
+
+def select_tables(conn, include, exclude):
+    """
+    Lista as tabelas do banco que casam com include e não casam com exclude.
+
+    Returns:
+        list: {schema: 'nome', table: 'nome'} ordenados por schema e tabela
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        tables = fetch_catalog_tables(cursor)
+    finally:
+        if cursor:
+            cursor.close()
+
+    return [{'schema': schema_name, 'table': table_name}
+            for _, schema_name, table_name in tables
+            if matches(include, schema_name, table_name) and not matches(exclude, schema_name, table_name)]
+
+def write_output(parts, output, binary=False):
+    """
+    Grava os trechos gerados assim que ficam prontos.
+
+    Em arquivo, escreve em <output>.tmp e só troca o destino no final: uma falha
+    no meio da geração não deixa um schema incompleto no lugar do anterior.
+    """
+    if output == '-':
+        stream = sys.stdout.buffer if binary else sys.stdout
+        for part in parts:
+            stream.write(part)
+        stream.flush()
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    try:
+        with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o schema Prisma de um banco PostgreSQL sem iniciar a aplicação web')
+    parser.add_argument('--dsn', required=True, help='String de conexão libpq/psycopg2')
+    parser.add_argument('--include', nargs='*', default=['*'],
+                        help='Padrões schema.tabela a incluir (padrão: todas, exceto as dos schemas do sistema)')
+    parser.add_argument('--exclude', nargs='*', default=[], help='Padrões schema.tabela a excluir')
+    parser.add_argument('--mode', choices=['single', 'multiple'], default='single',
+                        help='single: um schema.prisma; multiple: ZIP com um arquivo por tabela (padrão: single)')
+    parser.add_argument('--output', default='schema.prisma',
+                        help="Arquivo de saída, ou '-' para a saída padrão (padrão: schema.prisma)")
+    args = parser.parse_args()
+
+    # Logs vão para stderr, então --output - pode ser redirecionado direto para um arquivo
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', force=True)
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    try:
+        tables = select_tables(conn, args.include, args.exclude)
+        if not tables:
+            logger.error('Nenhuma tabela corresponde aos padrões informados')
+            sys.exit(1)
+        logger.info(f"{len(tables)} tabelas selecionadas")
+
+        # Tabelas e ENUMs usados; as colunas são lidas em lotes durante a escrita
+        catalog = resolve_prisma_catalog(conn, tables)
+    finally:
+        conn.close()
+
+    # Cada lote (e cada parte de um lote grande, em paralelo) usa uma conexão nova
+    catalog['tables'] = iter_prisma_tables(catalog['tables'], connection_runner(args.dsn))
+    if args.mode == 'single':
+        write_output(stream_prisma_file(catalog), args.output)
+    else:
+        write_output(stream_prisma_zip(catalog), args.output, binary=True)
+
+    if args.output != '-':
+        logger.info(f"Schema Prisma gravado em {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Configuração comum dos testes.
+
+Os testes de unidade não precisam de banco: as conexões do psycopg2 são
+substituídas por FakeConnection. Os testes que comparam com o comportamento
+original rodam em um PostgreSQL real e só são executados com TEST_DATABASE_DSN
+definido (ex.: TEST_DATABASE_DSN="host=localhost dbname=postgres user=postgres").
+"""
+import itertools
+import os
+import sys
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Antes de importar o main.py: sem snapshots em disco durante os testes
+os.environ['METADATA_CACHE_DIR'] = ''
+
+class FakeInfo:
+    def __init__(self, conn):
+        self._conn = conn
+
+    @property
+    def transaction_status(self):
+        if self._conn.closed:
+            return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+class FakeCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchone(self):
+        return ('PostgreSQL 16 (fake)',)
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Conexão mínima para os pools: abre, responde SELECT e fecha"""
+
+    def __init__(self, dsn=None, **kwargs):
+        self.dsn = dsn
+        self.kwargs = kwargs
+        self.closed = 0
+        self.autocommit = False
+        self.info = FakeInfo(self)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    """Troca psycopg2.connect por FakeConnection; retorna a lista das conexões abertas"""
+    opened = []
+
+    def connect(*args, **kwargs):
+        conn = FakeConnection(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(psycopg2, 'connect', connect)
+    return opened
+
+schema_ids = itertools.count()
+
+@pytest.fixture
+def pg_conn():
+    """Conexão (autocommit) com o PostgreSQL de TEST_DATABASE_DSN"""
+    dsn = os.getenv('TEST_DATABASE_DSN')
+    if not dsn:
+        pytest.skip('TEST_DATABASE_DSN não definido')
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def pg_schema(pg_conn):
+    """Schema temporário, removido ao final do teste; retorna (conexão, nome do schema)"""
+    schema_name = f"test_{os.getpid()}_{next(schema_ids)}"
+    cursor = pg_conn.cursor()
+    cursor.execute(f'CREATE SCHEMA "{schema_name}"')
+    cursor.close()
+    yield pg_conn, schema_name
+    cursor = pg_conn.cursor()
+    cursor.execute(f'DROP SCHEMA "{schema_name}" CASCADE')
+    cursor.close()
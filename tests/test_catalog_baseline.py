@@ -0,0 +1,119 @@
+"""
+Compara a leitura do catálogo via pg_catalog com as consultas originais em information_schema.
+
+Só roda com TEST_DATABASE_DSN (ver conftest.py). As diferenças aceitas são as
+documentadas em fetch_catalog_constraints; qualquer outra falha o teste.
+"""
+import pytest
+
+from data_dictionary import extract_database_metadata
+from prisma_catalog import CatalogColumn, fetch_catalog_columns, fetch_catalog_tables
+
+FIXTURE_DDL = """
+    CREATE TYPE {schema}.status AS ENUM ('new', 'paid');
+    CREATE DOMAIN {schema}.positive AS numeric(10, 2) CHECK (VALUE > 0);
+    CREATE TABLE {schema}.customers (
+        id serial PRIMARY KEY,
+        email varchar(120) NOT NULL UNIQUE,
+        name text
+    );
+    CREATE TABLE {schema}.orders (
+        id bigserial PRIMARY KEY,
+        customer_id int NOT NULL REFERENCES {schema}.customers (id),
+        status {schema}.status DEFAULT 'new',
+        total numeric(12, 2) NOT NULL,
+        discount {schema}.positive,
+        tags text[],
+        code char(8),
+        created_at timestamptz DEFAULT now(),
+        total_cents bigint GENERATED ALWAYS AS ((total * 100)::bigint) STORED,
+        CONSTRAINT orders_total_check CHECK (total >= 0),
+        CONSTRAINT orders_discount_check CHECK (discount IS NULL OR discount <= total),
+        CONSTRAINT orders_code_customer_key UNIQUE (code, customer_id)
+    );
+"""
+
+BASELINE_COLUMNS_QUERY = """
+    SELECT table_name, column_name, data_type, character_maximum_length, numeric_precision,
+           numeric_scale, is_nullable, column_default, udt_name, ordinal_position
+    FROM information_schema.columns
+    WHERE table_schema = %s
+    ORDER BY table_name, ordinal_position
+"""
+
+# Consulta original das constraints de uma tabela no dicionário de dados
+BASELINE_CONSTRAINTS_QUERY = """
+    SELECT
+        tc.constraint_name,
+        tc.constraint_type,
+        kcu.column_name
+    FROM information_schema.table_constraints AS tc
+    LEFT JOIN information_schema.key_column_usage AS kcu
+        ON tc.constraint_name = kcu.constraint_name
+        AND tc.table_schema = kcu.table_schema
+    WHERE tc.table_schema = %s
+        AND tc.table_name = %s
+        AND tc.constraint_type IN ('UNIQUE', 'CHECK')
+    ORDER BY tc.constraint_name
+"""
+
+@pytest.fixture
+def catalog_schema(pg_schema):
+    conn, schema_name = pg_schema
+    if conn.server_version < 120000:
+        pytest.skip('a fixture usa colunas geradas (PostgreSQL 12+)')
+    cursor = conn.cursor()
+    cursor.execute(FIXTURE_DDL.format(schema=schema_name))
+    cursor.close()
+    return conn, schema_name
+
+def test_columns_match_information_schema(catalog_schema):
+    conn, schema_name = catalog_schema
+    cursor = conn.cursor()
+    cursor.execute(BASELINE_COLUMNS_QUERY, (schema_name,))
+    expected = {}
+    for table_name, *column in cursor.fetchall():
+        expected.setdefault(table_name, []).append(CatalogColumn(*column))
+
+    tables = fetch_catalog_tables(cursor, [schema_name])
+    columns = fetch_catalog_columns(cursor, [table_oid for table_oid, _, _ in tables])
+    cursor.close()
+
+    assert {table_name: columns[table_oid] for table_oid, _, table_name in tables} == expected
+
+def test_dictionary_constraints_match_the_original_query(catalog_schema):
+    conn, schema_name = catalog_schema
+    metadata = extract_database_metadata(conn, [schema_name])
+    tables = metadata['schemas'][schema_name]['tables']
+
+    cursor = conn.cursor()
+    for table_name, table_data in tables.items():
+        cursor.execute(BASELINE_CONSTRAINTS_QUERY, (schema_name, table_name))
+        baseline = {}
+        for constraint_name, constraint_type, column_name in cursor.fetchall():
+            entry = baseline.setdefault(constraint_name, {'type': constraint_type, 'columns': []})
+            if column_name:
+                entry['columns'].append(column_name)
+        current = {const['name']: const for const in table_data['constraints']}
+
+        # information_schema (até o PostgreSQL 16) lista um CHECK "*_not_null" por coluna NOT NULL
+        dropped = set(baseline) - set(current)
+        assert all(name.endswith('_not_null') and baseline[name]['type'] == 'CHECK' for name in dropped)
+        assert set(current) <= set(baseline)
+
+        for name, const in current.items():
+            assert const['type'] == baseline[name]['type']
+            if const['type'] == 'UNIQUE':
+                assert sorted(const['columns']) == sorted(baseline[name]['columns'])
+            else:
+                # key_column_usage não lista colunas de CHECK; o pg_catalog lista as referenciadas
+                assert baseline[name]['columns'] == []
+    cursor.close()
+
+    orders = {const['name']: const for const in tables['orders']['constraints']}
+    assert orders['orders_total_check']['columns'] == ['total']
+    assert sorted(orders['orders_discount_check']['columns']) == ['discount', 'total']
+    assert orders['orders_code_customer_key']['columns'] == ['code', 'customer_id']
+    assert tables['orders']['primary_keys'] == ['id']
+    assert [(fk['column'], fk['references_table'], fk['references_column']) for fk in tables['orders']['foreign_keys']] \
+        == [('customer_id', 'customers', 'id')]
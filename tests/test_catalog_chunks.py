@@ -0,0 +1,68 @@
+import threading
+
+import psycopg2.pool
+import pytest
+
+import prisma_catalog
+from conftest import FakeConnection
+from prisma_catalog import run_catalog_chunks, split_chunks
+
+@pytest.fixture(autouse=True)
+def parallel_settings(monkeypatch):
+    monkeypatch.setattr(prisma_catalog, 'CATALOG_PARALLELISM', 4)
+    monkeypatch.setattr(prisma_catalog, 'CATALOG_PARALLEL_MIN_TABLES', 10)
+
+def tables(count):
+    return [(oid, 'public', f"t{oid}") for oid in range(count)]
+
+def connection_run_chunk(operation, *args):
+    return operation(FakeConnection(), *args)
+
+def exhausted_run_chunk(operation, *args):
+    raise psycopg2.pool.PoolError('connection pool exhausted')
+
+def by_oid(cursor, chunk):
+    return {oid: (threading.get_ident(), cursor) for oid, _, _ in chunk}
+
+def test_split_chunks_keeps_order_and_minimum_size():
+    items = list(range(95))
+    chunks = split_chunks(items, 4, 10)
+    assert len(chunks) == 4
+    assert [item for chunk in chunks for item in chunk] == items
+    assert all(len(chunk) >= 10 for chunk in chunks)
+
+    assert split_chunks(list(range(25)), 4, 10) == [list(range(13)), list(range(13, 25))]
+    assert split_chunks(list(range(5)), 4, 10) == [list(range(5))]
+    assert split_chunks([], 4, 10) == []
+
+def test_without_run_chunk_is_a_single_call_on_the_cursor():
+    calls = []
+    cursor = object()
+
+    def operation(chunk_cursor, chunk):
+        calls.append((chunk_cursor, len(chunk)))
+        return {}
+
+    run_catalog_chunks(cursor, tables(100), operation)
+    run_catalog_chunks(cursor, tables(5), operation, connection_run_chunk)
+    assert calls == [(cursor, 100), (cursor, 5)]
+
+def test_chunks_are_merged_in_order():
+    cursor = object()
+    result = run_catalog_chunks(cursor, tables(100), by_oid, connection_run_chunk)
+    assert list(result) == list(range(100))
+
+def test_caller_processes_every_chunk_when_no_connection_is_free():
+    cursor = object()
+    result = run_catalog_chunks(cursor, tables(100), by_oid, exhausted_run_chunk)
+    assert list(result) == list(range(100))
+    assert {value for value in result.values()} == {(threading.get_ident(), cursor)}
+
+def test_chunk_errors_propagate():
+    def failing(chunk_cursor, chunk):
+        if chunk[0][0] >= 50:
+            raise ValueError('falha no lote')
+        return by_oid(chunk_cursor, chunk)
+
+    with pytest.raises(ValueError, match='falha no lote'):
+        run_catalog_chunks(object(), tables(100), failing, connection_run_chunk)
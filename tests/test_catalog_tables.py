@@ -0,0 +1,84 @@
+"""
+Compara a lista de tabelas lida do pg_catalog com a consulta original em information_schema.tables.
+
+Só roda com TEST_DATABASE_DSN (ver conftest.py). Enquanto os testes rodam, outra
+sessão mantém uma tabela temporária aberta: ela não pode aparecer nas listas.
+"""
+import os
+
+import psycopg2
+import pytest
+
+from main import fetch_table_fingerprints, load_table_search_index
+from prisma_catalog import fetch_catalog_tables
+
+BASELINE_TABLES_QUERY = """
+    SELECT table_schema, table_name
+    FROM information_schema.tables
+    WHERE table_type = 'BASE TABLE'
+      AND table_schema NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY table_schema, table_name
+"""
+
+@pytest.fixture
+def tables_schema(pg_schema):
+    """Schema com uma tabela comum, uma tabela temporária nesta sessão e outra em uma segunda sessão"""
+    conn, schema_name = pg_schema
+    other = psycopg2.connect(os.environ['TEST_DATABASE_DSN'])
+    other.autocommit = True
+    cursor = other.cursor()
+    cursor.execute('CREATE TEMP TABLE leak_t (id int)')
+    cursor.close()
+
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE TABLE "{schema_name}".real_t (id int)')
+    cursor.execute('CREATE TEMP TABLE own_temp_t (id int)')
+    cursor.close()
+    yield conn, schema_name
+    other.close()
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE own_temp_t')
+    cursor.close()
+
+def baseline_tables(cursor):
+    cursor.execute(BASELINE_TABLES_QUERY)
+    return cursor.fetchall()
+
+def catalog_tables(cursor):
+    return [(schema_name, table_name) for _, schema_name, table_name in fetch_catalog_tables(cursor)]
+
+def test_tables_match_information_schema(tables_schema):
+    conn, schema_name = tables_schema
+    cursor = conn.cursor()
+    expected = baseline_tables(cursor)
+    assert (schema_name, 'real_t') in expected
+    assert catalog_tables(cursor) == expected
+
+    assert [(schema, table) for schema, table in load_table_search_index(conn).entries
+            if table in ('real_t', 'leak_t', 'own_temp_t')] == [(schema_name, 'real_t')]
+
+    temp_schemas = [row[0] for row in expected if row[0].startswith('pg_temp')]
+    fingerprints = fetch_table_fingerprints(cursor, [schema_name] + temp_schemas)
+    cursor.close()
+    assert list(fingerprints) == [(schema_name, 'real_t')]
+
+def test_tables_without_privileges_are_not_listed(tables_schema):
+    conn, schema_name = tables_schema
+    role_name = f"{schema_name}_reader"
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE TABLE "{schema_name}".granted_t (id int)')
+    cursor.execute(f'CREATE ROLE "{role_name}"')
+    try:
+        cursor.execute(f'GRANT SELECT ON "{schema_name}".granted_t TO "{role_name}"')
+        cursor.execute(f'SET ROLE "{role_name}"')
+        expected = baseline_tables(cursor)
+        listed = catalog_tables(cursor)
+        cursor.execute('RESET ROLE')
+        assert (schema_name, 'granted_t') in expected
+        assert (schema_name, 'real_t') not in expected
+        assert listed == expected
+    finally:
+        cursor.execute('RESET ROLE')
+        cursor.execute(f'DROP OWNED BY "{role_name}"')
+        cursor.execute(f'DROP ROLE "{role_name}"')
+        cursor.close()
@@ -0,0 +1,57 @@
+import pytest
+
+import main
+from main import ChatResponseCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado pelo teste (time.time do main.py)"""
+    now = [1_000_000.0]
+
+    def advance(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(main.time, 'time', lambda: now[0])
+    return advance
+
+def make_cache(tmp_path, ttl=60, max_entries=3):
+    return ChatResponseCache(str(tmp_path / 'cache' / 'chat.sqlite3'), ttl, max_entries)
+
+def test_key_depends_on_every_message():
+    messages = [{'role': 'system', 'content': 'contexto'}, {'role': 'user', 'content': 'oi'}]
+    key = ChatResponseCache.make_key(messages)
+
+    assert key == ChatResponseCache.make_key([dict(message) for message in messages])
+    assert key != ChatResponseCache.make_key(messages[:1] + [{'role': 'user', 'content': 'olá'}])
+
+def test_returns_stored_answer_until_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=60)
+    assert cache.get('a') is None
+
+    cache.put('a', 'resposta', 'grok-3')
+    clock(59)
+    assert cache.get('a') == {'message': 'resposta', 'model': 'grok-3'}
+    clock(2)
+    assert cache.get('a') is None
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put('a', 'A', 'm')
+    clock(1)
+    cache.put('b', 'B', 'm')
+    clock(1)
+    assert cache.get('a')  # "a" passa a ser a mais recente
+    clock(1)
+    cache.put('c', 'C', 'm')
+
+    assert cache.get('b') is None
+    assert cache.get('a')['message'] == 'A'
+    assert cache.get('c')['message'] == 'C'
+
+def test_unreadable_file_is_treated_as_empty(tmp_path, clock):
+    path = tmp_path / 'chat.sqlite3'
+    path.write_bytes(b'not a database' * 100)
+    cache = ChatResponseCache(str(path), 60, 10)
+
+    assert cache.get('a') is None
+    cache.put('a', 'A', 'm')  # só registra o erro
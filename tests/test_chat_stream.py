@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import ChatStream, complete_chat
+
+def chunk(content=None, model='grok-3', usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(model=model, usage=usage, choices=choices)
+
+CHUNKS = [chunk('Olá'), chunk(''), chunk(', mundo'), chunk(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3))]
+EXPECTED_EVENTS = [
+    main.format_sse('delta', {'content': 'Olá'}),
+    main.format_sse('delta', {'content': ', mundo'}),
+    main.format_sse('done', {'message': 'Olá, mundo', 'model': 'grok-3',
+                             'usage': {'input_tokens': 10, 'output_tokens': 3, 'cached': False}}),
+]
+
+class RecordingCache:
+    def __init__(self):
+        self.saved = []
+
+    def put(self, key, message, model):
+        self.saved.append((key, message, model))
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    cache = RecordingCache()
+    monkeypatch.setattr(main, 'chat_response_cache', cache)
+    return cache
+
+class SyncStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+class AsyncStream(SyncStream):
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.chunks:
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+def fake_client(create):
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_chat_stream_builds_events_and_caches_the_answer(response_cache):
+    chat = ChatStream('chave')
+    events = [event for event in map(chat.feed, CHUNKS) if event]
+    events.append(chat.finish())
+
+    assert events == EXPECTED_EVENTS
+    assert response_cache.saved == [('chave', 'Olá, mundo', 'grok-3')]
+
+def test_complete_chat_formats_and_caches_the_answer(response_cache):
+    response = SimpleNamespace(model='grok-3', usage=SimpleNamespace(prompt_tokens=5, completion_tokens=2),
+                               choices=[SimpleNamespace(message=SimpleNamespace(content='resposta'))])
+
+    assert complete_chat(response) == {'message': 'resposta', 'model': 'grok-3',
+                                       'usage': {'input_tokens': 5, 'output_tokens': 2, 'cached': False}}
+    assert response_cache.saved == []
+    complete_chat(response, 'chave')
+    assert response_cache.saved == [('chave', 'resposta', 'grok-3')]
+
+def test_sync_and_async_streams_send_the_same_events(monkeypatch, response_cache):
+    asgi = pytest.importorskip('asgi')
+    anyio = pytest.importorskip('anyio')
+    streams = []
+
+    def create_sync(**kwargs):
+        assert kwargs['stream'] is True
+        streams.append(SyncStream(CHUNKS))
+        return streams[-1]
+
+    async def create_async(**kwargs):
+        assert kwargs['stream'] is True
+        streams.append(AsyncStream(CHUNKS))
+        return streams[-1]
+
+    monkeypatch.setattr(main, 'grok_client', main.LazyClient(lambda: fake_client(create_sync)))
+    monkeypatch.setattr(asgi, 'async_grok_client', main.LazyClient(lambda: fake_client(create_async)))
+
+    async def collect():
+        return [event async for event in asgi.stream_chat_completion([], 'chave')]
+
+    assert list(main.stream_chat_completion([], 'chave')) == EXPECTED_EVENTS
+    assert anyio.run(collect) == EXPECTED_EVENTS
+    assert response_cache.saved == [('chave', 'Olá, mundo', 'grok-3')] * 2
+    assert all(stream.closed for stream in streams)
+
+def test_stream_errors_become_an_error_event(monkeypatch, response_cache):
+    def create(**kwargs):
+        raise RuntimeError('limite excedido')
+
+    monkeypatch.setattr(main, 'grok_client', main.LazyClient(lambda: fake_client(create)))
+    assert list(main.stream_chat_completion([], 'chave')) == [main.format_sse('error', {'error': 'limite excedido'})]
+    assert response_cache.saved == []
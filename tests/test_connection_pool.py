@@ -0,0 +1,113 @@
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from main import BlockingConnectionPool, PoolTimeoutError
+
+def make_pool(minconn=0, maxconn=2, timeout=1.0, max_idle=60):
+    return BlockingConnectionPool(minconn, maxconn, timeout, max_idle, 'dbname=test')
+
+def test_opens_minconn_and_reuses_idle_connections(fake_connect):
+    pool = make_pool(minconn=1)
+    assert len(fake_connect) == 1
+
+    conn = pool.getconn()
+    assert conn is fake_connect[0]
+    assert conn.autocommit
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert pool.stats()['in_use'] == 1
+
+def test_waits_for_a_returned_connection(fake_connect):
+    pool = make_pool(maxconn=1)
+    held = pool.getconn()
+
+    timer = threading.Timer(0.1, pool.putconn, args=(held,))
+    timer.start()
+    conn = pool.getconn()
+    timer.join()
+
+    assert conn is held
+    stats = pool.stats()
+    assert stats['waits'] == 1 and stats['wait_time_total'] > 0
+    assert stats['timeouts'] == 0
+
+def test_times_out_when_exhausted(fake_connect):
+    pool = make_pool(maxconn=1, timeout=0.05)
+    pool.getconn()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    assert pool.stats()['timeouts'] == 1
+
+def test_non_blocking_getconn_fails_without_touching_stats(fake_connect):
+    pool = make_pool(maxconn=1)
+    pool.getconn()
+
+    with pytest.raises(psycopg2.pool.PoolError):
+        pool.getconn(block=False)
+    stats = pool.stats()
+    assert (stats['waits'], stats['timeouts'], stats['waiting']) == (0, 0, 0)
+
+def test_connects_outside_the_pool_lock(fake_connect):
+    pool = make_pool(maxconn=2)
+    idle = pool.getconn()
+    connecting = threading.Event()
+    release = threading.Event()
+    new_connection = pool._new_connection
+
+    def slow_connection():
+        connecting.set()
+        release.wait(5)
+        return new_connection()
+
+    pool._new_connection = slow_connection
+    worker = threading.Thread(target=pool.getconn)
+    worker.start()
+    assert connecting.wait(5)
+
+    # Enquanto a conexão nova é aberta, o pool continua respondendo e a vaga já conta
+    started = time.monotonic()
+    pool.putconn(idle)
+    assert pool.open_connections() == 2
+    assert time.monotonic() - started < 1
+    assert not pool.close_if_idle()
+
+    release.set()
+    worker.join()
+    assert pool.stats()['in_use'] == 1
+
+def test_failed_connect_releases_the_reserved_slot(fake_connect):
+    pool = make_pool(maxconn=1, timeout=0.05)
+
+    def refuse():
+        raise psycopg2.OperationalError('connection refused')
+
+    new_connection = pool._new_connection
+    pool._new_connection = refuse
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.open_connections() == 0
+
+    pool._new_connection = new_connection
+    assert pool.getconn() is fake_connect[-1]
+
+def test_dead_idle_connection_is_replaced(fake_connect):
+    pool = make_pool(minconn=1)
+    fake_connect[0].close()
+
+    conn = pool.getconn()
+    assert conn is not fake_connect[0]
+    assert not conn.closed
+    assert pool.stats()['discarded'] == 1
+
+def test_putconn_close_discards_the_connection(fake_connect):
+    pool = make_pool()
+    conn = pool.getconn()
+    pool.putconn(conn, close=True)
+
+    assert conn.closed
+    assert pool.open_connections() == 0
+    assert pool.stats()['discarded'] == 1
@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import dictionary_batch
+from dictionary_batch import ProgressFile, build_chunks, parse_chunk_response, retry_delay
+
+def make_table(*columns):
+    return {
+        'columns': [{'name': name, 'type': 'integer', 'type_detail': 'integer', 'nullable': False,
+                     'default': None, 'position': position}
+                    for position, name in enumerate(columns, 1)],
+        'primary_keys': [columns[0]],
+        'foreign_keys': [],
+        'indexes': [],
+        'constraints': []
+    }
+
+def make_metadata(columns_by_table):
+    return {'database_name': 'shop', 'schemas': {
+        'public': {'tables': {name: make_table(*columns) for name, columns in columns_by_table.items()}}
+    }}
+
+def rate_limited(retry_after=None):
+    headers = {} if retry_after is None else {'retry-after': retry_after}
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+def test_build_chunks_splits_tables_in_order():
+    metadata = make_metadata({name: ['id'] for name in ('a', 'b', 'c', 'd', 'e')})
+    chunks = build_chunks(metadata, 2)
+
+    assert [chunk['tables'] for chunk in chunks] == [
+        [('public', 'a'), ('public', 'b')], [('public', 'c'), ('public', 'd')], [('public', 'e')]]
+    assert all(chunk['prompt'].startswith('### Schema: public') for chunk in chunks)
+    assert len({chunk['id'] for chunk in chunks}) == 3
+
+def test_chunk_id_changes_only_with_the_chunk_content():
+    before = build_chunks(make_metadata({'a': ['id'], 'b': ['id']}), 1)
+    after = build_chunks(make_metadata({'a': ['id'], 'b': ['id', 'name']}), 1)
+
+    assert before[0]['id'] == after[0]['id']
+    assert before[1]['id'] != after[1]['id']
+
+def test_parse_chunk_response_accepts_fenced_json():
+    content = 'Segue:\n```json\n{"tables": [{"schema": "public", "table": "a"}]}\n```'
+    assert parse_chunk_response(content) == {'tables': [{'schema': 'public', 'table': 'a'}]}
+
+    with pytest.raises(ValueError):
+        parse_chunk_response('sem json')
+    with pytest.raises(ValueError):
+        parse_chunk_response('{"tables": [')
+
+def test_retry_delay_uses_retry_after_up_to_the_maximum():
+    assert retry_delay(rate_limited('3'), 0) == 3.0
+    assert retry_delay(rate_limited('86400'), 0) == dictionary_batch.RETRY_MAX_DELAY
+    assert retry_delay(rate_limited('-5'), 0) == 0.0
+
+def test_retry_delay_backs_off_exponentially_with_jitter():
+    for attempt in range(10):
+        for error in (ValueError('sem json'), rate_limited(), rate_limited('amanhã')):
+            cap = min(dictionary_batch.RETRY_MAX_DELAY, 2 ** attempt)
+            assert cap / 2 <= retry_delay(error, attempt) <= cap
+
+def test_progress_file_resumes_saved_chunks(tmp_path):
+    path = str(tmp_path / 'dicionario.progress.json')
+    ProgressFile(path).save_chunk('abc', {'public.a': {'description': 'x', 'columns': {}}})
+
+    assert ProgressFile(path).chunks == {'abc': {'public.a': {'description': 'x', 'columns': {}}}}
+    assert not (tmp_path / 'dicionario.progress.json.tmp').exists()
+
+@pytest.mark.parametrize('content', ['{"chunks": {"abc": ', '[]', '{"chunks": []}'])
+def test_unreadable_progress_file_is_treated_as_empty(tmp_path, content):
+    path = tmp_path / 'dicionario.progress.json'
+    path.write_text(content, encoding='utf-8')
+
+    progress = ProgressFile(str(path))
+    assert progress.chunks == {}
+
+    progress.save_chunk('abc', {})
+    assert json.loads(path.read_text(encoding='utf-8')) == {'chunks': {'abc': {}}}
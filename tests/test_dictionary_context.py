@@ -0,0 +1,93 @@
+import pytest
+
+import main
+from main import DictionaryContext, DictionaryContextCache, estimate_tokens
+
+def make_table(columns, primary_keys=('id',), foreign_keys=()):
+    return {
+        'columns': [{'name': name, 'type': 'integer', 'type_detail': 'integer', 'nullable': name != 'id',
+                     'default': None, 'position': position}
+                    for position, name in enumerate(columns, 1)],
+        'primary_keys': list(primary_keys),
+        'foreign_keys': [{'column': column, 'references_schema': 'public',
+                          'references_table': table, 'references_column': 'id'}
+                         for column, table in foreign_keys],
+        'indexes': [],
+        'constraints': []
+    }
+
+@pytest.fixture
+def context():
+    tables = {
+        'customers': make_table(['id', 'name', 'email']),
+        'orders': make_table(['id', 'customer_id', 'total'], foreign_keys=[('customer_id', 'customers')]),
+        'order_items': make_table(['id', 'order_id', 'quantity'], foreign_keys=[('order_id', 'orders')]),
+    }
+    # Tabelas sem relação com a pergunta, para forçar o orçamento
+    for number in range(30):
+        tables[f'audit_log_{number:02d}'] = make_table(['id'] + [f'field_{i}' for i in range(12)])
+    return DictionaryContext({'database_name': 'shop', 'schemas': {'public': {'tables': tables}}})
+
+def test_everything_fits_with_a_large_budget(context):
+    prompt = context.render('quais pedidos?', 1_000_000)
+
+    assert prompt.count('#### Tabela:') == len(context.tables)
+    assert 'Demais tabelas (resumo)' not in prompt
+    assert 'omitidas' not in prompt
+
+def test_tight_budget_keeps_relevant_tables_in_full(context):
+    budget = 1500
+    prompt = context.render('Quais orders cada customer fez?', budget)
+
+    assert estimate_tokens(prompt) <= budget
+    assert '#### Tabela: orders\n' in prompt
+    assert '#### Tabela: customers\n' in prompt
+    assert 'Demais tabelas (resumo)' in prompt
+    assert prompt.count('#### Tabela:') < len(context.tables)
+
+def test_tables_that_do_not_fit_are_counted_as_omitted(context):
+    budget = 700
+    prompt = context.render('orders', budget)
+
+    assert estimate_tokens(prompt) <= budget
+    assert 'tabelas omitidas por limite de contexto' in prompt
+
+def test_rank_prefers_named_tables_and_their_foreign_key_neighbors(context):
+    ranked = [table['key'][1] for table, _ in context.rank('orders')]
+
+    assert ranked[0] == 'orders'
+    assert set(ranked[1:3]) == {'customers', 'order_items'}
+
+def test_context_cache_checks_the_catalog_at_most_every_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(main.time, 'monotonic', lambda: now[0])
+    cache = DictionaryContextCache(30, 3600, 10)
+    checks = []
+    loads = []
+    fingerprint = ['v1']
+
+    def fingerprint_fn():
+        checks.append(now[0])
+        return fingerprint[0], {'tables': fingerprint[0]}
+
+    def loader(state):
+        loads.append(state)
+        return f"contexto {state['tables']}"
+
+    key = ('app@db:5432/shop', ('public',))
+    assert cache.get('s1', key, fingerprint_fn, loader) == 'contexto v1'
+    now[0] += 10
+    assert cache.get('s1', key, fingerprint_fn, loader) == 'contexto v1'
+    assert len(checks) == 1
+
+    # Passado o intervalo, confere o catálogo; sem mudança, não remonta o contexto
+    now[0] += 30
+    assert cache.get('s1', key, fingerprint_fn, loader) == 'contexto v1'
+    assert len(checks) == 2 and len(loads) == 1
+
+    # Com mudança, o loader recebe o estado já calculado na verificação
+    fingerprint[0] = 'v2'
+    now[0] += 30
+    assert cache.get('s1', key, fingerprint_fn, loader) == 'contexto v2'
+    assert len(checks) == 3
+    assert loads == [{'tables': 'v1'}, {'tables': 'v2'}]
@@ -0,0 +1,79 @@
+import pytest
+
+import main
+from main import ConnectionPoolRegistry, NotConnectedError, PoolTimeoutError
+
+@pytest.fixture(autouse=True)
+def small_pools(monkeypatch, fake_connect):
+    monkeypatch.setattr(main, 'DB_POOL_MIN', 1)
+    monkeypatch.setattr(main, 'DB_POOL_MAX', 3)
+    monkeypatch.setattr(main, 'DB_POOL_TIMEOUT', 0.2)
+
+def params(database, password='secret'):
+    return {'host': 'db', 'port': '5432', 'database': database, 'user': 'app', 'password': password}
+
+def test_sessions_on_the_same_target_share_a_pool():
+    registry = ConnectionPoolRegistry(10, 600, 100)
+    registry.connect('s1', params('shop'))
+    registry.connect('s2', params('shop'))
+    registry.connect('s3', params('shop', password='other'))
+
+    assert registry.get('s1').pool is registry.get('s2').pool
+    assert registry.get('s1').pool is not registry.get('s3').pool
+    assert registry.get('s1').target == 'app@db:5432/shop'
+    assert registry.stats()['pools'] == 2
+
+def test_unknown_session_is_not_connected():
+    registry = ConnectionPoolRegistry(10, 600, 100)
+    with pytest.raises(NotConnectedError):
+        registry.get('missing')
+    with pytest.raises(NotConnectedError):
+        registry.get(None)
+
+def test_least_recently_used_sessions_are_forgotten():
+    registry = ConnectionPoolRegistry(10, 600, 2)
+    for session_id in ('s1', 's2', 's3'):
+        registry.connect(session_id, params('shop'))
+
+    with pytest.raises(NotConnectedError):
+        registry.get('s1')
+    assert registry.stats()['sessions'] == 2
+
+def test_max_connections_is_a_hard_cap_across_pools(fake_connect):
+    registry = ConnectionPoolRegistry(2, 600, 100)
+    registry.connect('a', params('shop'))
+    registry.connect('b', params('crm'))
+    pool_a = registry.get('a').pool
+    pool_b = registry.get('b').pool
+
+    # O pool "a" precisa de uma segunda conexão: fecha a ociosa do pool "b"
+    held = [pool_a.getconn(), pool_a.getconn()]
+    assert registry.stats()['open_connections'] == 2
+    assert pool_b.stats()['idle'] == 0
+
+    # Sem conexões ociosas em lugar nenhum, o pool "b" espera e desiste no tempo limite
+    with pytest.raises(PoolTimeoutError):
+        pool_b.getconn()
+    with pytest.raises(main.psycopg2.pool.PoolError):
+        pool_b.getconn(block=False)
+    assert len([conn for conn in fake_connect if not conn.closed]) == 2
+
+    # Uma conexão devolvida ao pool "a" fica ociosa e pode ser tomada pelo "b"
+    pool_a.putconn(held.pop())
+    conn = pool_b.getconn()
+    assert not conn.closed
+    assert registry.stats()['open_connections'] == 2
+    assert len([conn for conn in fake_connect if not conn.closed]) == 2
+
+def test_idle_pools_past_the_ttl_are_closed_and_recreated(fake_connect):
+    registry = ConnectionPoolRegistry(10, 0, 100)
+    registry.connect('a', params('shop'))
+    pool_a = registry.get('a').pool
+    registry.connect('b', params('crm'))
+
+    assert pool_a.closed
+    assert registry.stats()['open_connections'] == 1
+
+    recreated = registry.get('a').pool
+    assert recreated is not pool_a and not recreated.closed
+    assert registry.stats()['open_connections'] <= 2
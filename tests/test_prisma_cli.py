@@ -0,0 +1,36 @@
+from conftest import FakeConnection, FakeCursor
+from prisma_cli import matches, select_tables
+
+CATALOG = [
+    (1, 'public', 'users'),
+    (2, 'public', 'tmp_import'),
+    (3, 'sales', 'order_items'),
+    (4, 'sales', 'orders'),
+    (5, 'Sales', 'Order_Archive'),
+]
+
+class CatalogConnection(FakeConnection):
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(CATALOG)
+
+def selected(include, exclude=()):
+    return [(table['schema'], table['table'])
+            for table in select_tables(CatalogConnection(), include, list(exclude))]
+
+def test_pattern_without_dot_matches_the_whole_schema():
+    assert matches(['public'], 'public', 'users')
+    assert not matches(['public'], 'sales', 'orders')
+    assert not matches(['pub'], 'public', 'users')
+
+def test_patterns_are_case_sensitive():
+    assert matches(['sales.order_*'], 'sales', 'order_items')
+    assert not matches(['sales.order_*'], 'Sales', 'Order_Archive')
+    assert not matches([], 'public', 'users')
+
+def test_select_tables_applies_include_then_exclude():
+    assert selected(['*']) == [(schema, table) for _, schema, table in CATALOG]
+    assert selected(['public', 'sales.order_*']) == [
+        ('public', 'users'), ('public', 'tmp_import'), ('sales', 'order_items')]
+    assert selected(['*'], ['*.tmp_*', 'Sales']) == [
+        ('public', 'users'), ('sales', 'order_items'), ('sales', 'orders')]
+    assert selected(['missing']) == []
@@ -0,0 +1,51 @@
+import io
+import zipfile
+
+from prisma_catalog import CatalogColumn, ZipStreamBuffer, render_prisma_model, stream_prisma_zip
+
+def column(name, data_type, udt_name, position, nullable='YES', default=None):
+    return CatalogColumn(name, data_type, None, None, None, nullable, default, udt_name, position)
+
+TABLES = [
+    ('public', 'orders', [
+        column('id', 'integer', 'int4', 1, 'NO', "nextval('orders_id_seq'::regclass)"),
+        column('status', 'USER-DEFINED', 'order_status', 2),
+    ], ['id']),
+    ('sales', 'channels', [column('name', 'text', 'text', 1, 'NO')], ['name']),
+]
+ENUMS = {'public': {'order_status': ['new', 'paid']}, 'sales': {}}
+
+def test_buffer_hands_out_each_write_once():
+    buffer = ZipStreamBuffer()
+    buffer.write(b'abc')
+    buffer.write(memoryview(b'de'))
+
+    assert buffer.drain() == b'abcde'
+    assert buffer.drain() == b''
+
+def test_zip_has_one_file_per_table_with_its_enums():
+    data = b''.join(stream_prisma_zip({'tables': TABLES, 'enums': ENUMS}))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['public_orders.prisma', 'sales_channels.prisma']
+        for schema, table, columns, primary_keys in TABLES:
+            expected = render_prisma_model(schema, table, columns, primary_keys, ENUMS[schema], include_enums=True)
+            assert zip_file.read(f'{schema}_{table}.prisma').decode('utf-8') == expected
+        assert 'enum OrderStatus' in zip_file.read('public_orders.prisma').decode('utf-8')
+
+def test_each_entry_is_sent_before_the_next_table_is_read():
+    rendered = []
+
+    def tables():
+        for table in TABLES:
+            rendered.append(table[1])
+            yield table
+
+    stream = stream_prisma_zip({'tables': tables(), 'enums': ENUMS})
+    first = next(stream)
+
+    assert rendered == ['orders']
+    assert first.startswith(b'PK\x03\x04') and b'public_orders.prisma' in first
+    assert b'PK\x05\x06' in b''.join(stream)  # fim do diretório central, no último trecho
+    assert rendered == ['orders', 'channels']
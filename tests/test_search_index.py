@@ -0,0 +1,81 @@
+import pytest
+
+from main import TableSearchIndex, load_table_search_index, search_catalog
+
+ROWS = [
+    ('empty', None),
+    ('public', 'Order%X'),
+    ('public', 'order_items'),
+    ('public', 'orders'),
+    ('public', 'orders_2024'),
+    ('public', 'ordersXitems'),
+    ('sales', 'B_a'),
+    ('sales', 'b_Z'),
+    ('sales', 'orders'),
+]
+
+@pytest.fixture
+def index():
+    return TableSearchIndex(ROWS)
+
+def test_counts_tables_per_schema_and_skips_partitions(index):
+    assert index.table_counts == {'empty': 0, 'public': 5, 'sales': 3}
+    assert ('public', 'orders_2024') not in index.entries
+    assert index.has_table('public', 'orders')
+    assert not index.has_table('public', 'ORDERS')
+
+def test_find_by_name_is_exact(index):
+    assert index.find_by_name('orders') == [('public', 'orders'), ('sales', 'orders')]
+    assert index.find_by_name('order') == []
+
+def test_underscore_is_a_single_character_wildcard(index):
+    # ILIKE '%order_%': o "_" casa com qualquer caractere, inclusive "s"
+    assert index.find_by_fragment('order_', schema_name='public') == [
+        ('public', 'Order%X'), ('public', 'order_items'), ('public', 'orders'), ('public', 'ordersXitems')
+    ]
+    assert index.find_by_fragment('b_', schema_name='sales') == [('sales', 'B_a'), ('sales', 'b_Z')]
+
+def test_percent_and_escapes_follow_like(index):
+    assert index.find_by_fragment('rs%ms') == [('public', 'ordersXitems')]
+    assert index.find_by_fragment('\\%') == [('public', 'Order%X')]
+    assert index.find_by_fragment('r\\_i') == [('public', 'order_items')]
+
+def test_fragment_is_case_insensitive_and_keeps_row_order(index):
+    assert index.find_by_fragment('ORDERS') == [('public', 'orders'), ('public', 'ordersXitems'), ('sales', 'orders')]
+    assert index.find_by_fragment('orders', limit=2) == [('public', 'orders'), ('public', 'ordersXitems')]
+
+def test_search_catalog_schema_and_partial_matches(index):
+    result = search_catalog(index, 'sales')
+    assert result['schema_found'] and result['table_count'] == 3
+    assert result['tables'] == []
+
+    result = search_catalog(index, 'public.order_')
+    assert [item['table'] for item in result['tables']] == ['Order%X', 'order_items', 'orders', 'ordersXitems']
+
+    result = search_catalog(index, 'public.orders')
+    assert result['tables'] == [{'schema': 'public', 'table': 'orders'}]
+
+# Consulta original da busca parcial em um schema (information_schema + ILIKE)
+BASELINE_PARTIAL_QUERY = """
+    SELECT table_schema, table_name
+    FROM information_schema.tables
+    WHERE table_schema = %s
+      AND table_name ILIKE %s
+      AND table_type = 'BASE TABLE'
+      AND table_schema NOT IN ('pg_catalog', 'information_schema')
+      AND table_name !~ '(_p|p_|_)[0-9]+$'
+    ORDER BY table_name
+"""
+
+@pytest.mark.parametrize('fragment', ['order_', 'ORDER', '_', 'rs%ms', '\\%', 'r\\_i', 'b_', 'x\\', 'zzz'])
+def test_partial_search_matches_the_original_query(pg_schema, fragment):
+    conn, schema_name = pg_schema
+    cursor = conn.cursor()
+    for table_name in ['Order%X', 'order_items', 'orders', 'orders_2024', 'ordersXitems', 'B_a', 'b_Z', 'ab']:
+        cursor.execute(f'CREATE TABLE "{schema_name}"."{table_name}" (id int)')
+    cursor.execute(BASELINE_PARTIAL_QUERY, (schema_name, f'%{fragment}%'))
+    expected = [{'schema': schema, 'table': table} for schema, table in cursor.fetchall()]
+    cursor.close()
+
+    result = search_catalog(load_table_search_index(conn), f'{schema_name}.{fragment}')
+    assert result['tables'] == expected